@@ -0,0 +1,323 @@
+# benchmarks/run.py
+"""
+Standalone benchmark suite for the analysis pipeline, run from backend/:
+
+    python -m benchmarks.run [--scale small|medium|large] [--only NAME ...]
+                             [--claude-latency S] [--smtp-latency S]
+                             [--tolerance F] [--update-baselines]
+
+Data comes from a seeded MockConnectWiseClient; Claude and SMTP are local
+stubs with configurable latency. Every benchmark reports throughput,
+p50/p99 latency of its unit of work and peak traced memory (the startup
+benchmark reports worker RSS instead), and the run exits non-zero when a result regresses past the tolerance against
+benchmarks/baselines.json.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import List, Dict, Any, Callable, Optional, Tuple
+from unittest.mock import patch
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+REPO_ROOT = BENCHMARK_DIR.parent.parent
+BASELINES_PATH = BENCHMARK_DIR / 'baselines.json'
+
+# Keep every SQLite file the code under test opens out of the working tree
+_WORKDIR = tempfile.mkdtemp(prefix='cw-bench-')
+for _name, _file in (('TICKET_STORE_PATH', 'tickets.db'), ('SNAPSHOT_STORE_PATH', 'snapshots.db'),
+                     ('ALERT_OUTBOX_PATH', 'outbox.db')):
+    os.environ[_name] = os.path.join(_WORKDIR, _file)
+os.environ['CLAUDE_CACHE_PATH'] = ''
+os.environ['ALERT_STATE_PATH'] = ''
+os.environ.setdefault('ANTHROPIC_API_KEY', 'benchmark-stub')
+os.environ.setdefault('RECIPIENT_EMAIL', 'alerts@example.com')
+os.environ.setdefault('NOTIFICATION_EMAIL', 'alerts@example.com')
+
+from src.connectwise.archive import TicketArchive
+from src.connectwise.mock_client import MockConnectWiseClient
+from src.connectwise.models import Ticket
+from src.monitoring.alerts import AlertManager
+from src.monitoring.claude_analyzer import ClaudeAnalyzer
+from src.monitoring.dispatch import AlertDispatcher
+from src.monitoring.outbreaks import OutbreakDetector
+from src.monitoring.pattern_engine import PatternEngine
+from src.monitoring.ticket_index import TicketIndex
+from .stubs import StubAnthropic, StubAsyncAnthropic, StubSMTP
+
+SCALES = {
+    'small': dict(users=2000, tickets_per_day=7000, days=7),
+    'medium': dict(users=5000, tickets_per_day=70000, days=7),
+    'large': dict(users=10000, tickets_per_day=300000, days=7),
+}
+PAGE_SIZE = 1000
+END = datetime(2024, 6, 1, tzinfo=timezone.utc)
+STARTUP_RUNS = 5
+CONCURRENT_USERS = 400
+
+# What a fresh gunicorn worker does before serving: import the app, answer one request
+STARTUP_SCRIPT = """
+import resource, sys
+sys.path.insert(0, sys.argv[1])
+import routes
+routes.app.test_client().get('/')
+try:
+    # ru_maxrss can carry over the parent's peak across exec; VmHWM is this process's own
+    with open('/proc/self/status') as f:
+        print(next(line.split()[1] for line in f if line.startswith('VmHWM:')))
+except OSError:
+    print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+class Result:
+    def __init__(self, name: str, items: int, elapsed: float, latencies: List[float]):
+        self.name = name
+        self.items = items
+        self.elapsed = elapsed
+        self.latencies = sorted(latencies)
+        self.peak_mb = 0.0
+
+    def percentile(self, q: float) -> float:
+        index = min(len(self.latencies) - 1, int(round(q * (len(self.latencies) - 1))))
+        return self.latencies[index] * 1000
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            'throughput': round(self.items / self.elapsed, 1),
+            'p50_ms': round(self.percentile(0.5), 3),
+            'p99_ms': round(self.percentile(0.99), 3),
+            'peak_mb': round(self.peak_mb, 2),
+        }
+
+def _timed(units: List[Callable[[], Any]]) -> Tuple[float, List[float]]:
+    latencies = []
+    started = time.perf_counter()
+    for unit in units:
+        unit_started = time.perf_counter()
+        unit()
+        latencies.append(time.perf_counter() - unit_started)
+    return time.perf_counter() - started, latencies
+
+class Suite:
+    """Shared fixtures; each bench_* method returns (items, units of work)"""
+    def __init__(self, scale: str, claude_latency: float, smtp_latency: float):
+        self.client = MockConnectWiseClient(seed=7, end=END, **SCALES[scale])
+        self.claude_latency = claude_latency
+        StubSMTP.latency = smtp_latency
+
+        start = END - timedelta(days=self.client.days)
+        raw = self.client.get_tickets(start, END)
+        self.pages = [json.dumps(raw[i:i + PAGE_SIZE]).encode() for i in range(0, len(raw), PAGE_SIZE)]
+        self.tickets = [Ticket.from_api(t) for t in raw]
+        del raw
+        self.patterns = PatternEngine().find_patterns(self.tickets, scopes=('user',))
+
+    def bench_fetch_parse(self):
+        def parse(page):
+            return lambda: [Ticket.from_api(t) for t in json.loads(page)]
+        return len(self.tickets), [parse(page) for page in self.pages]
+
+    def bench_grouping(self):
+        index = TicketIndex()
+        pages = [self.tickets[i:i + PAGE_SIZE] for i in range(0, len(self.tickets), PAGE_SIZE)]
+        units = [lambda page=page: index.add_many(page) for page in pages]
+        now = END.timestamp()
+        units += [lambda seconds=seconds: index.users_with_at_least(2, seconds, now) for seconds in index.windows]
+        return len(self.tickets), units
+
+    def bench_pattern_detection(self):
+        engine = PatternEngine()
+        return len(self.tickets) * 3, [lambda: engine.find_patterns(self.tickets)] * 3
+
+    def bench_pattern_detection_raw(self):
+        """From API dicts, as a member's fetched tickets and the store-less window arrive"""
+        raw = [ticket for page in self.pages for ticket in json.loads(page)]
+        engine = PatternEngine()
+        return len(raw) * 3, [lambda: engine.find_patterns(raw)] * 3
+
+    def bench_outbreak_detection(self):
+        pages = [self.tickets[i:i + PAGE_SIZE] for i in range(0, len(self.tickets), PAGE_SIZE)]
+        detector = OutbreakDetector()
+        return len(self.tickets), [lambda page=page: detector.add_many(page) for page in pages]
+
+    def bench_archive_queries(self):
+        """Baseline, trend and board queries over the whole archived dataset, read memory-mapped"""
+        archive = TicketArchive(os.path.join(_WORKDIR, 'archive'))
+        archive.append(self.tickets)
+        start = END - timedelta(days=self.client.days)
+        users = sorted({t.user for t in self.tickets})[:500]
+        units = [
+            lambda: archive.user_baselines(users, END, days=self.client.days),
+            lambda: archive.daily_counts(start, END, by='issue'),
+            lambda: archive.count_tickets(start, END, boards=['Escalations']),
+        ]
+        return len(self.tickets) * len(units), units
+
+    def bench_claude_batched(self):
+        analyzer = ClaudeAnalyzer(dispatcher=AlertDispatcher(os.path.join(_WORKDIR, 'claude_outbox.db')))
+        analyzer.client = StubAnthropic(self.claude_latency)
+        analyzer.prefilter = None
+        cutoff = END.timestamp() - analyzer.RECENT_SECONDS
+        window = [t for t in self.tickets if t.entered >= cutoff]
+        users = len({t.user for t in window})
+
+        def analyze():
+            # The dataset ends at END, so analyze as of then
+            with patch('src.monitoring.claude_analyzer.time.time', return_value=END.timestamp()):
+                analyzer.analyze_user_patterns_batched(window)
+        return users, [analyze]
+
+    def bench_claude_concurrent(self):
+        """
+        One request per user, in flight together, for a slice of users; the
+        rate limits are lifted so the stub latency and concurrency dominate
+        """
+        analyzer = ClaudeAnalyzer(dispatcher=AlertDispatcher(os.path.join(_WORKDIR, 'concurrent_outbox.db')))
+        analyzer.async_client = StubAsyncAnthropic(self.claude_latency)
+        analyzer.prefilter = None
+        cutoff = END.timestamp() - analyzer.RECENT_SECONDS
+        users = sorted({t.user for t in self.tickets if t.entered >= cutoff})[:CONCURRENT_USERS]
+        selected = set(users)
+        window = [t for t in self.tickets if t.entered >= cutoff and t.user in selected]
+
+        def analyze():
+            with patch('src.monitoring.claude_analyzer.time.time', return_value=END.timestamp()), \
+                    patch.multiple('src.monitoring.claude_analyzer.settings', CLAUDE_REQUESTS_PER_MINUTE=1e9,
+                                   CLAUDE_INPUT_TOKENS_PER_MINUTE=1e12, CLAUDE_OUTPUT_TOKENS_PER_MINUTE=1e12):
+                analyzer.analyze_user_patterns_concurrent(window)
+        return len(users), [analyze]
+
+    def bench_alert_render(self):
+        manager = AlertManager(dispatcher=AlertDispatcher(os.path.join(_WORKDIR, 'render_outbox.db')))
+
+        def render_all():
+            for pattern in self.patterns:
+                manager._create_alert_message(pattern['user'], [pattern])
+        return len(self.patterns) * 20, [render_all] * 20
+
+    def bench_alert_dispatch(self):
+        dispatcher = AlertDispatcher(os.path.join(_WORKDIR, 'dispatch_outbox.db'), flush_seconds=3600)
+        alerts = self.patterns[:2000]
+
+        def enqueue_and_flush(batch):
+            def unit():
+                for i, pattern in enumerate(batch):
+                    dispatcher.enqueue(f"team{i % 20}@example.com", pattern['user'], pattern['pattern_value'])
+                dispatcher.flush()
+            return unit
+        return len(alerts), [enqueue_and_flush(alerts[i:i + 200]) for i in range(0, len(alerts), 200)]
+
+    def bench_endpoints(self):
+        sys.path.insert(0, str(REPO_ROOT))
+        import routes
+        formatted = [{'user': p['user'], 'ticket_count': p['ticket_count'], 'time_period': '3 days',
+                      'pattern_details': {'issue_type': p['pattern_value']}, 'detected_at': p['last_occurrence']}
+                     for p in self.patterns[:500]]
+        routes.services.snapshot_store().publish({
+            'patterns_user': {'timestamp': END.isoformat(), 'patterns': formatted},
+            'patterns_live': {'timestamp': END.isoformat(), 'ticket_count': len(self.tickets), 'patterns': formatted},
+        })
+        http = routes.app.test_client()
+        etag = http.get('/api/patterns/user').headers['ETag'].strip('"')
+
+        units = []
+        for i in range(1500):
+            if i % 3 == 0:
+                units.append(lambda: http.get('/api/patterns/user', headers={'If-None-Match': f'"{etag}"'}))
+            elif i % 3 == 1:
+                units.append(lambda: http.get('/api/patterns/user'))
+            else:
+                units.append(lambda: http.get('/api/patterns/live'))
+        return len(units), units
+
+    def bench_startup(self):
+        """
+        Cold start of an API worker in a fresh interpreter; reports the
+        largest resident set size instead of traced memory
+        """
+        rss_kb = []
+
+        def start_worker():
+            output = subprocess.run([sys.executable, '-c', STARTUP_SCRIPT, str(REPO_ROOT)],
+                                    cwd=BENCHMARK_DIR.parent, capture_output=True, text=True, check=True).stdout
+            rss_kb.append(int(output.split()[-1]))
+        return STARTUP_RUNS, [start_worker] * STARTUP_RUNS, lambda: max(rss_kb) / 1024
+
+def run(suite: Suite, names: List[str]) -> List[Result]:
+    results = []
+    for name in names:
+        bench = getattr(suite, f"bench_{name}")
+        items, units, *peak = bench()
+        units[0]()  # Warm up caches and lazy imports outside the measurement
+        elapsed, latencies = _timed(units)
+        result = Result(name, items, elapsed, latencies)
+
+        if peak:
+            # The benchmark measured its own memory (e.g. in a subprocess)
+            result.peak_mb = peak[0]()
+        else:
+            # Peak memory from a second, traced pass so tracing does not skew the timings
+            items, units = bench()
+            tracemalloc.start()
+            _timed(units)
+            result.peak_mb = tracemalloc.get_traced_memory()[1] / 1e6
+            tracemalloc.stop()
+
+        results.append(result)
+        print(f"{name:<20} {result.as_dict()}", flush=True)
+    return results
+
+def regressions(results: List[Result], baselines: Dict[str, Dict[str, float]], tolerance: float) -> List[str]:
+    failures = []
+    for result in results:
+        base = baselines.get(result.name)
+        if not base:
+            continue
+        current = result.as_dict()
+        if current['throughput'] < base['throughput'] * (1 - tolerance):
+            failures.append(f"{result.name}: throughput {current['throughput']} < baseline {base['throughput']}")
+        # Sub-millisecond latencies are too noisy to compare relatively
+        if current['p99_ms'] > base['p99_ms'] * (1 + tolerance) + 1.0:
+            failures.append(f"{result.name}: p99 {current['p99_ms']}ms > baseline {base['p99_ms']}ms")
+        if current['peak_mb'] > base['peak_mb'] * (1 + tolerance) + 1.0:
+            failures.append(f"{result.name}: peak memory {current['peak_mb']}MB > baseline {base['peak_mb']}MB")
+    return failures
+
+def main(argv: Optional[List[str]] = None) -> int:
+    names = [name[len('bench_'):] for name in dir(Suite) if name.startswith('bench_')]
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+    parser.add_argument('--only', nargs='+', choices=names)
+    parser.add_argument('--claude-latency', type=float, default=0.05, help='seconds per stubbed Claude call')
+    parser.add_argument('--smtp-latency', type=float, default=0.05, help='seconds per stubbed SMTP message')
+    parser.add_argument('--tolerance', type=float, default=0.5, help='allowed relative regression')
+    parser.add_argument('--update-baselines', action='store_true')
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    with patch('smtplib.SMTP', StubSMTP):
+        suite = Suite(args.scale, args.claude_latency, args.smtp_latency)
+        print(f"Generated {len(suite.tickets)} tickets for {suite.client.users} users "
+              f"in {time.perf_counter() - started:.1f}s", flush=True)
+        results = run(suite, args.only or names)
+
+    all_baselines = json.loads(BASELINES_PATH.read_text()) if BASELINES_PATH.exists() else {}
+    if args.update_baselines:
+        all_baselines.setdefault(args.scale, {}).update({r.name: r.as_dict() for r in results})
+        BASELINES_PATH.write_text(json.dumps(all_baselines, indent=2, sort_keys=True) + '\n')
+        print(f"Baselines for '{args.scale}' written to {BASELINES_PATH}")
+        return 0
+
+    failures = regressions(results, all_baselines.get(args.scale, {}), args.tolerance)
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,91 @@
+# benchmarks/stubs.py
+import asyncio
+import re
+import threading
+import time
+from types import SimpleNamespace
+from typing import List, Dict, Any
+
+_SECTION_RE = re.compile(r'^\[(U\d+)\] User: ', re.MULTILINE)
+
+def _tool_use(name: str, payload: Dict[str, Any]) -> SimpleNamespace:
+    return SimpleNamespace(content=[SimpleNamespace(type='tool_use', name=name, input=payload)])
+
+def _verdict(significance: str) -> Dict[str, Any]:
+    return {'has_pattern': True, 'issue_type': 'Benchmark issue', 'ticket_count': 2,
+            'significance': significance, 'user_impact': 'Synthetic'}
+
+class StubMessages:
+    def __init__(self, latency: float, significance: str):
+        self.latency = latency
+        self.significance = significance
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def create(self, **params) -> SimpleNamespace:
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency)
+        return self._answer(params)
+
+    def _answer(self, params) -> SimpleNamespace:
+        tool = params['tools'][0]['name']
+        if tool == 'report_patterns':
+            prompt = params['messages'][0]['content']
+            return _tool_use(tool, {'results': [
+                dict(user_key=key, **_verdict(self.significance)) for key in _SECTION_RE.findall(prompt)
+            ]})
+        return _tool_use(tool, _verdict(self.significance))
+
+class StubAnthropic:
+    """
+    Anthropic client stand-in answering every structured-output request
+    after a fixed latency with a pattern for each user in the prompt
+    """
+    def __init__(self, latency: float = 0.0, significance: str = 'high'):
+        self.messages = StubMessages(latency, significance)
+
+class StubAsyncMessages(StubMessages):
+    async def create(self, **params) -> SimpleNamespace:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return self._answer(params)
+
+class StubAsyncAnthropic:
+    """AsyncAnthropic stand-in; same answers as StubAnthropic"""
+    def __init__(self, latency: float = 0.0, significance: str = 'high'):
+        self.messages = StubAsyncMessages(latency, significance)
+
+    async def close(self) -> None:
+        pass
+
+class StubSMTP:
+    """smtplib.SMTP stand-in that takes `latency` seconds per message"""
+    latency = 0.0
+    sent: List[Any] = []
+
+    def __init__(self, host: str = '', port: int = 0, timeout: float = None):
+        self.host = host
+        self.port = port
+
+    def __enter__(self) -> 'StubSMTP':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+    def starttls(self) -> None:
+        pass
+
+    def login(self, username: str, password: str) -> None:
+        pass
+
+    def noop(self):
+        return 250, b'OK'
+
+    def send_message(self, message) -> None:
+        time.sleep(self.latency)
+        StubSMTP.sent.append(message['To'])
+
+    def quit(self) -> None:
+        pass
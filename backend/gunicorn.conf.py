@@ -3,4 +3,15 @@ bind = "0.0.0.0:8000"
 workers = 4
 timeout = 120
 accesslog = "-"
-errorlog = "-"
\ No newline at end of file
+errorlog = "-"
+# Threaded workers so open pattern event streams do not block other requests
+worker_class = "gthread"
+threads = 8
+# Import the app once in the master so workers share its pages copy-on-write;
+# services are built lazily, so nothing fork-unsafe exists before the fork
+preload_app = True
+
+def on_starting(server):
+    # Workers write per-process metric files; start each server from zero
+    from src.utils.metrics import REGISTRY
+    REGISTRY.clear_directory()
\ No newline at end of file
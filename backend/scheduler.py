@@ -1,19 +1,26 @@
 # main.py
+import contextvars
 import schedule
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from typing import List, Dict
 from src.connectwise.client import ConnectWiseClient
+from src.connectwise.models import Ticket
 from src.monitoring.analyzer import TicketAnalyzer
+from src.monitoring.pattern_engine import PatternEngine
 from src.monitoring.alerts import AlertManager
+from src.monitoring.dispatch import AlertDispatcher
 from src.config import settings
+from src.utils.logger import configure_logging, with_run_id
+from src.utils.metrics import stage
 import logging
 
 # Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+configure_logging()
 logger = logging.getLogger(__name__)
 
+@with_run_id
 def monitor_member_tickets(member_identifier: str, member_name: str) -> None:
     """
     Monitor tickets for a specific member and generate alerts if patterns are found
@@ -36,6 +43,67 @@ def monitor_member_tickets(member_identifier: str, member_name: str) -> None:
     except Exception as e:
         logger.error(f"Error monitoring tickets for {member_name}: {str(e)}")
 
+@with_run_id
+def monitor_members_parallel(members: List[Dict[str, str]], max_workers: int = None,
+                             dispatcher: AlertDispatcher = None) -> Dict[str, float]:
+    """
+    Fetch the shared ticket window once, then analyze and alert for every
+    member on a bounded thread pool with shared clients. Returns per-member
+    analysis time in seconds.
+    """
+    run_started = time.perf_counter()
+    client = ConnectWiseClient()
+    try:
+        return _monitor_members(client, members, max_workers, dispatcher, run_started)
+    finally:
+        client.close()
+
+def _monitor_members(client: ConnectWiseClient, members: List[Dict[str, str]], max_workers: int,
+                     dispatcher: AlertDispatcher, run_started: float) -> Dict[str, float]:
+    # Workers only need pattern detection, so no Claude client, cache or outbreak state is built
+    engine = PatternEngine()
+    alert_manager = AlertManager(dispatcher)
+
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=settings.ALERT_TIMEFRAME_DAYS)
+    member_tickets = {member["identifier"]: [] for member in members}
+    try:
+        with stage('fetch'):
+            for ticket in client.iter_tickets(start_date, end_date, fields=client.ANALYSIS_FIELDS):
+                tickets = member_tickets.get(ticket.get('enteredBy'))
+                if tickets is not None:
+                    tickets.append(Ticket.from_api(ticket))
+    except Exception as e:
+        # A failed fetch skips this run; raising would stop the schedule loop for good
+        logger.error(f"Error fetching the shared ticket window: {str(e)}")
+        return {}
+    logger.info(f"Fetched shared ticket window in {time.perf_counter() - run_started:.2f}s")
+
+    def run_member(member: Dict[str, str]) -> float:
+        started = time.perf_counter()
+        try:
+            patterns = engine.find_patterns(member_tickets[member["identifier"]], scopes=('user',))
+            if patterns:
+                logger.info(f"Patterns detected for {member['name']}")
+                alert_manager.generate_alert(member["name"], patterns)
+            else:
+                logger.info(f"No significant patterns found for {member['name']}")
+        except Exception as e:
+            logger.error(f"Error monitoring tickets for {member['name']}: {str(e)}")
+        return time.perf_counter() - started
+
+    timings = {}
+    with stage('analyze'), ThreadPoolExecutor(max_workers=max_workers or settings.SCHEDULER_MAX_WORKERS) as pool:
+        # Each task runs in a copy of this context so its log lines keep the run id
+        futures = {pool.submit(contextvars.copy_context().run, run_member, member): member for member in members}
+        for future in as_completed(futures):
+            member = futures[future]
+            timings[member["name"]] = future.result()
+            logger.info(f"Monitored {member['name']} in {timings[member['name']]:.2f}s")
+
+    logger.info(f"Monitored {len(members)} members in {time.perf_counter() - run_started:.2f}s")
+    return timings
+
 def main():
     # List of members to monitor
     members_to_monitor = [
@@ -43,13 +111,25 @@ def main():
         # Add more members as needed
     ]
     
-    # Schedule monitoring for each member
-    for member in members_to_monitor:
-        schedule.every().day.at("08:00").do(
-            monitor_member_tickets,
-            member["identifier"],
-            member["name"]
+    if settings.SCHEDULER_MODE == 'parallel':
+        # Alerts from every member are queued and sent as digests in the background
+        dispatcher = AlertDispatcher()
+        dispatcher.start()
+
+        # One job for all members: shared fetch, pooled per-member analysis
+        schedule.every().day.at(settings.SCHEDULER_RUN_AT).do(
+            monitor_members_parallel,
+            members_to_monitor,
+            dispatcher=dispatcher
         )
+    else:
+        # Schedule monitoring for each member
+        for member in members_to_monitor:
+            schedule.every().day.at(settings.SCHEDULER_RUN_AT).do(
+                monitor_member_tickets,
+                member["identifier"],
+                member["name"]
+            )
     
     logger.info("ConnectWise monitoring service started")
     
@@ -11,6 +11,12 @@ setup(
         'gunicorn',
         'anthropic',
         'python-dotenv',
+        'numpy',
+        'pyarrow',
         'schedule'  # Added this for the scheduler functionality
+    ],
+    # The ticket archive locks its day directories with fcntl
+    classifiers=[
+        'Operating System :: POSIX',
     ]
 )
\ No newline at end of file
@@ -21,4 +21,99 @@ NOTIFICATION_EMAIL = os.getenv('NOTIFICATION_EMAIL')
 SMTP_SERVER = os.getenv('SMTP_SERVER')
 SMTP_PORT = int(os.getenv('SMTP_PORT', '587'))
 SMTP_USERNAME = os.getenv('SMTP_USERNAME')
-SMTP_PASSWORD = os.getenv('SMTP_PASSWORD')
\ No newline at end of file
+SMTP_PASSWORD = os.getenv('SMTP_PASSWORD')
+SMTP_USE_TLS = os.getenv('SMTP_USE_TLS', 'true').lower() == 'true'  # Disable for a local debugging SMTP server
+# Pattern emails from ClaudeAnalyzer use the SENDER_*/RECIPIENT_* names from the README
+SENDER_EMAIL = os.getenv('SENDER_EMAIL') or SMTP_USERNAME
+SENDER_PASSWORD = os.getenv('SENDER_PASSWORD') or SMTP_PASSWORD
+RECIPIENT_EMAIL = os.getenv('RECIPIENT_EMAIL') or NOTIFICATION_EMAIL
+
+# Alert Dispatch Queue
+ALERT_OUTBOX_PATH = os.getenv('ALERT_OUTBOX_PATH', 'alert_outbox.db')
+ALERT_FLUSH_SECONDS = float(os.getenv('ALERT_FLUSH_SECONDS', '30'))  # Alerts queued within this window share a digest
+ALERT_MAX_ATTEMPTS = int(os.getenv('ALERT_MAX_ATTEMPTS', '6'))
+ALERT_RETRY_BASE_SECONDS = float(os.getenv('ALERT_RETRY_BASE_SECONDS', '30'))
+ALERT_RETRY_MAX_SECONDS = float(os.getenv('ALERT_RETRY_MAX_SECONDS', '3600'))
+ALERT_CLAIM_LEASE_SECONDS = float(os.getenv('ALERT_CLAIM_LEASE_SECONDS', '600'))  # Alerts claimed by a process that died are resent after this
+
+# Alert Suppression (one alert per ongoing pattern)
+ALERT_STATE_PATH = os.getenv('ALERT_STATE_PATH', 'alert_state.db')  # Empty disables suppression
+ALERT_COOLDOWN_SECONDS = float(os.getenv('ALERT_COOLDOWN_SECONDS', str(24 * 3600)))  # Repeats within this only alert when the ticket count grows
+
+# ConnectWise HTTP Session
+CW_POOL_SIZE = int(os.getenv('CW_POOL_SIZE', '10'))  # Keep-alive connections per host
+CW_TIMEOUT_SECONDS = float(os.getenv('CW_TIMEOUT_SECONDS', '30'))
+CW_MAX_RETRIES = int(os.getenv('CW_MAX_RETRIES', '5'))  # Retries on 429/5xx and connection errors
+CW_BACKOFF_BASE_SECONDS = float(os.getenv('CW_BACKOFF_BASE_SECONDS', '0.5'))
+CW_BACKOFF_MAX_SECONDS = float(os.getenv('CW_BACKOFF_MAX_SECONDS', '30'))
+CW_RETRY_AFTER_MAX_SECONDS = float(os.getenv('CW_RETRY_AFTER_MAX_SECONDS', '300'))  # Longer Retry-After waits fail fast
+CW_MAX_CONCURRENCY = int(os.getenv('CW_MAX_CONCURRENCY', '8'))  # In-flight requests for the async client
+CW_REQUESTS_PER_SECOND = float(os.getenv('CW_REQUESTS_PER_SECOND', '10'))
+
+# Local Ticket Store
+TICKET_STORE_PATH = os.getenv('TICKET_STORE_PATH', 'tickets.db')
+TICKET_STORE_RETENTION_DAYS = int(os.getenv('TICKET_STORE_RETENTION_DAYS', '30'))  # Also the first-sync look-back
+
+# Claude Analysis
+ANTHROPIC_API_KEY = os.getenv('ANTHROPIC_API_KEY')
+CLAUDE_MODEL = os.getenv('CLAUDE_MODEL', 'claude-3-sonnet-20240229')
+CLAUDE_ANALYSIS_MODE = os.getenv('CLAUDE_ANALYSIS_MODE', 'serial')  # serial, concurrent, batched or batch_api
+CLAUDE_SCHEDULED_ANALYSIS_MODE = os.getenv('CLAUDE_SCHEDULED_ANALYSIS_MODE', 'batched')  # Used by the hourly monitor
+CLAUDE_BATCH_TOKEN_BUDGET = int(os.getenv('CLAUDE_BATCH_TOKEN_BUDGET', '6000'))  # Estimated input tokens per batched request
+CLAUDE_USER_TOKEN_BUDGET = int(os.getenv('CLAUDE_USER_TOKEN_BUDGET', '400'))  # Ticket-list tokens per user before older tickets are dropped
+CLAUDE_BATCH_POLL_SECONDS = float(os.getenv('CLAUDE_BATCH_POLL_SECONDS', '10'))
+CLAUDE_MAX_CONCURRENCY = int(os.getenv('CLAUDE_MAX_CONCURRENCY', '8'))  # In-flight requests in concurrent mode
+CLAUDE_REQUESTS_PER_MINUTE = float(os.getenv('CLAUDE_REQUESTS_PER_MINUTE', '50'))  # Match the account's rate limits
+CLAUDE_INPUT_TOKENS_PER_MINUTE = float(os.getenv('CLAUDE_INPUT_TOKENS_PER_MINUTE', '40000'))
+CLAUDE_OUTPUT_TOKENS_PER_MINUTE = float(os.getenv('CLAUDE_OUTPUT_TOKENS_PER_MINUTE', '8000'))
+CLAUDE_TIMEOUT_SECONDS = float(os.getenv('CLAUDE_TIMEOUT_SECONDS', '60'))  # Per attempt
+CLAUDE_MAX_RETRIES = int(os.getenv('CLAUDE_MAX_RETRIES', '4'))
+CLAUDE_BACKOFF_BASE_SECONDS = float(os.getenv('CLAUDE_BACKOFF_BASE_SECONDS', '1'))
+CLAUDE_BACKOFF_MAX_SECONDS = float(os.getenv('CLAUDE_BACKOFF_MAX_SECONDS', '60'))
+
+# Claude Analysis Cache
+CLAUDE_CACHE_PATH = os.getenv('CLAUDE_CACHE_PATH', 'analysis_cache.db')  # Empty disables the cache
+CLAUDE_CACHE_TTL_SECONDS = int(os.getenv('CLAUDE_CACHE_TTL_SECONDS', str(24 * 3600)))
+CLAUDE_CACHE_MAX_ENTRIES = int(os.getenv('CLAUDE_CACHE_MAX_ENTRIES', '10000'))
+
+# Similarity Pre-filter (decides which users are worth a Claude call)
+PREFILTER_ENABLED = os.getenv('PREFILTER_ENABLED', 'true').lower() == 'true'
+PREFILTER_MIN_CLUSTER = int(os.getenv('PREFILTER_MIN_CLUSTER', str(ALERT_THRESHOLD)))  # Similar tickets needed to escalate
+PREFILTER_MIN_SIMILARITY = float(os.getenv('PREFILTER_MIN_SIMILARITY', '0.5'))  # TF-IDF cosine for two tickets to match
+
+# Scheduler
+SCHEDULER_MODE = os.getenv('SCHEDULER_MODE', 'serial')  # serial (one job per member) or parallel (shared fetch + worker pool)
+SCHEDULER_MAX_WORKERS = int(os.getenv('SCHEDULER_MAX_WORKERS', '8'))
+SCHEDULER_RUN_AT = os.getenv('SCHEDULER_RUN_AT', '08:00')
+
+# Pattern Snapshots (shared by every API worker)
+SNAPSHOT_STORE_PATH = os.getenv('SNAPSHOT_STORE_PATH', 'snapshots.db')
+SNAPSHOT_KEEP_VERSIONS = int(os.getenv('SNAPSHOT_KEEP_VERSIONS', '5'))
+SNAPSHOT_REFRESH_TIMEOUT_SECONDS = float(os.getenv('SNAPSHOT_REFRESH_TIMEOUT_SECONDS', '300'))  # Also the refresh lease length
+SNAPSHOT_REFRESH_WAIT_SECONDS = float(os.getenv('SNAPSHOT_REFRESH_WAIT_SECONDS', '90'))  # Requests waiting on a refresh give up after this; keep below gunicorn's timeout
+SNAPSHOT_KEEP_EVENTS = int(os.getenv('SNAPSHOT_KEEP_EVENTS', '1000'))  # Pattern change events kept for stream resume
+
+# Pattern Event Stream
+STREAM_POLL_SECONDS = float(os.getenv('STREAM_POLL_SECONDS', '1'))
+STREAM_HEARTBEAT_SECONDS = float(os.getenv('STREAM_HEARTBEAT_SECONDS', '15'))
+STREAM_MAX_SECONDS = float(os.getenv('STREAM_MAX_SECONDS', '55'))  # Clients reconnect with Last-Event-ID after this
+
+# Observability
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'json')  # json or text
+METRICS_DIR = os.getenv('METRICS_DIR', '')  # Shared by gunicorn workers for /metrics; empty keeps metrics per process
+METRICS_FLUSH_SECONDS = float(os.getenv('METRICS_FLUSH_SECONDS', '5'))
+
+# Outbreak Detection (the same issue spiking across many users)
+OUTBREAK_WINDOW_SECONDS = int(os.getenv('OUTBREAK_WINDOW_SECONDS', '3600'))  # Sliding window tickets are counted over
+OUTBREAK_BASELINE_DAYS = float(os.getenv('OUTBREAK_BASELINE_DAYS', '7'))  # History a cluster's normal rate is learned from
+OUTBREAK_MIN_TICKETS = int(os.getenv('OUTBREAK_MIN_TICKETS', '10'))
+OUTBREAK_MIN_USERS = int(os.getenv('OUTBREAK_MIN_USERS', '5'))
+OUTBREAK_SPIKE_FACTOR = float(os.getenv('OUTBREAK_SPIKE_FACTOR', '3'))  # Window count over the baseline rate to alert
+OUTBREAK_MIN_SIMILARITY = float(os.getenv('OUTBREAK_MIN_SIMILARITY', '0.5'))  # Estimated shingle Jaccard to join a cluster
+OUTBREAK_MAX_CLUSTERS = int(os.getenv('OUTBREAK_MAX_CLUSTERS', '20000'))  # Least recently seen issues are dropped beyond this
+
+# Ticket Archive (columnar history beyond the ticket store's retention)
+TICKET_ARCHIVE_DIR = os.getenv('TICKET_ARCHIVE_DIR', '')  # Empty disables the archive
+TICKET_ARCHIVE_FORMAT = os.getenv('TICKET_ARCHIVE_FORMAT', 'ipc')  # ipc (memory-mapped Arrow) or parquet (smaller)
+TICKET_ARCHIVE_BASELINE_DAYS = int(os.getenv('TICKET_ARCHIVE_BASELINE_DAYS', '90'))  # History a user's pattern is compared against
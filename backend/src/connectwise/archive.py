@@ -0,0 +1,282 @@
+# src/connectwise/archive.py
+import fcntl
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import ExitStack, contextmanager
+from operator import attrgetter
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Set, Tuple, Union
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+from ..config import settings
+from .models import Ticket
+
+DAY_SECONDS = 86400
+
+_STRING = pa.dictionary(pa.int32(), pa.string())
+SCHEMA = pa.schema([
+    ('id', pa.int64()),
+    ('entered', pa.int64()),  # epoch seconds
+    ('day', pa.date32()),
+    ('date_entered', pa.string()),
+    ('summary', pa.string()),
+    ('issue', _STRING),
+    ('user', _STRING),
+    ('entered_by', _STRING),
+    ('type', _STRING),
+    ('board', _STRING),
+    ('company', _STRING),
+])
+EXTENSIONS = {'ipc': '.arrow', 'parquet': '.parquet'}
+# Parts a day may collect from appends before they are merged into one file
+MAX_PARTS_PER_DAY = 16
+# Days whose ticket ids are kept in memory to drop re-fetched tickets on append
+ID_CACHE_DAYS = 8
+# Per-day lock file ordering appends, compactions and scans across processes
+LOCK_NAME = '.lock'
+# Rows per Parquet row group; files are sorted by user, so groups carry tight user ranges
+ROW_GROUP_SIZE = 64 * 1024
+
+def _day(entered: int) -> str:
+    return datetime.fromtimestamp(entered, timezone.utc).strftime('%Y-%m-%d')
+
+def _by_user(table: pa.Table) -> pa.Table:
+    # Arrow cannot sort dictionary columns directly, so sort on their decoded values
+    keys = pa.table({'user': table['user'].cast(pa.string()), 'entered': table['entered']})
+    return table.take(pc.sort_indices(keys, sort_keys=[('user', 'ascending'), ('entered', 'ascending')]))
+
+class TicketArchive:
+    """
+    Append-only columnar archive of every ticket fetched, partitioned by the
+    UTC day it was entered (hive-style day=YYYY-MM-DD directories), so
+    baselines and trends over months of history run locally instead of
+    re-fetching from the API.
+
+    Each append writes one file per day touched, sorted by user; a day's
+    parts are merged once it collects MAX_PARTS_PER_DAY. Tickets are kept
+    as first seen: ids already in a day are skipped, so overlapping syncs
+    do not duplicate them, and later edits to a ticket are not recorded.
+    Every worker process archives into the same directory, so each day has
+    a lock file: appends and compactions hold it exclusively and pick up
+    parts other processes wrote before checking ids, and scans hold it
+    shared, so they never see a compaction's merged file next to the parts
+    it replaces, or lose parts it deletes. The locks use fcntl.flock, so the
+    archive runs on POSIX systems only.
+
+    Queries only open the day directories in range and push the date, user
+    and board filters into the Arrow scanner. The default 'ipc' format
+    writes uncompressed Arrow files that are read memory-mapped, without
+    copying or decoding; 'parquet' is several times smaller on disk, and its
+    row-group statistics let user filters skip most of each file.
+    """
+    def __init__(self, directory: Optional[str] = None, format: Optional[str] = None):
+        self.directory = directory or settings.TICKET_ARCHIVE_DIR
+        self.format = format or settings.TICKET_ARCHIVE_FORMAT
+        if self.format not in EXTENSIONS:
+            raise ValueError(f"Unknown archive format: {self.format}")
+        os.makedirs(self.directory, exist_ok=True)
+
+        self._extension = EXTENSIONS[self.format]
+        self._filesystem = pafs.LocalFileSystem(use_mmap=True)
+        self._lock = threading.Lock()
+        # day -> (archived ids, part files they were read from)
+        self._day_ids: 'OrderedDict[str, Tuple[Set[int], Set[str]]]' = OrderedDict()
+
+    def close(self) -> None:
+        with self._lock:
+            self._day_ids.clear()
+
+    def _day_dir(self, day: str) -> str:
+        return os.path.join(self.directory, f"day={day}")
+
+    def _parts(self, day: str) -> List[str]:
+        day_dir = self._day_dir(day)
+        if not os.path.isdir(day_dir):
+            return []
+        return sorted(os.path.join(day_dir, name) for name in os.listdir(day_dir)
+                      if name.endswith(self._extension))
+
+    def days(self) -> List[str]:
+        """Archived days, oldest first"""
+        return sorted(name[len('day='):] for name in os.listdir(self.directory) if name.startswith('day='))
+
+    def _dataset(self, paths: List[str]) -> ds.Dataset:
+        return ds.dataset(paths, schema=SCHEMA, format=self.format, filesystem=self._filesystem)
+
+    @contextmanager
+    def _day_lock(self, day: str, shared: bool = False) -> Iterator[None]:
+        os.makedirs(self._day_dir(day), exist_ok=True)
+        with open(os.path.join(self._day_dir(day), LOCK_NAME), 'a') as lock:
+            # Released when the file is closed
+            fcntl.flock(lock, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            yield
+
+    def _known_ids(self, day: str) -> Set[int]:
+        """Ids archived in a day, including parts other processes wrote; call under the day lock"""
+        entry = self._day_ids.get(day)
+        if entry is None:
+            entry = self._day_ids[day] = (set(), set())
+            while len(self._day_ids) > ID_CACHE_DAYS:
+                self._day_ids.popitem(last=False)
+        self._day_ids.move_to_end(day)
+
+        ids, read = entry
+        parts = self._parts(day)
+        read.intersection_update(parts)
+        unread = [path for path in parts if path not in read]
+        if unread:
+            ids.update(self._dataset(unread).to_table(columns=['id'])['id'].to_pylist())
+            read.update(unread)
+        return ids
+
+    def _new_part(self, day: str) -> str:
+        return os.path.join(self._day_dir(day), f"part-{time.time_ns()}-{os.getpid()}{self._extension}")
+
+    def _write(self, table: pa.Table, path: str) -> None:
+        # Readers never see a half-written file
+        temp = f"{path}.tmp"
+        if self.format == 'parquet':
+            pq.write_table(table, temp, row_group_size=ROW_GROUP_SIZE)
+        else:
+            with pa.OSFile(temp, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(temp, path)
+
+    def _table(self, tickets: List[Ticket]) -> pa.Table:
+        columns = {name: list(map(attrgetter(name), tickets))
+                   for name in ('id', 'entered', 'date_entered', 'summary', 'issue', 'user',
+                                'entered_by', 'type', 'board', 'company')}
+        entered = np.array(columns['entered'], dtype=np.int64)
+        columns['day'] = (entered // DAY_SECONDS).astype(np.int32)
+        table = pa.table({field.name: pa.array(columns[field.name], type=field.type) for field in SCHEMA},
+                         schema=SCHEMA)
+        return _by_user(table)
+
+    def append(self, tickets: Iterable[Union[Ticket, Dict[str, Any]]]) -> int:
+        """Archive tickets not archived yet. Returns the number written."""
+        by_day: Dict[int, List[Ticket]] = {}
+        for ticket in tickets:
+            ticket = Ticket.coerce(ticket)
+            by_day.setdefault(ticket.entered // DAY_SECONDS, []).append(ticket)
+
+        written = 0
+        with self._lock:
+            for day_number, day_tickets in sorted(by_day.items()):
+                day = _day(day_number * DAY_SECONDS)
+                with self._day_lock(day):
+                    known = self._known_ids(day)
+                    new = {t.id: t for t in day_tickets if t.id not in known}
+                    if not new:
+                        continue
+                    path = self._new_part(day)
+                    self._write(self._table(list(new.values())), path)
+                    known.update(new)
+                    self._day_ids[day][1].add(path)
+                    written += len(new)
+                    if len(self._parts(day)) > MAX_PARTS_PER_DAY:
+                        self._compact(day)
+        return written
+
+    def compact(self, day: str) -> None:
+        """Merge a day's parts into one file sorted by user"""
+        with self._lock, self._day_lock(day):
+            self._compact(day)
+
+    def _compact(self, day: str) -> None:
+        # Called under the day lock
+        parts = self._parts(day)
+        if len(parts) < 2:
+            return
+        table = self._dataset(parts).to_table().unify_dictionaries().combine_chunks()
+        path = self._new_part(day)
+        self._write(_by_user(table), path)
+        for part in parts:
+            os.remove(part)
+        if day in self._day_ids:
+            # The merged file holds only ids already read from its parts
+            self._day_ids[day][1].add(path)
+
+    def _days_between(self, start_date: datetime, end_date: datetime) -> List[str]:
+        first, last = _day(int(start_date.timestamp())), _day(int(end_date.timestamp()))
+        return [day for day in self.days() if first <= day <= last]
+
+    def scan(self, start_date: datetime, end_date: datetime, users: Optional[Iterable[str]] = None,
+             boards: Optional[Iterable[str]] = None, columns: Optional[List[str]] = None) -> pa.Table:
+        """
+        Archived tickets entered within the date range, optionally only for
+        the given users and boards, as an Arrow table of the given columns
+        """
+        with ExitStack() as locks:
+            days = self._days_between(start_date, end_date)
+            for day in days:
+                locks.enter_context(self._day_lock(day, shared=True))
+            paths = [path for day in days for path in self._parts(day)]
+            if not paths:
+                return SCHEMA.empty_table().select(columns) if columns else SCHEMA.empty_table()
+
+            condition = ((ds.field('entered') >= int(start_date.timestamp()))
+                         & (ds.field('entered') <= int(end_date.timestamp())))
+            if users is not None:
+                condition &= ds.field('user').isin(list(users))
+            if boards is not None:
+                condition &= ds.field('board').isin(list(boards))
+            # Memory-mapped buffers outlive the lock: deleting a mapped file leaves the mapping intact
+            return self._dataset(paths).to_table(columns=columns, filter=condition)
+
+    def iter_tickets(self, start_date: datetime, end_date: datetime, **filters) -> Iterator[Ticket]:
+        """Stream archived tickets in the date range as Ticket models, oldest first"""
+        table = self.scan(start_date, end_date, **filters).sort_by('entered')
+        for row in table.to_pylist():
+            yield Ticket(row['id'], row['summary'], row['user'], row['entered'], row['date_entered'],
+                         row['entered_by'], row['type'], row['board'], row['company'])
+
+    def count_tickets(self, start_date: datetime, end_date: datetime, **filters) -> int:
+        return self.scan(start_date, end_date, columns=['id'], **filters).num_rows
+
+    def daily_counts(self, start_date: datetime, end_date: datetime, by: str = 'user', **filters) -> pa.Table:
+        """
+        Tickets per day and value of the `by` column (user, board, company,
+        issue, ...), for trends; columns day, <by>, count
+        """
+        table = self.scan(start_date, end_date, columns=['day', by], **filters)
+        if by in ('issue', 'user', 'entered_by', 'type', 'board', 'company'):
+            table = table.set_column(1, by, table[by].cast(pa.string()))
+        counts = table.group_by(['day', by]).aggregate([([], 'count_all')])
+        counts = counts.rename_columns(['count' if name == 'count_all' else name for name in counts.column_names])
+        return counts.select(['day', by, 'count']).sort_by('day')
+
+    def user_baselines(self, users: Iterable[str], end_date: datetime, days: int = 90) -> Dict[str, Dict[str, float]]:
+        """
+        Each user's daily ticket rate over the `days` before end_date
+        (quiet days count as zero), to judge whether a recent burst is
+        unusual for them: mean and std tickets per day, and the total.
+        Days are the 24-hour spans counted back from end_date, not calendar
+        days, so there are exactly `days` of them wherever end_date falls.
+        """
+        users = list(users)
+        end = int(end_date.timestamp())
+        start_date = datetime.fromtimestamp(end - days * DAY_SECONDS, timezone.utc)
+        table = self.scan(start_date, end_date, users=users, columns=['user', 'entered'])
+
+        offsets = (end - table['entered'].to_numpy()) // DAY_SECONDS
+        # The scan includes both ends; a ticket exactly `days` back belongs to the span before
+        inside = offsets < days
+        names = np.asarray(table['user'].cast(pa.string()).to_pylist(), dtype=object)[inside]
+        index = {user: i for i, user in enumerate(users)}
+        rows = np.fromiter((index[name] for name in names), dtype=np.int64, count=len(names))
+        daily = np.bincount(rows * days + offsets[inside], minlength=len(users) * days).reshape(len(users), days)
+
+        return {
+            user: {
+                'total': int(daily[i].sum()),
+                'daily_mean': float(daily[i].mean()),
+                'daily_std': float(daily[i].std()),
+            }
+            for user, i in index.items()
+        }
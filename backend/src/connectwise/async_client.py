@@ -0,0 +1,80 @@
+# src/connectwise/async_client.py
+import asyncio
+import weakref
+from datetime import datetime
+from typing import List, Dict, Any, Iterable, Optional
+from .client import ConnectWiseClient
+from ..config import settings
+from ..utils.ratelimit import AsyncRateLimiter
+
+class AsyncConnectWiseClient:
+    """
+    asyncio front-end for ConnectWiseClient. Requests run on worker threads
+    through the sync client's pooled session (so they share its retry and
+    backoff handling), bounded by a semaphore and a requests-per-second budget.
+    """
+    def __init__(self, client: Optional[ConnectWiseClient] = None,
+                 max_concurrency: Optional[int] = None,
+                 requests_per_second: Optional[float] = None):
+        self.client = client or ConnectWiseClient()
+        self.max_concurrency = max_concurrency or settings.CW_MAX_CONCURRENCY
+        self.requests_per_second = requests_per_second or settings.CW_REQUESTS_PER_SECOND
+        # Event loop -> (semaphore, limiter)
+        self._loop_limits = weakref.WeakKeyDictionary()
+
+    def _limits(self):
+        # asyncio primitives bind to the loop they first wait on, and each asyncio.run()
+        # starts a new one, so every loop gets its own, created lazily inside it
+        loop = asyncio.get_running_loop()
+        limits = self._loop_limits.get(loop)
+        if limits is None:
+            limits = (asyncio.Semaphore(self.max_concurrency), AsyncRateLimiter(self.requests_per_second))
+            self._loop_limits[loop] = limits
+        return limits
+
+    async def _get(self, url: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        semaphore, limiter = self._limits()
+        async with semaphore:
+            await limiter.acquire()
+            response = await asyncio.to_thread(self.client._request, url, params)
+            return response.json()
+
+    async def get_ticket_details(self, ticket_id: int) -> Dict[str, Any]:
+        """
+        Get detailed information about a specific ticket
+        """
+        return await self._get(f"{self.client.base_url}/service/tickets/{ticket_id}")
+
+    async def get_ticket_details_many(self, ticket_ids: Iterable[int]) -> List[Dict[str, Any]]:
+        """
+        Fetch details for many tickets concurrently; results keep the order of ticket_ids
+        """
+        return await asyncio.gather(*(self.get_ticket_details(ticket_id) for ticket_id in ticket_ids))
+
+    async def get_tickets(self, start_date: datetime, end_date: datetime) -> List[Dict[str, Any]]:
+        """
+        Retrieve tickets within the specified date range, fetching pages concurrently
+        """
+        endpoint = f"{self.client.base_url}/service/tickets"
+        page_size = self.client.PAGE_SIZE
+        conditions = ' AND '.join(self.client._date_conditions(start_date, end_date))
+
+        def page_params(page: int) -> Dict[str, Any]:
+            return {'conditions': conditions, 'pageSize': page_size, 'page': page}
+
+        tickets = await self._get(endpoint, page_params(1))
+        next_page = 2
+        last_page_full = len(tickets) == page_size
+
+        # Page count is unknown up front, so request pages in waves until one comes back short
+        while last_page_full:
+            wave = range(next_page, next_page + self.max_concurrency)
+            pages = await asyncio.gather(*(self._get(endpoint, page_params(p)) for p in wave))
+            for page in pages:
+                tickets.extend(page)
+                if len(page) < page_size:
+                    last_page_full = False
+                    break
+            next_page += self.max_concurrency
+
+        return tickets
@@ -1,66 +1,237 @@
 # src/connectwise/client.py
 import requests
+from requests.adapters import HTTPAdapter
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from email.utils import parsedate_to_datetime
+from typing import List, Dict, Any, Iterable, Iterator, Optional
+from urllib.parse import urlsplit
 from ..config import settings
+from ..utils import metrics
 import base64
+import random
+import re
+import time
+
+REQUESTS = metrics.counter('connectwise_requests_total', 'ConnectWise API responses by endpoint and status',
+                           ('endpoint', 'status'))
+RESPONSE_BYTES = metrics.counter('connectwise_response_bytes_total', 'ConnectWise API response body bytes',
+                                 ('endpoint',))
+REQUEST_SECONDS = metrics.histogram('connectwise_request_seconds', 'ConnectWise API request latency per attempt',
+                                    ('endpoint',))
+RETRIES = metrics.counter('connectwise_retries_total', 'ConnectWise API retries by endpoint and cause',
+                          ('endpoint', 'reason'))
+
+_ID_SEGMENT_RE = re.compile(r'/\d+(?=/|$)')
+
+def endpoint_label(url: str) -> str:
+    """Low-cardinality metric label for a request URL, e.g. /service/tickets/{id}"""
+    path = urlsplit(url).path
+    if '/apis/3.0' in path:
+        path = path.split('/apis/3.0', 1)[1]
+    return _ID_SEGMENT_RE.sub('/{id}', path) or '/'
 
 class ConnectWiseClient:
+    # ConnectWise caps pageSize at 1000
+    PAGE_SIZE = 1000
+    # The only ticket fields the analyzers read; company and board feed the outbreak and scope counts
+    ANALYSIS_FIELDS = ('id', 'summary', 'dateEntered', 'contact', 'type', 'priority', 'enteredBy', 'company', 'board')
+    # Server-side filters accepted by iter_tickets, mapped to their condition paths
+    FILTER_FIELDS = {
+        'member': 'enteredBy',
+        'board': 'board/name',
+        'status': 'status/name',
+        'company': 'company/name',
+    }
+    RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
     def __init__(self):
         self.base_url = settings.CW_BASE_URL
         self.company_id = settings.CW_COMPANY_ID
         self.client_id = settings.CW_CLIENT_ID
         self.headers = self._build_headers()
+        self.timeout = settings.CW_TIMEOUT_SECONDS
+        self.max_retries = settings.CW_MAX_RETRIES
+        self.backoff_base = settings.CW_BACKOFF_BASE_SECONDS
+        self.backoff_max = settings.CW_BACKOFF_MAX_SECONDS
+        self.retry_after_max = settings.CW_RETRY_AFTER_MAX_SECONDS
+        self.session = self._build_session()
+
+    def _build_session(self) -> requests.Session:
+        # One pooled keep-alive session shared by every call on this client
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=settings.CW_POOL_SIZE,
+                              pool_maxsize=settings.CW_POOL_SIZE)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers.update(self.headers)
+        return session
+
+    def close(self) -> None:
+        self.session.close()
+
+    def _retry_delay(self, attempt: int, response: Optional[requests.Response] = None) -> Optional[float]:
+        """
+        Seconds to wait before the next attempt: the server's Retry-After when
+        given, otherwise full-jitter exponential backoff. None when Retry-After
+        exceeds retry_after_max, so the request fails fast instead of sleeping.
+        """
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                try:
+                    delay = (parsedate_to_datetime(retry_after) - datetime.now().astimezone()).total_seconds()
+                except (TypeError, ValueError):
+                    delay = None
+            if delay is not None:
+                # Retrying sooner than asked only earns another 429
+                return max(delay, 0.0) if delay <= self.retry_after_max else None
+
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _request(self, url: str, params: Optional[Dict[str, Any]] = None) -> requests.Response:
+        """
+        GET through the pooled session, retrying 429/5xx responses and
+        connection errors with backoff
+        """
+        endpoint = endpoint_label(url)
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint)
+                REQUESTS.inc(endpoint=endpoint, status='error')
+                if attempt >= self.max_retries:
+                    raise
+                RETRIES.inc(endpoint=endpoint, reason=type(e).__name__)
+                time.sleep(self._retry_delay(attempt))
+                attempt += 1
+                continue
+
+            REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint)
+            REQUESTS.inc(endpoint=endpoint, status=response.status_code)
+            RESPONSE_BYTES.inc(len(response.content), endpoint=endpoint)
+
+            if response.status_code in self.RETRY_STATUSES and attempt < self.max_retries:
+                delay = self._retry_delay(attempt, response)
+                if delay is not None:
+                    RETRIES.inc(endpoint=endpoint, reason=response.status_code)
+                    time.sleep(delay)
+                    attempt += 1
+                    continue
+
+            response.raise_for_status()
+            return response
 
     def _build_headers(self) -> Dict[str, str]:
         # Create authorization header
         credentials = f"{settings.CW_COMPANY_ID}+{settings.CW_PUBLIC_KEY}:{settings.CW_PRIVATE_KEY}"
         encoded_credentials = base64.b64encode(credentials.encode()).decode()
-        
+
         return {
             'Authorization': f'Basic {encoded_credentials}',
             'clientId': settings.CW_CLIENT_ID,
             'Content-Type': 'application/json'
         }
 
-    def get_tickets(self, start_date: datetime, end_date: datetime) -> List[Dict[str, Any]]:
-        """
-        Retrieve tickets within the specified date range
-        """
-        endpoint = f"{self.base_url}/service/tickets"
-        
+    def _date_conditions(self, start_date: datetime, end_date: datetime) -> List[str]:
         # Format dates for ConnectWise API
-        conditions = [
+        return [
             f"dateEntered >= [{start_date.strftime('%Y-%m-%d')}]",
             f"dateEntered <= [{end_date.strftime('%Y-%m-%d')}]"
         ]
-        
-        params = {
-            'conditions': ' AND '.join(conditions),
-            'pageSize': 1000  # Adjust based on your needs
-        }
-        
-        response = requests.get(endpoint, headers=self.headers, params=params)
-        response.raise_for_status()
-        
-        return response.json()
+
+    def _iter_pages(self, endpoint: str, params: Dict[str, Any]) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Yield result pages, following the Link next-page header when present
+        and falling back to page numbers otherwise
+        """
+        page_size = params.get('pageSize', self.PAGE_SIZE)
+        page_number = 1
+        url, query = endpoint, dict(params, pageSize=page_size, page=page_number)
+
+        while True:
+            response = self._request(url, params=query)
+            page = response.json()
+            if not page:
+                return
+            yield page
+
+            next_link = response.links.get('next', {}).get('url')
+            if next_link:
+                # The next link already carries every query parameter
+                url, query = next_link, None
+            elif query is None or len(page) < page_size:
+                # Link-based paging ended, or a short page means no more results
+                return
+            else:
+                page_number += 1
+                url, query = endpoint, dict(params, pageSize=page_size, page=page_number)
+
+    def _filter_conditions(self, **filters: Optional[str]) -> List[str]:
+        conditions = []
+        for name, value in filters.items():
+            if value is None:
+                continue
+            escaped = value.replace('\\', '\\\\').replace('"', '\\"')
+            conditions.append(f'{self.FILTER_FIELDS[name]} = "{escaped}"')
+        return conditions
+
+    def _iter_ticket_query(self, conditions: List[str], fields: Optional[Iterable[str]] = None,
+                           **params: Any) -> Iterator[Dict[str, Any]]:
+        endpoint = f"{self.base_url}/service/tickets"
+        params = dict(params, conditions=' AND '.join(conditions), pageSize=self.PAGE_SIZE)
+        if fields:
+            params['fields'] = ','.join(fields)
+
+        for page in self._iter_pages(endpoint, params):
+            yield from page
+
+    def iter_tickets(self, start_date: datetime, end_date: datetime,
+                     member: Optional[str] = None, board: Optional[str] = None,
+                     status: Optional[str] = None, company: Optional[str] = None,
+                     fields: Optional[Iterable[str]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Stream tickets within the specified date range, oldest first, one
+        page at a time. Member/board/status/company filters and the fields
+        projection are applied by ConnectWise, not here.
+        """
+        conditions = self._date_conditions(start_date, end_date) + self._filter_conditions(
+            member=member, board=board, status=status, company=company)
+        # Entry order: the outbreak detector skips tickets older than the newest it has seen
+        return self._iter_ticket_query(conditions, fields=fields, orderBy='dateEntered asc')
+
+    def iter_updated_tickets(self, since: str) -> Iterator[Dict[str, Any]]:
+        """
+        Stream tickets created or changed at or after the given lastUpdated timestamp
+        """
+        # Ordering by id keeps page boundaries stable while tickets keep changing
+        return self._iter_ticket_query([f"lastUpdated >= [{since}]"], orderBy='id asc')
+
+    def get_tickets(self, start_date: datetime, end_date: datetime, **filters: Any) -> List[Dict[str, Any]]:
+        """
+        Retrieve tickets within the specified date range
+        """
+        return list(self.iter_tickets(start_date, end_date, **filters))
 
     def get_ticket_details(self, ticket_id: int) -> Dict[str, Any]:
         """
         Get detailed information about a specific ticket
         """
         endpoint = f"{self.base_url}/service/tickets/{ticket_id}"
-        response = requests.get(endpoint, headers=self.headers)
-        response.raise_for_status()
-        
-        return response.json()
+        return self._request(endpoint).json()
 
-    def get_member_tickets(self, member_identifier: str, days: int = 30) -> List[Dict[str, Any]]:
+    def get_member_tickets(self, member_identifier: str, days: int = 30,
+                           board: Optional[str] = None, status: Optional[str] = None,
+                           company: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         Get tickets created by a specific member within the last X days
         """
         end_date = datetime.now()
         start_date = end_date - timedelta(days=days)
-        
-        tickets = self.get_tickets(start_date, end_date)
-        return [t for t in tickets if t.get('enteredBy') == member_identifier]
\ No newline at end of file
+
+        return self.get_tickets(start_date, end_date, member=member_identifier, board=board,
+                                status=status, company=company, fields=self.ANALYSIS_FIELDS)
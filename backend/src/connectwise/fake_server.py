@@ -0,0 +1,386 @@
+# src/connectwise/fake_server.py
+"""
+Local stand-in for the ConnectWise REST API, serving a MockConnectWiseClient
+dataset so ConnectWiseClient, the monitor and the API tier can be load
+tested without touching the real PSA. Run it standalone with
+
+    python -m src.connectwise.fake_server --users 5000 --tickets-per-day 20000 --latency 0.05
+
+and point CW_BASE_URL at the printed URL.
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Dict, Any, Callable, Optional, Tuple
+from urllib.parse import parse_qs, urlencode, urlsplit
+from .mock_client import MockConnectWiseClient
+from .store import parse_cw_datetime
+
+API_PREFIX = '/v4_6_release/apis/3.0'
+MAX_PAGE_SIZE = 1000
+DEFAULT_PAGE_SIZE = 25
+
+# Condition fields that live somewhere other than their name
+FIELD_ALIASES = {'lastUpdated': '_info/lastUpdated'}
+
+_TOKEN_RE = re.compile(r"""
+    \s*(?:
+        (?P<open>\() | (?P<close>\)) |
+        (?P<op><=|>=|!=|=|<|>|\blike\b|\bcontains\b|\bnot\s+like\b) |
+        (?P<bool>\band\b|\bor\b) |
+        (?P<date>\[[^\]]*\]) |
+        (?P<string>"(?:[^"\\]|\\.)*") |
+        (?P<number>-?\d+(?:\.\d+)?\b) |
+        (?P<literal>\btrue\b|\bfalse\b|\bnull\b) |
+        (?P<field>[A-Za-z_][\w/]*)
+    )""", re.VERBOSE | re.IGNORECASE)
+
+class ConditionError(ValueError):
+    pass
+
+def _tokens(conditions: str) -> List[Tuple[str, str]]:
+    tokens, position = [], 0
+    conditions = conditions.rstrip()
+    while position < len(conditions):
+        match = _TOKEN_RE.match(conditions, position)
+        if match is None or match.end() == position:
+            raise ConditionError(f"Unexpected input at position {position}: {conditions[position:position + 20]!r}")
+        kind = match.lastgroup
+        tokens.append((kind, match.group(kind)))
+        position = match.end()
+    return tokens
+
+def _field_value(ticket: Dict[str, Any], path: str) -> Any:
+    value = ticket
+    for part in FIELD_ALIASES.get(path, path).split('/'):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+def _literal(kind: str, text: str) -> Any:
+    if kind == 'date':
+        return ('date', parse_cw_datetime(text[1:-1].strip()))
+    if kind == 'string':
+        return text[1:-1].replace('\\"', '"').replace('\\\\', '\\')
+    if kind == 'number':
+        return float(text) if '.' in text else int(text)
+    return {'true': True, 'false': False, 'null': None}[text.lower()]
+
+def _as_epoch(value: Any) -> Optional[float]:
+    if isinstance(value, datetime):
+        # Date-only and naive values are UTC, as ConnectWise stores them
+        return (value if value.tzinfo else value.replace(tzinfo=timezone.utc)).timestamp()
+    if isinstance(value, str):
+        try:
+            return _as_epoch(parse_cw_datetime(value))
+        except ValueError:
+            return None
+    return None
+
+def _comparison(field: str, op: str, literal: Any) -> Callable[[Dict[str, Any]], bool]:
+    op = ' '.join(op.lower().split())
+    if isinstance(literal, tuple) and literal[0] == 'date':
+        target = _as_epoch(literal[1])
+        compare = {'=': lambda a: a == target, '!=': lambda a: a != target, '<': lambda a: a < target,
+                   '<=': lambda a: a <= target, '>': lambda a: a > target, '>=': lambda a: a >= target}.get(op)
+        if compare is None:
+            raise ConditionError(f"Operator {op} does not apply to dates")
+
+        def test(ticket):
+            value = _as_epoch(_field_value(ticket, field))
+            return value is not None and compare(value)
+        return test
+
+    if op in ('like', 'not like', 'contains'):
+        if not isinstance(literal, str):
+            raise ConditionError(f"Operator {op} needs a string")
+        pattern = re.escape(literal).replace('%', '.*') if op != 'contains' else '.*' + re.escape(literal) + '.*'
+        regex = re.compile(f"^{pattern}$", re.IGNORECASE | re.DOTALL)
+        negate = op == 'not like'
+        return lambda ticket: bool(regex.match(str(_field_value(ticket, field) or ''))) != negate
+
+    def normalize(value):
+        # ConnectWise string comparisons are case-insensitive
+        return value.casefold() if isinstance(value, str) else value
+
+    target = normalize(literal)
+    compare = {'=': lambda a: a == target, '!=': lambda a: a != target, '<': lambda a: a < target,
+               '<=': lambda a: a <= target, '>': lambda a: a > target, '>=': lambda a: a >= target}[op]
+
+    def test(ticket):
+        value = normalize(_field_value(ticket, field))
+        try:
+            return compare(value)
+        except TypeError:
+            return False
+    return test
+
+def parse_conditions(conditions: Optional[str]) -> Callable[[Dict[str, Any]], bool]:
+    """
+    Compile a ConnectWise conditions string (comparisons joined by AND/OR,
+    with parentheses) into a predicate over ticket dicts
+    """
+    if not conditions or not conditions.strip():
+        return lambda ticket: True
+    tokens = _tokens(conditions)
+    position = 0
+
+    def peek(kind: Optional[str] = None, text: Optional[str] = None) -> bool:
+        if position >= len(tokens):
+            return False
+        token_kind, token_text = tokens[position]
+        return (kind is None or token_kind == kind) and (text is None or token_text.lower() == text)
+
+    def take(kind: str) -> str:
+        nonlocal position
+        if not peek(kind):
+            found = tokens[position][1] if position < len(tokens) else 'end of conditions'
+            raise ConditionError(f"Expected {kind}, found {found!r}")
+        position += 1
+        return tokens[position - 1][1]
+
+    def expression():
+        predicate = term()
+        while peek('bool', 'or'):
+            take('bool')
+            left, right = predicate, term()
+            predicate = lambda ticket, left=left, right=right: left(ticket) or right(ticket)
+        return predicate
+
+    def term():
+        predicate = factor()
+        while peek('bool', 'and'):
+            take('bool')
+            left, right = predicate, factor()
+            predicate = lambda ticket, left=left, right=right: left(ticket) and right(ticket)
+        return predicate
+
+    def factor():
+        nonlocal position
+        if peek('open'):
+            take('open')
+            predicate = expression()
+            take('close')
+            return predicate
+        field = take('field')
+        op = take('op')
+        if position >= len(tokens) or tokens[position][0] not in ('date', 'string', 'number', 'literal'):
+            raise ConditionError(f"Expected a value after {field} {op}")
+        kind, text = tokens[position]
+        position += 1
+        return _comparison(field, op, _literal(kind, text))
+
+    predicate = expression()
+    if position != len(tokens):
+        raise ConditionError(f"Unexpected {tokens[position][1]!r}")
+    return predicate
+
+def project(ticket: Dict[str, Any], fields: List[str]) -> Dict[str, Any]:
+    """Apply a fields= projection, including nested paths such as contact/name"""
+    projected = {}
+    for path in fields:
+        source, target = ticket, projected
+        parts = path.split('/')
+        for part in parts[:-1]:
+            source = source.get(part) if isinstance(source, dict) else None
+            if source is None:
+                break
+            target = target.setdefault(part, {})
+        else:
+            if isinstance(source, dict) and parts[-1] in source:
+                target[parts[-1]] = source[parts[-1]]
+    return projected
+
+class FakeConnectWiseServer:
+    """
+    Threaded HTTP server implementing GET /service/tickets,
+    /service/tickets/count and /service/tickets/{id} over a materialized
+    MockConnectWiseClient dataset, with ConnectWise-style conditions,
+    orderBy, page/pageSize pagination with Link headers and fields
+    projection. Every request can be delayed by `latency` seconds; requests
+    beyond `rate_limit` per second, and a random `throttle_rate` fraction of
+    the rest, get 429 with Retry-After.
+    """
+    def __init__(self, mock: Optional[MockConnectWiseClient] = None, host: str = '127.0.0.1',
+                 port: int = 0, latency: float = 0.0, rate_limit: Optional[float] = None,
+                 throttle_rate: float = 0.0, retry_after: float = 1.0, seed: int = 0):
+        self.mock = mock or MockConnectWiseClient(seed=seed)
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self._random = random.Random(seed)
+
+        self.tickets = [ticket for _, ticket in self.mock._dataset()]
+        self.by_id = {ticket['id']: ticket for ticket in self.tickets}
+
+        self._lock = threading.Lock()
+        self._tokens = rate_limit or 0.0
+        self._refilled = time.monotonic()
+        self.stats = {'requests': 0, 'throttled': 0}
+
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        """Base URL to use as CW_BASE_URL"""
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}{API_PREFIX}"
+
+    def start(self) -> 'FakeConnectWiseServer':
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name='fake-connectwise', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> 'FakeConnectWiseServer':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def touch(self, ticket_id: int, **changes: Any) -> Dict[str, Any]:
+        """Change a ticket and move its lastUpdated to now, as an edit in the PSA would"""
+        ticket = self.by_id[ticket_id]
+        ticket.update(changes)
+        ticket['_info'] = dict(ticket.get('_info', {}),
+                               lastUpdated=datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'))
+        return ticket
+
+    def _throttle(self) -> Optional[float]:
+        """Seconds the client should wait, or None when the request may proceed"""
+        with self._lock:
+            self.stats['requests'] += 1
+            if self.rate_limit:
+                now = time.monotonic()
+                self._tokens = min(self.rate_limit, self._tokens + (now - self._refilled) * self.rate_limit)
+                self._refilled = now
+                if self._tokens < 1:
+                    self.stats['throttled'] += 1
+                    return (1 - self._tokens) / self.rate_limit
+                self._tokens -= 1
+            if self.throttle_rate and self._random.random() < self.throttle_rate:
+                self.stats['throttled'] += 1
+                return self.retry_after
+        return None
+
+    def query(self, params: Dict[str, str]) -> List[Dict[str, Any]]:
+        """Tickets matching conditions, in orderBy order"""
+        predicate = parse_conditions(params.get('conditions'))
+        matches = [ticket for ticket in self.tickets if predicate(ticket)]
+        order_by = params.get('orderBy')
+        if order_by:
+            field, _, direction = order_by.partition(' ')
+            matches.sort(key=lambda t: (_field_value(t, field) is None, _field_value(t, field) or 0),
+                         reverse=direction.strip().lower() == 'desc')
+        return matches
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, body: Any, headers: Optional[Dict[str, str]] = None) -> None:
+                payload = json.dumps(body, separators=(',', ':')).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                if server.latency:
+                    time.sleep(server.latency)
+                wait = server._throttle()
+                if wait is not None:
+                    self._send(429, {'code': 'TooManyRequests', 'message': 'Rate limit exceeded'},
+                               {'Retry-After': f"{max(wait, 0.001):.3f}"})
+                    return
+
+                parts = urlsplit(self.path)
+                params = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+                path = parts.path[len(API_PREFIX):] if parts.path.startswith(API_PREFIX) else parts.path
+                path = path.rstrip('/')
+                try:
+                    if path == '/service/tickets':
+                        self._list(parts.path, params)
+                    elif path == '/service/tickets/count':
+                        self._send(200, {'count': len(server.query(params))})
+                    elif re.fullmatch(r'/service/tickets/\d+', path):
+                        ticket = server.by_id.get(int(path.rsplit('/', 1)[1]))
+                        if ticket is None:
+                            self._send(404, {'code': 'NotFound', 'message': 'Ticket not found'})
+                        else:
+                            self._send(200, self._fields(ticket, params))
+                    else:
+                        self._send(404, {'code': 'NotFound', 'message': f"No route for {path}"})
+                except (ConditionError, ValueError) as e:
+                    self._send(400, {'code': 'InvalidObject', 'message': str(e)})
+
+            def _fields(self, ticket: Dict[str, Any], params: Dict[str, str]) -> Dict[str, Any]:
+                fields = [field.strip() for field in params.get('fields', '').split(',') if field.strip()]
+                return project(ticket, fields) if fields else ticket
+
+            def _list(self, path: str, params: Dict[str, str]) -> None:
+                page = max(1, int(params.get('page', 1)))
+                page_size = min(MAX_PAGE_SIZE, max(1, int(params.get('pageSize', DEFAULT_PAGE_SIZE))))
+                matches = server.query(params)
+                start = (page - 1) * page_size
+                body = [self._fields(ticket, params) for ticket in matches[start:start + page_size]]
+
+                headers = {}
+                host = self.headers.get('Host', '')
+                if start + page_size < len(matches):
+                    query = urlencode(dict(params, page=page + 1, pageSize=page_size))
+                    headers['Link'] = f'<http://{host}{path}?{query}>; rel="next"'
+                self._send(200, body, headers)
+
+        return Handler
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Serve a synthetic ConnectWise ticket API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--tickets-per-day', type=int, default=2000)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every request')
+    parser.add_argument('--rate-limit', type=float, default=None, help='requests per second before 429s')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='fraction of requests answered with 429')
+    parser.add_argument('--retry-after', type=float, default=1.0)
+    args = parser.parse_args()
+
+    mock = MockConnectWiseClient(seed=args.seed, users=args.users,
+                                 tickets_per_day=args.tickets_per_day, days=args.days)
+    server = FakeConnectWiseServer(mock, args.host, args.port, args.latency, args.rate_limit,
+                                   args.throttle_rate, args.retry_after, args.seed)
+    print(f"Serving {len(server.tickets)} tickets; set CW_BASE_URL={server.url}", flush=True)
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+if __name__ == '__main__':
+    main()
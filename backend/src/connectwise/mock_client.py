@@ -1,10 +1,35 @@
 # src/connectwise/mock_client.py
-from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
 import random
 
+from .store import CW_TIMESTAMP_FORMAT, parse_cw_datetime
+
+DAY_SECONDS = 86400
+
 class MockConnectWiseClient:
-    def __init__(self):
+    """
+    Stand-in for ConnectWiseClient backed by a seeded synthetic dataset.
+
+    The dataset has `tickets_per_day` background tickets per day over `days`
+    days, spread across `users` users and `companies` companies. On top of
+    that, a `pattern_users` fraction of users get a burst of `pattern_size`
+    tickets about one issue within `pattern_hours`, and `outbreaks` times
+    `outbreak_users` different users each file one ticket about the same
+    common issue within `outbreak_minutes`. Tickets are generated a
+    day at a time in dateEntered order with increasing unique ids, and
+    identical arguments always give an identical dataset. Each query
+    regenerates the stream, so millions of tickets never sit in memory.
+
+    get_member_tickets() keeps its original behavior: a small random set
+    for one member with one injected pattern.
+    """
+    ANALYSIS_FIELDS = ('id', 'summary', 'dateEntered', 'contact', 'type', 'priority', 'enteredBy', 'company', 'board')
+
+    def __init__(self, seed: Optional[int] = None, users: int = 25, tickets_per_day: int = 50,
+                 days: int = 30, companies: int = 10, pattern_users: float = 0.1,
+                 pattern_size: int = 4, pattern_hours: float = 48, outbreaks: int = 0,
+                 outbreak_users: int = 40, outbreak_minutes: float = 30, end: Optional[datetime] = None):
         self.ticket_types = ["Service Request", "Problem", "Incident"]
         self.priorities = ["Low", "Medium", "High"]
         self.common_issues = [
@@ -14,17 +39,55 @@ class MockConnectWiseClient:
             "Email Problems",
             "Printer Not Working"
         ]
+        self.background_issues = self.common_issues + [
+            "VPN Disconnects", "Outlook Crashing", "Laptop Running Slow", "New User Setup",
+            "Teams Audio Issue", "Shared Drive Access", "Monitor Flickering", "MFA Reset",
+            "Scanner Offline", "Phone Not Ringing", "Browser Certificate Error", "Account Locked",
+            "Disk Space Low", "Backup Failed", "Wi-Fi Dropping", "License Request",
+        ]
+        self.boards = ["Service Board", "Projects", "Escalations"]
+        self.statuses = ["New", "In Progress", "Waiting", "Closed"]
+
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.random = random.Random(self.seed)
+        self.users = users
+        self.tickets_per_day = tickets_per_day
+        self.days = days
+        self.companies = companies
+        self.pattern_users = pattern_users
+        self.pattern_size = pattern_size
+        self.pattern_hours = pattern_hours
+        self.outbreaks = outbreaks
+        self.outbreak_users = outbreak_users
+        self.outbreak_minutes = outbreak_minutes
+        end = end or datetime.now(timezone.utc)
+        if end.tzinfo is None:
+            end = end.astimezone(timezone.utc)
+        self.end = int(end.timestamp())
+        self.start = self.end - days * DAY_SECONDS
+        self._next_id = 1
+
+    def _new_id(self) -> int:
+        ticket_id = self._next_id
+        self._next_id += 1
+        return ticket_id
+
+    def user_identifier(self, index: int) -> str:
+        return f"user{index:05d}"
+
+    def user_name(self, index: int) -> str:
+        return f"User {index:05d}"
 
     def generate_mock_ticket(self, date: datetime, member: str) -> Dict[str, Any]:
         """Generate a realistic-looking ticket"""
-        ticket_type = random.choice(self.ticket_types)
-        issue = random.choice(self.common_issues)
-        
+        ticket_type = self.random.choice(self.ticket_types)
+        issue = self.random.choice(self.common_issues)
+
         return {
-            "id": random.randint(1000, 9999),
-            "summary": f"{issue} - {random.randint(100, 999)}",
+            "id": self._new_id(),
+            "summary": f"{issue} - {self.random.randint(100, 999)}",
             "type": {"name": ticket_type},
-            "priority": {"name": random.choice(self.priorities)},
+            "priority": {"name": self.random.choice(self.priorities)},
             "status": {"name": "New"},
             "dateEntered": date.isoformat(),
             "enteredBy": member,
@@ -32,7 +95,8 @@ class MockConnectWiseClient:
             "board": {"name": "Service Board"}
         }
 
-    def get_member_tickets(self, member_identifier: str, days: int = 7) -> List[Dict[str, Any]]:
+    def get_member_tickets(self, member_identifier: str, days: int = 7, board: Optional[str] = None,
+                           status: Optional[str] = None, company: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         Generate a set of test tickets with patterns for testing
         """
@@ -41,34 +105,158 @@ class MockConnectWiseClient:
         tickets = []
 
         # Generate normal random tickets
-        for _ in range(random.randint(5, 10)):
+        for _ in range(self.random.randint(5, 10)):
             ticket_date = start_date + timedelta(
-                days=random.randint(0, days)
+                days=self.random.randint(0, days)
             )
             tickets.append(self.generate_mock_ticket(ticket_date, member_identifier))
 
         # Insert a pattern - multiple similar tickets
-        pattern_issue = random.choice(self.common_issues)
+        pattern_issue = self.random.choice(self.common_issues)
         for _ in range(4):  # Create pattern with 4 similar tickets
             ticket_date = start_date + timedelta(
-                days=random.randint(0, days)
+                days=self.random.randint(0, days)
             )
             ticket = self.generate_mock_ticket(ticket_date, member_identifier)
-            ticket["summary"] = f"{pattern_issue} - {random.randint(100, 999)}"
+            ticket["summary"] = f"{pattern_issue} - {self.random.randint(100, 999)}"
             ticket["type"]["name"] = self.ticket_types[0]  # Same type for pattern
             tickets.append(ticket)
 
         return tickets
 
+    def injected_patterns(self) -> List[Dict[str, Any]]:
+        """
+        The pattern bursts in the dataset: user, issue and the entry times
+        (epoch seconds) of the burst tickets
+        """
+        rng = random.Random(f"{self.seed}:patterns")
+        count = int(self.users * self.pattern_users)
+        span = int(self.pattern_hours * 3600)
+        patterns = []
+        for index in rng.sample(range(self.users), count):
+            anchor = rng.randint(self.start, max(self.start, self.end - span))
+            patterns.append({
+                'user': index,
+                'issue': rng.choice(self.common_issues),
+                'times': sorted(anchor + rng.randint(0, span) for _ in range(self.pattern_size)),
+            })
+        return patterns
+
+    def injected_outbreaks(self) -> List[Dict[str, Any]]:
+        """
+        The cross-user outbreaks in the dataset: issue, the users hit and the
+        entry times (epoch seconds) of their tickets
+        """
+        rng = random.Random(f"{self.seed}:outbreaks")
+        span = int(self.outbreak_minutes * 60)
+        outbreaks = []
+        for _ in range(self.outbreaks):
+            anchor = rng.randint(self.start, max(self.start, self.end - span))
+            outbreaks.append({
+                'issue': rng.choice(self.common_issues),
+                'users': rng.sample(range(self.users), min(self.users, self.outbreak_users)),
+                'times': sorted(anchor + rng.randint(0, span) for _ in range(min(self.users, self.outbreak_users))),
+            })
+        return outbreaks
+
+    def _ticket(self, rng: random.Random, ticket_id: int, entered: int, user: int, issue: str) -> Dict[str, Any]:
+        date_entered = datetime.fromtimestamp(entered, timezone.utc).strftime(CW_TIMESTAMP_FORMAT)
+        company = user % self.companies
+        return {
+            "id": ticket_id,
+            "summary": f"{issue} - {rng.randint(100, 999)}",
+            "type": {"id": 1, "name": rng.choice(self.ticket_types)},
+            "priority": {"id": 1, "name": rng.choice(self.priorities)},
+            "status": {"id": 1, "name": rng.choice(self.statuses)},
+            "board": {"id": 1, "name": rng.choice(self.boards)},
+            "company": {"id": company + 1, "name": f"Company {company:03d}"},
+            "contact": {"id": user + 1, "name": self.user_name(user)},
+            "enteredBy": self.user_identifier(user),
+            "dateEntered": date_entered,
+            "_info": {"lastUpdated": date_entered},
+        }
+
+    def _dataset(self) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """(epoch seconds, ticket) for the whole dataset, oldest first"""
+        rng = random.Random(self.seed)
+        bursts = {}
+        for pattern in self.injected_patterns():
+            for entered in pattern['times']:
+                day = (entered - self.start) // DAY_SECONDS
+                bursts.setdefault(day, []).append((entered, pattern['user'], pattern['issue']))
+        for outbreak in self.injected_outbreaks():
+            for entered, user in zip(outbreak['times'], outbreak['users']):
+                day = (entered - self.start) // DAY_SECONDS
+                bursts.setdefault(day, []).append((entered, user, outbreak['issue']))
+
+        ticket_id = 0
+        for day in range(self.days + 1):
+            day_start = self.start + day * DAY_SECONDS
+            day_end = min(day_start + DAY_SECONDS, self.end + 1)
+            if day_start >= day_end:
+                break
+            fraction = (day_end - day_start) / DAY_SECONDS
+            rows = [
+                (rng.randrange(day_start, day_end), rng.randrange(self.users), rng.choice(self.background_issues))
+                for _ in range(round(self.tickets_per_day * fraction))
+            ]
+            rows.extend(bursts.get(day, ()))
+            rows.sort(key=lambda row: row[0])
+            for entered, user, issue in rows:
+                ticket_id += 1
+                yield entered, self._ticket(rng, ticket_id, entered, user, issue)
+
+    def _matches(self, ticket: Dict[str, Any], member: Optional[str], board: Optional[str],
+                 status: Optional[str], company: Optional[str]) -> bool:
+        return ((member is None or ticket['enteredBy'] == member)
+                and (board is None or ticket['board']['name'] == board)
+                and (status is None or ticket['status']['name'] == status)
+                and (company is None or ticket['company']['name'] == company))
+
+    def _project(self, ticket: Dict[str, Any], fields: Optional[Iterable[str]]) -> Dict[str, Any]:
+        if not fields:
+            return ticket
+        return {field: ticket[field] for field in fields if field in ticket}
+
+    def iter_tickets(self, start_date: datetime, end_date: datetime, member: Optional[str] = None,
+                     board: Optional[str] = None, status: Optional[str] = None,
+                     company: Optional[str] = None, fields: Optional[Iterable[str]] = None) -> Iterator[Dict[str, Any]]:
+        """Stream the dataset's tickets entered in [start_date, end_date] matching the filters"""
+        start, end = start_date.timestamp(), end_date.timestamp()
+        for entered, ticket in self._dataset():
+            if entered > end:
+                break
+            if entered >= start and self._matches(ticket, member, board, status, company):
+                yield self._project(ticket, fields)
+
+    def get_tickets(self, start_date: datetime, end_date: datetime, **filters) -> List[Dict[str, Any]]:
+        return list(self.iter_tickets(start_date, end_date, **filters))
+
+    def iter_updated_tickets(self, since: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Tickets whose lastUpdated is at or after the watermark, oldest first"""
+        since = parse_cw_datetime(since).timestamp() if since else float('-inf')
+        for entered, ticket in self._dataset():
+            if entered >= since:
+                yield ticket
+
+    def get_ticket_details(self, ticket_id: int) -> Dict[str, Any]:
+        # Ids increase with dateEntered, so the scan stops at the ticket
+        for _, ticket in self._dataset():
+            if ticket['id'] == ticket_id:
+                return ticket
+            if ticket['id'] > ticket_id:
+                break
+        raise KeyError(f"Ticket {ticket_id} not found")
+
     def test_different_patterns(self, member_identifier: str) -> List[Dict[str, Any]]:
         """
         Generate test data with different types of patterns for testing
         """
         tickets = self.get_member_tickets(member_identifier)
-        
+
         print("\nTest Data Generated:")
         print(f"Total Tickets: {len(tickets)}")
-        
+
         # Count pattern occurrences
         summaries = {}
         types = {}
@@ -76,9 +264,9 @@ class MockConnectWiseClient:
             summary = ticket["summary"].split(" - ")[0]
             summaries[summary] = summaries.get(summary, 0) + 1
             types[ticket["type"]["name"]] = types.get(ticket["type"]["name"], 0) + 1
-        
+
         print("\nPattern Distribution:")
         print("Issue Types:", dict(types))
         print("Common Issues:", dict(summaries))
-        
-        return tickets
\ No newline at end of file
+
+        return tickets
@@ -1 +1,100 @@
-# Optional to store data to avoid repeated API calls
\ No newline at end of file
+# src/connectwise/models.py
+import re
+import sys
+from functools import lru_cache
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Union
+from .store import parse_cw_datetime
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+STOPWORDS = frozenset({
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'but', 'by', 'can', 'cannot', 'cant', 'for',
+    'from', 'has', 'have', 'i', 'in', 'into', 'is', 'it', 'its', 'my', 'no', 'not', 'of',
+    'on', 'or', 'please', 're', 'the', 'to', 'was', 'with', 'fw', 'fwd'
+})
+
+def normalize_tokens(summary: str) -> List[str]:
+    """
+    Lower-cased word tokens of a ticket summary without stopwords or pure
+    numbers (ticket numbers, asset tags), which say nothing about the issue
+    """
+    return [
+        token for token in _TOKEN_RE.findall(summary.lower())
+        if token not in STOPWORDS and not token.isdigit()
+    ]
+
+def _name(data: Dict[str, Any], field: str) -> Optional[str]:
+    value = data.get(field)
+    return value.get('name') if isinstance(value, dict) else value
+
+def _intern(value: Optional[str]) -> str:
+    return sys.intern(value) if value else ''
+
+@lru_cache(maxsize=65536)
+def issue_key(summary: str) -> str:
+    """
+    Normalized issue label of a summary, interned so tickets about the same
+    issue share one string. Memoized because summaries repeat heavily.
+    """
+    return sys.intern(' '.join(normalize_tokens(summary)) or summary.lower())
+
+class Ticket:
+    """
+    The fields of a ConnectWise ticket the analysis pipeline uses, parsed
+    once at ingest. Categorical strings are interned and dateEntered is kept
+    both as an epoch-second int for window math and as the original string
+    for prompts.
+    """
+    __slots__ = ('id', 'summary', 'issue', 'user', 'entered_by', 'entered', 'date_entered',
+                 'type', 'board', 'company')
+
+    def __init__(self, id: int, summary: str, user: str, entered: int, date_entered: str,
+                 entered_by: str = '', type: str = '', board: str = '', company: str = ''):
+        self.id = id
+        self.summary = summary
+        self.issue = issue_key(summary)
+        self.user = _intern(user) or 'Unknown'
+        self.entered_by = _intern(entered_by)
+        self.entered = entered
+        self.date_entered = date_entered
+        self.type = _intern(type)
+        self.board = _intern(board)
+        self.company = _intern(company)
+
+    @classmethod
+    def from_api(cls, data: Dict[str, Any]) -> 'Ticket':
+        """Build a Ticket from a ticket dict as returned by the ConnectWise API"""
+        date_entered = data['dateEntered']
+        entered_by = data.get('enteredBy') or ''
+        return cls(
+            data['id'],
+            data.get('summary') or '',
+            _name(data, 'contact') or entered_by,
+            int(parse_cw_datetime(date_entered).timestamp()),
+            date_entered,
+            entered_by,
+            _name(data, 'type') or '',
+            _name(data, 'board') or '',
+            _name(data, 'company') or '',
+        )
+
+    @classmethod
+    def coerce(cls, value: Union['Ticket', Dict[str, Any]]) -> 'Ticket':
+        return value if isinstance(value, cls) else cls.from_api(value)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Compact API-shaped dict for alerts and JSON payloads"""
+        return {
+            'id': self.id,
+            'summary': self.summary,
+            'dateEntered': self.date_entered,
+            'contact': {'name': self.user},
+        }
+
+    def __repr__(self) -> str:
+        return f"Ticket(id={self.id!r}, user={self.user!r}, summary={self.summary!r})"
+
+def iter_models(tickets: Iterable[Union[Ticket, Dict[str, Any]]]) -> Iterator[Ticket]:
+    """Parse a stream of API ticket dicts (or pass Tickets through) lazily"""
+    for ticket in tickets:
+        yield Ticket.coerce(ticket)
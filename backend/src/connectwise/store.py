@@ -0,0 +1,162 @@
+# src/connectwise/store.py
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Any, Iterable, Iterator, Optional
+from ..config import settings
+
+CW_TIMESTAMP_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+# Tickets handed to the archive at once, so each day gets few, large files
+ARCHIVE_BATCH_SIZE = 50000
+
+def parse_cw_datetime(value: str) -> datetime:
+    """
+    Parse a ConnectWise timestamp. The API returns a trailing 'Z', which
+    fromisoformat() only accepts from Python 3.11 on.
+    """
+    if value.endswith('Z'):
+        value = value[:-1] + '+00:00'
+    return datetime.fromisoformat(value)
+
+def _last_updated(ticket: Dict[str, Any]) -> str:
+    return ticket.get('_info', {}).get('lastUpdated') or ticket['dateEntered']
+
+class TicketStore:
+    """
+    SQLite copy of the ConnectWise tickets we analyze. sync() pulls only the
+    tickets changed since the stored lastUpdated high-water mark and upserts
+    them, so steady-state runs transfer a handful of tickets instead of the
+    whole analysis window. With an archive, every upserted ticket is also
+    appended there, keeping history past the retention window.
+    """
+    def __init__(self, path: Optional[str] = None, retention_days: Optional[int] = None, archive=None):
+        self.path = path or settings.TICKET_STORE_PATH
+        self.retention_days = retention_days or settings.TICKET_STORE_RETENTION_DAYS
+        self.archive = archive
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS tickets (
+                id INTEGER PRIMARY KEY,
+                date_entered REAL NOT NULL,
+                last_updated TEXT NOT NULL,
+                data TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_tickets_date_entered ON tickets (date_entered);
+            CREATE TABLE IF NOT EXISTS sync_state (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+        """)
+        self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    @property
+    def watermark(self) -> Optional[str]:
+        """The highest lastUpdated timestamp seen so far"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM sync_state WHERE key = 'last_updated'").fetchone()
+        return row[0] if row else None
+
+    def upsert(self, tickets: Iterable[Dict[str, Any]], batch_size: int = 500) -> int:
+        """
+        Insert or replace tickets, then advance the watermark. Returns the
+        number written. The stream comes ordered by id, not lastUpdated, so
+        the watermark only moves once all of it was written: if the fetch
+        fails part-way, the next sync starts over from the old watermark
+        instead of skipping the unfetched tickets.
+        """
+        written = 0
+        newest = None
+        batch, archive_batch = [], []
+        for ticket in tickets:
+            batch.append(ticket)
+            if len(batch) >= batch_size:
+                written += self._write_batch(batch)
+                newest = max(newest or '', max(_last_updated(t) for t in batch))
+                archive_batch.extend(batch)
+                batch = []
+            if len(archive_batch) >= ARCHIVE_BATCH_SIZE:
+                self._archive(archive_batch)
+                archive_batch = []
+        if batch:
+            written += self._write_batch(batch)
+            newest = max(newest or '', max(_last_updated(t) for t in batch))
+            archive_batch.extend(batch)
+        self._archive(archive_batch)
+        if newest is not None:
+            self._advance_watermark(newest)
+        return written
+
+    def _archive(self, tickets: List[Dict[str, Any]]) -> None:
+        if self.archive is not None and tickets:
+            self.archive.append(tickets)
+
+    def _write_batch(self, tickets: List[Dict[str, Any]]) -> int:
+        rows = [
+            (t['id'], parse_cw_datetime(t['dateEntered']).timestamp(), _last_updated(t), json.dumps(t))
+            for t in tickets
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO tickets (id, date_entered, last_updated, data) VALUES (?, ?, ?, ?)",
+                rows)
+        return len(rows)
+
+    def _advance_watermark(self, newest: str) -> None:
+        with self._lock, self._conn:
+            # ConnectWise timestamps share one fixed format, so string order is time order
+            self._conn.execute("""
+                INSERT INTO sync_state (key, value) VALUES ('last_updated', ?)
+                ON CONFLICT (key) DO UPDATE SET value = MAX(value, excluded.value)
+            """, (newest,))
+
+    def sync(self, client) -> int:
+        """
+        Fetch tickets changed since the watermark (or the whole retention
+        window on first run), upsert them and prune expired rows
+        """
+        since = self.watermark
+        if since is None:
+            start = datetime.now(timezone.utc) - timedelta(days=self.retention_days)
+            since = start.strftime(CW_TIMESTAMP_FORMAT)
+
+        written = self.upsert(client.iter_updated_tickets(since))
+        self.prune(datetime.now() - timedelta(days=self.retention_days))
+        return written
+
+    def prune(self, before: datetime) -> int:
+        """Drop tickets entered before the given date"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "DELETE FROM tickets WHERE date_entered < ?", (before.timestamp(),))
+        return cursor.rowcount
+
+    def iter_tickets(self, start_date: datetime, end_date: datetime) -> Iterator[Dict[str, Any]]:
+        """
+        Stream stored tickets entered within the specified date range
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data FROM tickets WHERE date_entered BETWEEN ? AND ? ORDER BY date_entered",
+                (start_date.timestamp(), end_date.timestamp())).fetchall()
+        for (data,) in rows:
+            yield json.loads(data)
+
+    def count_tickets(self, start_date: datetime, end_date: datetime) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*) FROM tickets WHERE date_entered BETWEEN ? AND ?",
+                (start_date.timestamp(), end_date.timestamp())).fetchone()
+        return row[0]
@@ -1,28 +1,59 @@
 # src/monitoring/alerts.py
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from typing import List, Dict, Any
+import logging
+from typing import List, Dict, Any, Optional
 from datetime import datetime
 from ..config import settings
+from .dispatch import AlertDispatcher, ALERTS, ALERT_SEND_SECONDS
+from .suppression import AlertStateIndex, SUPPRESS
+
+logger = logging.getLogger(__name__)
 
 class AlertManager:
-    def __init__(self):
+    SUBJECT = "ConnectWise Ticket Pattern Alert"
+
+    def __init__(self, dispatcher: Optional[AlertDispatcher] = None,
+                 alert_index: Optional[AlertStateIndex] = None):
         self.smtp_server = settings.SMTP_SERVER
         self.smtp_port = settings.SMTP_PORT
         self.smtp_username = settings.SMTP_USERNAME
         self.smtp_password = settings.SMTP_PASSWORD
         self.notification_email = settings.NOTIFICATION_EMAIL
+        # When set, alerts are queued for batched background delivery
+        self.dispatcher = dispatcher
+        if alert_index is None and settings.ALERT_STATE_PATH:
+            alert_index = AlertStateIndex()
+        self.alert_index = alert_index
 
     def generate_alert(self, member_name: str, patterns: List[Dict[str, Any]]) -> None:
         """
         Generate and send alert for identified patterns
         """
+        if self.alert_index is not None:
+            candidates = len(patterns)
+            checked = [(pattern, self.alert_index.check(member_name, pattern['pattern_value'],
+                                                        (t.get('id') for t in pattern['tickets']),
+                                                        pattern['ticket_count']))
+                       for pattern in patterns]
+            checked = [(pattern, decision) for pattern, decision in checked if decision != SUPPRESS]
+            patterns = [pattern for pattern, _ in checked]
+            if candidates > len(patterns):
+                ALERTS.inc(candidates - len(patterns), source='manager', outcome='suppressed')
         if not patterns:
             return
 
         message = self._create_alert_message(member_name, patterns)
-        self._send_email(message)
+        if self.dispatcher is not None:
+            self.dispatcher.enqueue(self.notification_email, f"{self.SUBJECT}: {member_name}", message)
+            ALERTS.inc(source='manager', outcome='queued')
+        elif not self._send_email(message):
+            return
+
+        # Only recorded once delivered or queued, so a failed send is retried on the next detection
+        if self.alert_index is not None:
+            for pattern, decision in checked:
+                self.alert_index.record(member_name, pattern['pattern_value'],
+                                        (t.get('id') for t in pattern['tickets']),
+                                        pattern['ticket_count'], decision)
 
     def _create_alert_message(self, member_name: str, patterns: List[Dict[str, Any]]) -> str:
         """
@@ -44,21 +75,30 @@ class AlertManager:
         
         return message
 
-    def _send_email(self, message: str) -> None:
+    def _send_email(self, message: str) -> bool:
         """
-        Send email alert
+        Send email alert. Returns whether it was sent.
         """
+        # Imported here so building an AlertManager stays cheap for the API workers
+        from email.mime.multipart import MIMEMultipart
+        from email.mime.text import MIMEText
+        import smtplib
+
         msg = MIMEMultipart()
         msg['From'] = self.smtp_username
         msg['To'] = self.notification_email
-        msg['Subject'] = "ConnectWise Ticket Pattern Alert"
+        msg['Subject'] = self.SUBJECT
         
         msg.attach(MIMEText(message, 'plain'))
         
         try:
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
+            with ALERT_SEND_SECONDS.time(source='manager'), smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
                 server.starttls()
                 server.login(self.smtp_username, self.smtp_password)
                 server.send_message(msg)
         except Exception as e:
-            print(f"Failed to send email alert: {str(e)}")
\ No newline at end of file
+            ALERTS.inc(source='manager', outcome='failed')
+            logger.error(f"Failed to send email alert: {str(e)}")
+            return False
+        ALERTS.inc(source='manager', outcome='sent')
+        return True
\ No newline at end of file
@@ -1,22 +1,81 @@
+import logging
+from .alerts import AlertManager
 from .claude_analyzer import ClaudeAnalyzer
+from .outbreaks import OutbreakDetector
+from .pattern_engine import PatternEngine
+from ..config import settings
+from ..connectwise.models import iter_models
+from ..utils.metrics import stage
 from datetime import datetime, timedelta
 
+logger = logging.getLogger(__name__)
+
+# Alert recipient label for outbreaks, which span users rather than belonging to one
+OUTBREAK_SCOPE = 'Multiple users'
+
 class TicketAnalyzer:
-    def __init__(self, cw_client):
+    def __init__(self, cw_client, store=None, dispatcher=None, archive=None):
         self.cw_client = cw_client
-        self.claude = ClaudeAnalyzer()
+        self.store = store
+        self.archive = archive
+        self.claude = ClaudeAnalyzer(dispatcher=dispatcher)
+        self.engine = PatternEngine()
+        self.outbreaks = OutbreakDetector()
+        # Shares the Claude analyzer's alert state, so one index suppresses repeats for both
+        self.alerts = AlertManager(dispatcher, alert_index=self.claude.alert_index)
+
+    def _observe(self, tickets):
+        # Every fetched ticket also feeds the cross-user outbreak detector on its way through
+        for ticket in tickets:
+            outbreak = self.outbreaks.add(ticket)
+            if outbreak is not None:
+                self._report_outbreak(outbreak)
+            yield ticket
+
+    def _report_outbreak(self, pattern):
+        """Log and alert an outbreak as soon as its cluster starts spiking"""
+        logger.warning(f"Outbreak detected: {pattern['pattern_value']} ({pattern['ticket_count']} tickets "
+                       f"from {pattern['user_count']} users)")
+        try:
+            self.alerts.generate_alert(OUTBREAK_SCOPE, [pattern])
+        except Exception as e:
+            # An alert failure must not interrupt the ticket stream the run is consuming
+            logger.error(f"Failed to alert outbreak {pattern['pattern_value']}: {str(e)}")
+
+    def _iter_window(self, start_date, end_date):
+        # With a local store, pull only what changed since the last sync and read the window locally
+        if self.store is not None:
+            with stage('sync'):
+                self.store.sync(self.cw_client)
+            tickets = self.store.iter_tickets(start_date, end_date)
+        else:
+            tickets = self.cw_client.iter_tickets(start_date, end_date, fields=self.cw_client.ANALYSIS_FIELDS)
+        # Parse each ticket once, as it arrives, into the compact Ticket model
+        return self._observe(iter_models(tickets))
 
-    def analyze_tickets(self):
+    def analyze_tickets(self, mode=None):
         """
-        Analyze tickets for user-specific patterns
+        Analyze tickets for user-specific patterns. mode is 'serial' (one
+        Claude call per user), 'concurrent' (the same calls in flight
+        together), 'batched' (many users per call) or 'batch_api' (Message
+        Batches API); defaults to settings.CLAUDE_ANALYSIS_MODE.
         """
+        mode = mode or settings.CLAUDE_ANALYSIS_MODE
         # Get recent tickets (last 3 days)
         end_date = datetime.now()
         start_date = end_date - timedelta(days=3)
-        tickets = self.cw_client.get_tickets(start_date, end_date)
+        tickets = self._iter_window(start_date, end_date)
 
-        # Use Claude to analyze user patterns
-        patterns = self.claude.analyze_user_patterns(tickets)
+        # Use Claude to analyze user patterns as the ticket stream is consumed
+        with stage('analyze'):
+            if mode == 'serial':
+                patterns = self.claude.analyze_user_patterns(tickets)
+            elif mode == 'concurrent':
+                patterns = self.claude.analyze_user_patterns_concurrent(tickets)
+            elif mode in ('batched', 'batch_api'):
+                patterns = self.claude.analyze_user_patterns_batched(tickets, use_batch_api=mode == 'batch_api')
+            else:
+                raise ValueError(f"Unknown analysis mode: {mode}")
 
         # Format results for the frontend
         formatted_patterns = []
@@ -30,4 +89,43 @@ class TicketAnalyzer:
                     'detected_at': pattern['analyzed_at']
                 })
 
-        return formatted_patterns
\ No newline at end of file
+        # With an archive, show how each user's usual ticket rate compares, from the history before this window
+        if self.archive is not None and formatted_patterns:
+            baselines = self.archive.user_baselines([p['user'] for p in formatted_patterns], start_date,
+                                                    days=settings.TICKET_ARCHIVE_BASELINE_DAYS)
+            for pattern in formatted_patterns:
+                pattern['baseline'] = baselines[pattern['user']]
+
+        return formatted_patterns
+
+    def outbreak_patterns(self):
+        """
+        Issues currently spiking across many users, from the tickets every
+        analysis run has streamed past the outbreak detector
+        """
+        return self.outbreaks.outbreaks(now=datetime.now().timestamp())
+
+    def analyze_member_tickets(self, member_identifier, days=None):
+        """
+        Find recurring issues in the tickets a member entered over the last X
+        days (settings.ALERT_TIMEFRAME_DAYS by default)
+        """
+        days = days or settings.ALERT_TIMEFRAME_DAYS
+        tickets = self.cw_client.get_member_tickets(member_identifier, days=days)
+        return self.analyze_member_window(tickets)
+
+    def analyze_member_window(self, tickets):
+        """
+        Find recurring issues in an already fetched list of a member's tickets
+        """
+        return self.engine.find_patterns(tickets, scopes=('user',))
+
+    def analyze_recurring_issues(self, days=None, scopes=('user', 'company', 'board')):
+        """
+        Find recurring issues per user, company and board across the whole
+        window, without any Claude calls
+        """
+        days = days or settings.ALERT_TIMEFRAME_DAYS
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=days)
+        return self.engine.find_patterns(self._iter_window(start_date, end_date), scopes=scopes)
@@ -0,0 +1,82 @@
+# src/monitoring/cache.py
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import List, Any, Optional
+from ..config import settings
+from ..connectwise.models import Ticket
+
+def analysis_key(user: str, tickets: List[Ticket], prompt_version: str, model: str) -> str:
+    """
+    Content address of an analysis: changes only when the user's ticket set,
+    the prompt or the model changes
+    """
+    ticket_set = sorted((str(t.id), t.summary) for t in tickets)
+    material = json.dumps([user, ticket_set, prompt_version, model], separators=(',', ':'))
+    return hashlib.sha256(material.encode()).hexdigest()
+
+class AnalysisCache:
+    """
+    Persistent cache of Claude analyses with a TTL and least-recently-used
+    eviction once max_entries is exceeded
+    """
+    def __init__(self, path: Optional[str] = None, ttl_seconds: Optional[int] = None,
+                 max_entries: Optional[int] = None):
+        self.path = path or settings.CLAUDE_CACHE_PATH
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.CLAUDE_CACHE_TTL_SECONDS
+        self.max_entries = max_entries or settings.CLAUDE_CACHE_MAX_ENTRIES
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS analyses (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_analyses_accessed_at ON analyses (accessed_at);
+        """)
+        self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM analyses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM analyses WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE analyses SET accessed_at = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any) -> None:
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO analyses (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now))
+            count = self._conn.execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+            if count > self.max_entries:
+                self._conn.execute("""
+                    DELETE FROM analyses WHERE key IN (
+                        SELECT key FROM analyses ORDER BY accessed_at LIMIT ?
+                    )
+                """, (count - self.max_entries,))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
@@ -1,113 +1,497 @@
-from anthropic import Anthropic
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Optional, Union
 from datetime import datetime, timedelta
-import os
-from dotenv import load_dotenv
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-import smtplib
+import asyncio
+import json
+import logging
+import random
+import time
+from .. import services
+from ..config import settings
+from ..connectwise.models import Ticket
+from ..utils import metrics
+from ..utils.ratelimit import AsyncApiRateLimiter
+from .cache import AnalysisCache, analysis_key
+from .similarity import SimilarityPrefilter
+from .ticket_index import TicketIndex
+from .dispatch import AlertDispatcher, ALERTS, ALERT_SEND_SECONDS
+from .suppression import AlertStateIndex, SUPPRESS, FOLLOW_UP
+from .prompts import USER_INSTRUCTIONS, BATCH_INSTRUCTIONS, compact_tickets
+from .schema import (PATTERN_TOOL, BATCH_PATTERN_TOOL, PatternAnalysis, SchemaError,
+                     parse_pattern, parse_batch_patterns, tool_input)
+
+logger = logging.getLogger(__name__)
+
+# Bump when a prompt changes so cached analyses from the old prompt are not reused
+USER_PROMPT_VERSION = 'user-v3'
+BATCH_PROMPT_VERSION = 'batch-v3'
+
+CLAUDE_REQUESTS = metrics.counter('claude_requests_total', 'Claude requests by analysis mode and outcome',
+                                  ('mode', 'outcome'))
+CLAUDE_TOKENS = metrics.counter('claude_tokens_total', 'Claude tokens by direction: input, output, cache_write, cache_read',
+                                ('direction',))
+CLAUDE_CALL_TOKENS = metrics.histogram('claude_call_tokens', 'Tokens per Claude call by direction', ('direction',),
+                                       buckets=(100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000))
+CLAUDE_REQUEST_SECONDS = metrics.histogram('claude_request_seconds', 'Claude request latency', ('mode',))
+CLAUDE_RETRIES = metrics.counter('claude_retries_total', 'Claude request retries by cause', ('reason',))
+CLAUDE_CACHE = metrics.counter('claude_cache_lookups_total', 'Analysis cache lookups by result', ('result',))
 
 class ClaudeAnalyzer:
-    def __init__(self):
-        # Load environment variables
-        load_dotenv()
+    # Rough characters-per-token ratio used to size batched prompts
+    CHARS_PER_TOKEN = 4
+    # Output tokens reserved per user for a structured (tool call) result
+    OUTPUT_TOKENS_PER_USER = 80
+    # Trailing window a user's tickets are analyzed over
+    RECENT_SECONDS = 3 * 86400
+    # Overloaded, rate limited or failing server side; worth another attempt
+    RETRY_STATUSES = frozenset({429, 500, 502, 503, 504, 529})
+
+    def __init__(self, cache: Optional[AnalysisCache] = None,
+                 prefilter: Optional[SimilarityPrefilter] = None,
+                 dispatcher: Optional[AlertDispatcher] = None,
+                 alert_index: Optional[AlertStateIndex] = None):
+        # The shared Anthropic client is looked up on first use, so the SDK import is deferred
+        self._client = None
+        # AsyncAnthropic client for concurrent mode; by default a new one is opened per run
+        self.async_client = None
+
+        if cache is None and settings.CLAUDE_CACHE_PATH:
+            cache = AnalysisCache()
+        self.cache = cache
+
+        if prefilter is None and settings.PREFILTER_ENABLED:
+            prefilter = SimilarityPrefilter()
+        self.prefilter = prefilter
+
+        # When set, pattern emails are queued instead of sent inline
+        self.dispatcher = dispatcher
+
+        # Tickets seen so far by user, kept across runs and trimmed to the longest window
+        self.index = TicketIndex()
+
+        if alert_index is None and settings.ALERT_STATE_PATH:
+            alert_index = AlertStateIndex()
+        self.alert_index = alert_index
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = services.anthropic_client()
+        return self._client
+
+    @client.setter
+    def client(self, client) -> None:
+        self._client = client
 
-        # Get API key
-        api_key = os.getenv('ANTHROPIC_API_KEY')
-        if not api_key:
-            raise ValueError("ANTHROPIC_API_KEY not found in environment variables")
+    def _cache_key(self, user: str, tickets: List[Ticket], prompt_version: str) -> Optional[str]:
+        if self.cache is None:
+            return None
+        return analysis_key(user, tickets, prompt_version, settings.CLAUDE_MODEL)
+
+    def _cached(self, key: Optional[str]) -> Optional[Dict[str, Any]]:
+        if not key:
+            return None
+        cached = self.cache.get(key)
+        CLAUDE_CACHE.inc(result='miss' if cached is None else 'hit')
+        return cached
 
-        self.client = Anthropic(api_key=api_key)
+    def _create(self, mode: str, **params: Any):
+        """messages.create with request, latency and token metrics"""
+        started = time.perf_counter()
+        try:
+            response = self.client.messages.create(**params)
+        except Exception:
+            CLAUDE_REQUESTS.inc(mode=mode, outcome='error')
+            raise
+        finally:
+            CLAUDE_REQUEST_SECONDS.observe(time.perf_counter() - started, mode=mode)
+        CLAUDE_REQUESTS.inc(mode=mode, outcome='ok')
+        self._record_usage(response)
+        return response
+
+    def _record_usage(self, message: Any) -> None:
+        """Per-call token usage, including prompt cache writes and reads"""
+        usage = getattr(message, 'usage', None)
+        if usage is None:
+            return
+        for direction, field in (('input', 'input_tokens'), ('output', 'output_tokens'),
+                                 ('cache_write', 'cache_creation_input_tokens'),
+                                 ('cache_read', 'cache_read_input_tokens')):
+            tokens = getattr(usage, field, 0) or 0
+            CLAUDE_TOKENS.inc(tokens, direction=direction)
+            CLAUDE_CALL_TOKENS.observe(tokens, direction=direction)
 
-    def analyze_user_patterns(self, tickets: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def analyze_user_patterns(self, tickets: Iterable[Union[Ticket, Dict[str, Any]]]) -> List[Dict[str, Any]]:
         """
-        Analyze tickets to identify user-specific patterns
+        Analyze tickets to identify user-specific patterns. Accepts any
+        iterable, so a streamed ticket fetch is grouped as pages arrive.
         """
-        user_tickets = self._group_by_user(tickets)
         patterns = []
 
-        for user, user_tickets in user_tickets.items():
-            # Only analyze if user has submitted multiple tickets in past 3 days
-            recent_tickets = [t for t in user_tickets
-                              if (datetime.now() - datetime.fromisoformat(t['dateEntered'])).days <= 3]
+        for user, recent_tickets in self._recent_user_tickets(tickets).items():
+            pattern = self._analyze_user_tickets(user, recent_tickets)
+            if pattern:
+                patterns.append(pattern)
+
+        return patterns
+
+    def analyze_user_patterns_concurrent(self, tickets: Iterable[Union[Ticket, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        analyze_user_patterns with the per-user requests in flight together,
+        giving the same results in the same order. Runs its own event loop;
+        async callers use analyze_user_patterns_async.
+        """
+        return asyncio.run(self.analyze_user_patterns_async(tickets))
+
+    async def analyze_user_patterns_async(self, tickets: Iterable[Union[Ticket, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        Analyze each user with its own request, up to
+        settings.CLAUDE_MAX_CONCURRENCY at once, under a limiter that keeps
+        requests and input/output tokens per minute within the configured
+        limits and backs everyone off when the API answers 429
+        """
+        recent = self._recent_user_tickets(tickets)
+        results, pending = {}, []
+        for user, user_tickets in recent.items():
+            key = self._cache_key(user, user_tickets, USER_PROMPT_VERSION)
+            cached = self._cached(key)
+            if cached is not None:
+                results[user] = cached
+            else:
+                pending.append((user, user_tickets, key))
+
+        if pending:
+            client = self.async_client or services.new_async_anthropic_client()
+            limiter = AsyncApiRateLimiter(settings.CLAUDE_REQUESTS_PER_MINUTE,
+                                          settings.CLAUDE_INPUT_TOKENS_PER_MINUTE,
+                                          settings.CLAUDE_OUTPUT_TOKENS_PER_MINUTE)
+            semaphore = asyncio.Semaphore(settings.CLAUDE_MAX_CONCURRENCY)
+            try:
+                analyses = await asyncio.gather(*(
+                    self._analyze_user_tickets_async(client, limiter, semaphore, user, user_tickets, key)
+                    for user, user_tickets, key in pending
+                ))
+            finally:
+                if client is not self.async_client:
+                    await client.close()
+            results.update((user, analysis) for (user, _, _), analysis in zip(pending, analyses))
+
+        # Serial mode's order: the stream's user order
+        return [results[user] for user in recent if results.get(user)]
+
+    def _recent_user_tickets(self, tickets: Iterable[Union[Ticket, Dict[str, Any]]]) -> Dict[str, List[Ticket]]:
+        """
+        Users who submitted multiple tickets in the past 3 days, with those
+        tickets, narrowed by the similarity pre-filter to users whose tickets
+        look related
+        """
+        now = time.time()
+        cutoff = now - self.RECENT_SECONDS
+        window = []
+        for ticket in tickets:
+            ticket = Ticket.coerce(ticket)
+            self.index.add(ticket)
+            if ticket.entered >= cutoff:
+                window.append(ticket)
+        self.index.prune(now - max(self.index.windows))
+        if self.alert_index is not None:
+            # Once per run keeps the suppression table to alerts still in cooldown
+            self.alert_index.prune()
+
+        # Keep the stream's user order so batches are packed deterministically
+        candidates = self.index.users_with_at_least(2, self.RECENT_SECONDS, now)
+        recent = {}
+        for ticket in window:
+            if ticket.user in candidates and ticket.user not in recent:
+                recent[ticket.user] = self.index.tickets(ticket.user, cutoff, now)
+
+        if self.prefilter is None:
+            return recent
+
+        self.prefilter.fit(window)
+        return {user: user_tickets for user, user_tickets in recent.items()
+                if self.prefilter.should_escalate(user_tickets)}
 
-            if len(recent_tickets) >= 2:
-                pattern = self._analyze_user_tickets(user, recent_tickets)
-                if pattern:
-                    patterns.append(pattern)
+    def analyze_user_patterns_batched(self, tickets: Iterable[Union[Ticket, Dict[str, Any]]],
+                                      use_batch_api: bool = False) -> List[Dict[str, Any]]:
+        """
+        Analyze user patterns with many users packed into each request, up to
+        settings.CLAUDE_BATCH_TOKEN_BUDGET. With use_batch_api the requests go
+        through the Message Batches API instead, for non-interactive runs.
+        """
+        patterns = []
+        pending, keys = {}, {}
+        for user, recent_tickets in self._recent_user_tickets(tickets).items():
+            key = self._cache_key(user, recent_tickets, BATCH_PROMPT_VERSION)
+            cached = self._cached(key)
+            if cached is not None:
+                patterns.append(cached)
+            else:
+                pending[user], keys[user] = recent_tickets, key
 
+        batches = self._pack_batches(pending)
+        if use_batch_api:
+            responses = self._run_batch_api(batches)
+        else:
+            responses = [self._request_batch(batch) for batch in batches]
+
+        for batch, response in zip(batches, responses):
+            for pattern in self._batch_patterns(batch, response):
+                if keys[pattern['user']]:
+                    self.cache.set(keys[pattern['user']], pattern)
+                patterns.append(pattern)
         return patterns
 
-    def _analyze_user_tickets(self, user: str, tickets: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def _ticket_lines(self, tickets: List[Ticket], now: Optional[float] = None) -> List[str]:
+        return compact_tickets(tickets, time.time() if now is None else now,
+                               settings.CLAUDE_USER_TOKEN_BUDGET, self.CHARS_PER_TOKEN)
+
+    def _user_section(self, key: str, user: str, tickets: List[Ticket], now: Optional[float] = None) -> str:
+        return '\n'.join([f"[{key}] User: {user}"] + self._ticket_lines(tickets, now))
+
+    def _pack_batches(self, user_tickets: Dict[str, List[Ticket]]) -> List[List[Ticket]]:
         """
-        Analyze a specific user's tickets for patterns
+        Greedily pack user sections into batches whose estimated prompt size
+        fits the token budget. A user too large for the budget gets a batch alone.
         """
-        ticket_summaries = [
-            f"Ticket {t['id']}: {t['summary']} (Created: {t['dateEntered']})"
-            for t in tickets
-        ]
+        budget = settings.CLAUDE_BATCH_TOKEN_BUDGET - len(BATCH_INSTRUCTIONS) // self.CHARS_PER_TOKEN
+        batches, current, current_tokens = [], [], 0
+        now = time.time()
 
-        prompt = f"""Analyze these support tickets submitted by user {user} in the past 3 days:
+        for user, tickets in user_tickets.items():
+            tokens = len(self._user_section('U0', user, tickets, now)) // self.CHARS_PER_TOKEN + 1
+            if current and current_tokens + tokens > budget:
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append({'key': f"U{len(current) + 1}", 'user': user, 'tickets': tickets})
+            current_tokens += tokens
+
+        if current:
+            batches.append(current)
+        return batches
+
+    def _batch_params(self, batch: List[Dict[str, Any]]) -> Dict[str, Any]:
+        now = time.time()
+        sections = '\n\n'.join(self._user_section(entry['key'], entry['user'], entry['tickets'], now)
+                                 for entry in batch)
+        return {
+            'model': settings.CLAUDE_MODEL,
+            'max_tokens': 50 + self.OUTPUT_TOKENS_PER_USER * len(batch),
+            'tools': [BATCH_PATTERN_TOOL],
+            'tool_choice': {'type': 'tool', 'name': BATCH_PATTERN_TOOL['name']},
+            'system': BATCH_INSTRUCTIONS,
+            'messages': [{'role': 'user', 'content': sections}]
+        }
+
+    def _request_batch(self, batch: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        try:
+            response = self._create('batched', **self._batch_params(batch))
+            return tool_input(response.content, BATCH_PATTERN_TOOL['name'])
+        except Exception as e:
+            logger.error(f"Error analyzing batch of {len(batch)} users: {str(e)}")
+            return None
 
-        Tickets: {ticket_summaries}
+    def _run_batch_api(self, batches: List[List[Ticket]]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Submit every batch as one Message Batches job and wait for it to end
+        """
+        if not batches:
+            return []
 
-        Focus specifically on identifying:
-        1. If the user is submitting multiple tickets about the same or similar issues
-        2. The specific type of recurring problem (e.g., "Outlook login", "printer connection") 
-        3. Whether this might indicate a deeper underlying issue the user is facing
+        job = self.client.messages.batches.create(requests=[
+            {'custom_id': f"batch-{i}", 'params': self._batch_params(batch)}
+            for i, batch in enumerate(batches)
+        ])
+        while job.processing_status != 'ended':
+            time.sleep(settings.CLAUDE_BATCH_POLL_SECONDS)
+            job = self.client.messages.batches.retrieve(job.id)
 
-        Respond in JSON format with these keys:
-        - has_pattern (boolean)
-        - issue_type (string, the main type of recurring issue)
-        - ticket_count (number of related tickets)
-        - significance (high/medium/low, based on frequency and impact)
-        - user_impact (brief description of how this affects the user)"""
+        inputs = {}
+        for result in self.client.messages.batches.results(job.id):
+            CLAUDE_REQUESTS.inc(mode='batch_api', outcome='ok' if result.result.type == 'succeeded' else 'error')
+            if result.result.type == 'succeeded':
+                self._record_usage(result.result.message)
+                inputs[result.custom_id] = tool_input(result.result.message.content, BATCH_PATTERN_TOOL['name'])
+            else:
+                logger.warning(f"Batch request {result.custom_id} did not succeed: {result.result.type}")
+        return [inputs.get(f"batch-{i}") for i in range(len(batches))]
 
+    def _batch_patterns(self, batch: List[Dict[str, Any]],
+                        response: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Map the validated per-user results of one batched response back to users
+        """
+        if response is None:
+            return []
         try:
-            response = self.client.messages.create(
-                model="claude-3-sonnet-20240229",
-                max_tokens=300,
-                messages=[{"role": "user", "content": prompt}]
-            )
-            analysis = response.content
-
-            # Check if the pattern is significant
-            if 'high' in analysis.lower() or 'medium' in analysis.lower():
-                pattern = {
+            results = parse_batch_patterns(response)
+        except SchemaError as e:
+            logger.error(f"Could not parse batched analysis: {str(e)}")
+            return []
+
+        patterns = []
+        for entry in batch:
+            analysis = results.get(entry['key'])
+            if analysis is not None:
+                patterns.append(self._pattern_record(entry['user'], entry['tickets'], analysis))
+        return patterns
+
+    def _pattern_record(self, user: str, tickets: List[Ticket],
+                        analysis: PatternAnalysis) -> Dict[str, Any]:
+        """
+        Alert on a significant analysis and build the result record for it
+        """
+        if analysis.is_significant:
+            try:
+                self._notify(user, {
                     'user': user,
                     'ticket_count': len(tickets),
                     'time_period': '3 days',
-                    'issue_type': analysis.get('issue_type', ''),
-                    'significance': analysis.get('significance', ''),
-                    'user_impact': analysis.get('user_impact', '')
-                }
-                self.send_pattern_email(user, pattern)
-
-            return {
-                'user': user,
-                'ticket_count': len(tickets),
-                'time_period': '3 days',
-                'analysis': analysis,
-                'analyzed_at': datetime.now().isoformat()
-            }
+                    'issue_type': analysis.issue_type,
+                    'significance': analysis.significance,
+                    'user_impact': analysis.user_impact
+                }, tickets)
+            except Exception as e:
+                logger.error(f"Failed to send pattern email for user {user}: {str(e)}")
+
+        return {
+            'user': user,
+            'ticket_count': len(tickets),
+            'time_period': '3 days',
+            'analysis': analysis._asdict(),
+            'analyzed_at': datetime.now().isoformat()
+        }
+
+    def _analyze_user_tickets(self, user: str, tickets: List[Ticket]) -> Dict[str, Any]:
+        """
+        Analyze a specific user's tickets for patterns, reusing the cached
+        analysis while the user's ticket set is unchanged
+        """
+        key = self._cache_key(user, tickets, USER_PROMPT_VERSION)
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+
+        try:
+            response = self._create('serial', **self._user_params(user, tickets))
+            return self._user_result(user, tickets, key, response)
         except Exception as e:
-            print(f"Error analyzing tickets for user {user}: {str(e)}")
+            logger.error(f"Error analyzing tickets for user {user}: {str(e)}")
             return None
 
-    def send_pattern_email(self, user: str, pattern: Dict[str, Any]):
-        # Load email settings from environment variables
-        smtp_server = os.getenv('SMTP_SERVER')
-        smtp_port = int(os.getenv('SMTP_PORT'))
-        sender_email = os.getenv('SENDER_EMAIL')
-        sender_password = os.getenv('SENDER_PASSWORD')
-        recipient_email = os.getenv('RECIPIENT_EMAIL')
+    def _user_params(self, user: str, tickets: List[Ticket]) -> Dict[str, Any]:
+        # Only this message varies per user; tools and system form the cacheable prefix
+        lines = '\n'.join(self._ticket_lines(tickets))
+        return {
+            'model': settings.CLAUDE_MODEL,
+            'max_tokens': 50 + self.OUTPUT_TOKENS_PER_USER,
+            'tools': [PATTERN_TOOL],
+            'tool_choice': {'type': 'tool', 'name': PATTERN_TOOL['name']},
+            'system': USER_INSTRUCTIONS,
+            'messages': [{"role": "user", "content": f"Tickets submitted by user {user} in the past 3 days:\n{lines}"}]
+        }
 
-        # Create email message
-        message = MIMEMultipart()
-        message['From'] = sender_email
-        message['To'] = recipient_email
-        message['Subject'] = f"Significant Pattern Detected for User {user}"
+    def _user_result(self, user: str, tickets: List[Ticket], key: Optional[str],
+                     response: Any) -> Optional[Dict[str, Any]]:
+        payload = tool_input(response.content, PATTERN_TOOL['name'])
+        if payload is None:
+            logger.warning(f"No structured analysis returned for user {user}")
+            return None
+
+        result = self._pattern_record(user, tickets, parse_pattern(payload))
+        if key:
+            self.cache.set(key, result)
+        return result
 
+    async def _analyze_user_tickets_async(self, client: Any, limiter: AsyncApiRateLimiter,
+                                          semaphore: asyncio.Semaphore, user: str,
+                                          tickets: List[Ticket], key: Optional[str]) -> Optional[Dict[str, Any]]:
+        try:
+            params = self._user_params(user, tickets)
+            async with semaphore:
+                response = await self._create_async(client, limiter, params)
+            # Recording may send mail or touch SQLite, so keep it off the event loop
+            return await asyncio.to_thread(self._user_result, user, tickets, key, response)
+        except Exception as e:
+            logger.error(f"Error analyzing tickets for user {user}: {str(e)}")
+            return None
+
+    async def _create_async(self, client: Any, limiter: AsyncApiRateLimiter, params: Dict[str, Any]):
+        """
+        messages.create on the async client under the rate limiter, with a
+        per-attempt timeout and retries for timeouts, connection errors and
+        retryable statuses. A 429 pauses the limiter for every request.
+        """
+        estimate = sum(len(json.dumps(params[part])) for part in ('system', 'messages', 'tools')) // self.CHARS_PER_TOKEN
+        attempt = 0
+        while True:
+            await limiter.acquire(estimate, params['max_tokens'])
+            started = time.perf_counter()
+            try:
+                response = await asyncio.wait_for(client.messages.create(**params), settings.CLAUDE_TIMEOUT_SECONDS)
+            except Exception as e:
+                CLAUDE_REQUEST_SECONDS.observe(time.perf_counter() - started, mode='concurrent')
+                CLAUDE_REQUESTS.inc(mode='concurrent', outcome='error')
+                status = getattr(e, 'status_code', None)
+                if attempt >= settings.CLAUDE_MAX_RETRIES or not self._is_retryable(e, status):
+                    raise
+                delay = self._retry_delay(e, attempt)
+                if status == 429:
+                    limiter.pause(delay)
+                CLAUDE_RETRIES.inc(reason=status or type(e).__name__)
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+
+            CLAUDE_REQUEST_SECONDS.observe(time.perf_counter() - started, mode='concurrent')
+            CLAUDE_REQUESTS.inc(mode='concurrent', outcome='ok')
+            self._record_usage(response)
+            limiter.settle(estimate, params['max_tokens'], getattr(response, 'usage', None))
+            return response
+
+    def _is_retryable(self, error: Exception, status: Optional[int]) -> bool:
+        if status is not None:
+            return status in self.RETRY_STATUSES
+        if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+            return True
+        from anthropic import APIConnectionError
+        return isinstance(error, APIConnectionError)
+
+    def _retry_delay(self, error: Exception, attempt: int) -> float:
+        """The server's retry-after when given, otherwise full-jitter exponential backoff"""
+        headers = getattr(getattr(error, 'response', None), 'headers', None) or {}
+        retry_after = headers.get('retry-after')
+        if retry_after:
+            try:
+                return min(max(float(retry_after), 0.0), settings.CLAUDE_BACKOFF_MAX_SECONDS)
+            except ValueError:
+                pass
+        return random.uniform(0, min(settings.CLAUDE_BACKOFF_MAX_SECONDS,
+                                     settings.CLAUDE_BACKOFF_BASE_SECONDS * (2 ** attempt)))
+
+    def _notify(self, user: str, pattern: Dict[str, Any], tickets: List[Ticket]) -> None:
+        """
+        Email a significant pattern unless the same one was already alerted
+        within the cooldown and has not grown since
+        """
+        if self.alert_index is None:
+            self.send_pattern_email(user, pattern)
+            return
+
+        ticket_ids = [t.id for t in tickets]
+        decision = self.alert_index.check(user, pattern.get('issue_type', ''), ticket_ids, pattern['ticket_count'])
+        if decision == SUPPRESS:
+            ALERTS.inc(source='claude', outcome='suppressed')
+            return
+        if decision == FOLLOW_UP:
+            pattern = dict(pattern, follow_up=True)
+        # Raises when delivery fails, leaving the alert unrecorded so the next detection retries it
+        self.send_pattern_email(user, pattern)
+        self.alert_index.record(user, pattern.get('issue_type', ''), ticket_ids, pattern['ticket_count'], decision)
+
+    def send_pattern_email(self, user: str, pattern: Dict[str, Any]):
+        subject = f"Significant Pattern Detected for User {user}"
+        if pattern.get('follow_up'):
+            subject = f"Follow-up: {subject} ({pattern['ticket_count']} tickets)"
         body = f"""
         A significant pattern has been detected for user {user}:
 
@@ -116,20 +500,30 @@ class ClaudeAnalyzer:
         Significance: {pattern['significance']}
         User Impact: {pattern['user_impact']}
         """
+
+        if self.dispatcher is not None:
+            self.dispatcher.enqueue(settings.RECIPIENT_EMAIL, subject, body)
+            ALERTS.inc(source='claude', outcome='queued')
+            return
+
+        from email.mime.multipart import MIMEMultipart
+        from email.mime.text import MIMEText
+        import smtplib
+
+        # Create email message
+        message = MIMEMultipart()
+        message['From'] = settings.SENDER_EMAIL
+        message['To'] = settings.RECIPIENT_EMAIL
+        message['Subject'] = subject
         message.attach(MIMEText(body, 'plain'))
 
         # Send email
-        with smtplib.SMTP(smtp_server, smtp_port) as server:
-            server.starttls()
-            server.login(sender_email, sender_password)
-            server.send_message(message)
-
-    def _group_by_user(self, tickets: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
-        """Group tickets by user"""
-        grouped = {}
-        for ticket in tickets:
-            user = ticket.get('contact', {}).get('name', 'Unknown')
-            if user not in grouped:
-                grouped[user] = []
-            grouped[user].append(ticket)
-        return grouped
\ No newline at end of file
+        try:
+            with ALERT_SEND_SECONDS.time(source='claude'), smtplib.SMTP(settings.SMTP_SERVER, settings.SMTP_PORT) as server:
+                server.starttls()
+                server.login(settings.SENDER_EMAIL, settings.SENDER_PASSWORD)
+                server.send_message(message)
+        except Exception:
+            ALERTS.inc(source='claude', outcome='failed')
+            raise
+        ALERTS.inc(source='claude', outcome='sent')
@@ -0,0 +1,250 @@
+# src/monitoring/dispatch.py
+import logging
+import os
+import random
+import smtplib
+import sqlite3
+import threading
+import time
+import uuid
+from email.mime.text import MIMEText
+from typing import List, Dict, Any, Optional
+from ..config import settings
+from ..utils import metrics
+
+logger = logging.getLogger(__name__)
+
+ALERTS = metrics.counter('alerts_total', 'Alert emails by source and outcome (queued, sent, failed, suppressed)',
+                         ('source', 'outcome'))
+ALERT_SEND_SECONDS = metrics.histogram('alert_send_seconds', 'Time to deliver one alert email over SMTP', ('source',))
+
+DIGEST_SEPARATOR = "\n\n" + "=" * 60 + "\n\n"
+
+class AlertDispatcher:
+    """
+    Durable outbox for alert emails. enqueue() only writes a row, so analysis
+    never waits on the mail server; a background worker wakes every
+    flush_seconds, folds each recipient's pending alerts into one digest and
+    sends all digests over a single authenticated SMTP connection that stays
+    open between flushes. Failed sends are retried with jittered exponential
+    backoff, and anything unsent survives a restart in the SQLite outbox.
+
+    Every API worker, the monitor and the scheduler run a dispatcher on the
+    same outbox, so a flush first claims its rows in one write transaction
+    (status 'sending', stamped with this dispatcher's id) and only sends
+    what it claimed. A claim held longer than claim_lease_seconds is taken
+    to belong to a crashed process and becomes claimable again.
+    """
+    def __init__(self, path: Optional[str] = None, smtp_server: Optional[str] = None,
+                 smtp_port: Optional[int] = None, username: Optional[str] = None,
+                 password: Optional[str] = None, sender: Optional[str] = None,
+                 use_tls: Optional[bool] = None, flush_seconds: Optional[float] = None):
+        self.path = path or settings.ALERT_OUTBOX_PATH
+        self.smtp_server = smtp_server or settings.SMTP_SERVER
+        self.smtp_port = smtp_port or settings.SMTP_PORT
+        self.username = username if username is not None else settings.SMTP_USERNAME
+        self.password = password if password is not None else settings.SMTP_PASSWORD
+        self.sender = sender or settings.SENDER_EMAIL or self.username
+        self.use_tls = settings.SMTP_USE_TLS if use_tls is None else use_tls
+        self.flush_seconds = flush_seconds if flush_seconds is not None else settings.ALERT_FLUSH_SECONDS
+        self.max_attempts = settings.ALERT_MAX_ATTEMPTS
+        self.retry_base = settings.ALERT_RETRY_BASE_SECONDS
+        self.retry_max = settings.ALERT_RETRY_MAX_SECONDS
+        self.claim_lease_seconds = settings.ALERT_CLAIM_LEASE_SECONDS
+        self.dispatcher_id = f"{os.getpid()}-{uuid.uuid4().hex[:12]}"
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                recipient TEXT NOT NULL,
+                subject TEXT NOT NULL,
+                body TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                last_error TEXT,
+                claimed_by TEXT,
+                claimed_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_outbox_pending ON outbox (status, next_attempt_at);
+        """)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(outbox)")}
+        for column, column_type in (('claimed_by', 'TEXT'), ('claimed_at', 'REAL')):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE outbox ADD COLUMN {column} {column_type}")
+        self._conn.commit()
+
+        self._smtp = None
+        # Serializes this process's flushes; the row claims keep other processes out
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._worker = None
+
+    def enqueue(self, recipient: str, subject: str, body: str) -> int:
+        """Queue an alert for delivery and return its outbox id"""
+        now = time.time()
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO outbox (recipient, subject, body, created_at, next_attempt_at) VALUES (?, ?, ?, ?, ?)",
+                (recipient, subject, body, now, now))
+        return cursor.lastrowid
+
+    def pending(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, recipient, subject, body, attempts FROM outbox WHERE status = 'pending' ORDER BY id"
+            ).fetchall()
+        return [dict(zip(('id', 'recipient', 'subject', 'body', 'attempts'), row)) for row in rows]
+
+    def start(self) -> None:
+        """Start the background delivery worker"""
+        if self._worker is not None and self._worker.is_alive():
+            return
+        self._stopping.clear()
+        self._worker = threading.Thread(target=self._run, name='alert-dispatcher', daemon=True)
+        self._worker.start()
+
+    def stop(self, timeout: float = 30) -> None:
+        """Stop the worker after one last flush and close the SMTP connection"""
+        self._stopping.set()
+        self._wake.set()
+        if self._worker is not None:
+            self._worker.join(timeout)
+            self._worker = None
+        self._close_smtp()
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            self._flush_logged()
+        # stop() may have landed mid-flush; deliver whatever was queued meanwhile
+        self._flush_logged()
+
+    def _flush_logged(self) -> None:
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"Alert dispatch failed: {str(e)}")
+
+    def flush(self) -> int:
+        """
+        Send every due alert, one digest per recipient. Returns the number of
+        alerts delivered.
+        """
+        with self._flush_lock:
+            return self._flush()
+
+    def _claim(self) -> List[tuple]:
+        """Claim every due alert (and any whose claim lease expired) for this dispatcher"""
+        now = time.time()
+        with self._lock, self._conn:
+            # Takes the write lock before reading, so two processes cannot claim the same rows
+            self._conn.execute('BEGIN IMMEDIATE')
+            rows = self._conn.execute("""
+                SELECT id, recipient, subject, body, attempts FROM outbox
+                WHERE (status = 'pending' AND next_attempt_at <= ?)
+                   OR (status = 'sending' AND claimed_at < ?)
+                ORDER BY id
+            """, (now, now - self.claim_lease_seconds)).fetchall()
+            self._conn.executemany(
+                "UPDATE outbox SET status = 'sending', claimed_by = ?, claimed_at = ? WHERE id = ?",
+                [(self.dispatcher_id, now, row[0]) for row in rows])
+        return rows
+
+    def _flush(self) -> int:
+        rows = self._claim()
+        if not rows:
+            return 0
+
+        by_recipient = {}
+        for row in rows:
+            by_recipient.setdefault(row[1], []).append(row)
+
+        delivered = 0
+        for recipient, alerts in by_recipient.items():
+            try:
+                with ALERT_SEND_SECONDS.time(source='dispatcher'):
+                    self._send(recipient, *self._digest(alerts))
+            except Exception as e:
+                ALERTS.inc(len(alerts), source='dispatcher', outcome='failed')
+                self._close_smtp()
+                self._schedule_retry(alerts, str(e))
+                continue
+            ALERTS.inc(len(alerts), source='dispatcher', outcome='sent')
+            self._mark_sent(alerts)
+            delivered += len(alerts)
+        return delivered
+
+    def _digest(self, alerts: List[tuple]):
+        if len(alerts) == 1:
+            return alerts[0][2], alerts[0][3]
+        subject = f"{len(alerts)} ConnectWise alerts"
+        body = DIGEST_SEPARATOR.join(f"{alert[2]}\n\n{alert[3]}" for alert in alerts)
+        return subject, body
+
+    def _connection(self) -> smtplib.SMTP:
+        if self._smtp is not None:
+            try:
+                if self._smtp.noop()[0] == 250:
+                    return self._smtp
+            except smtplib.SMTPException:
+                pass
+            self._close_smtp()
+
+        smtp = smtplib.SMTP(self.smtp_server, self.smtp_port, timeout=30)
+        if self.use_tls:
+            smtp.starttls()
+        if self.username:
+            smtp.login(self.username, self.password)
+        self._smtp = smtp
+        return smtp
+
+    def _close_smtp(self) -> None:
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except Exception:
+            pass
+        self._smtp = None
+
+    def _send(self, recipient: str, subject: str, body: str) -> None:
+        message = MIMEText(body, 'plain')
+        message['From'] = self.sender
+        message['To'] = recipient
+        message['Subject'] = subject
+        self._connection().send_message(message)
+
+    def _mark_sent(self, alerts: List[tuple]) -> None:
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE outbox SET status = 'sent', attempts = attempts + 1, claimed_by = NULL "
+                "WHERE id = ? AND claimed_by = ?",
+                [(alert[0], self.dispatcher_id) for alert in alerts])
+
+    def _schedule_retry(self, alerts: List[tuple], error: str) -> None:
+        now = time.time()
+        updates = []
+        for alert_id, _, _, _, attempts in alerts:
+            attempts += 1
+            status = 'failed' if attempts >= self.max_attempts else 'pending'
+            delay = random.uniform(0, min(self.retry_max, self.retry_base * (2 ** attempts)))
+            updates.append((attempts, now + delay, status, error, alert_id, self.dispatcher_id))
+            if status == 'failed':
+                logger.error(f"Giving up on alert {alert_id} after {attempts} attempts: {error}")
+
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE outbox SET attempts = ?, next_attempt_at = ?, status = ?, last_error = ?, claimed_by = NULL "
+                "WHERE id = ? AND claimed_by = ?",
+                updates)
@@ -1,24 +1,36 @@
 # backend/monitor.py
 import schedule
 import time
-from src.connectwise.client import ConnectWiseClient
-from src.monitoring.analyzer import TicketAnalyzer
-from src.monitoring.claude_analyzer import ClaudeAnalyzer
+from src import services
+from src.monitoring.snapshots import compute_pattern_snapshots
+from src.config import settings
+from src.utils.logger import configure_logging, with_run_id
+from src.utils.metrics import stage
 import logging
 from datetime import datetime
 
-logging.basicConfig(level=logging.INFO)
+configure_logging()
 logger = logging.getLogger(__name__)
 
+# Every log line of one hourly run carries the same run id
+@with_run_id
 def check_patterns():
     try:
         current_time = datetime.now().strftime("%Y-%m-%d %H:00")
         logger.info(f"Running hourly pattern check at {current_time}")
         
-        cw_client = ConnectWiseClient()
-        analyzer = TicketAnalyzer(cw_client)
+        # Shared across runs: the store only syncs what changed and the analyzer keeps its ticket index
+        analyzer = services.ticket_analyzer()
         
-        patterns = analyzer.analyze_tickets()
+        with stage('total'):
+            snapshots = compute_pattern_snapshots(analyzer, services.ticket_store(),
+                                                  mode=settings.CLAUDE_SCHEDULED_ANALYSIS_MODE)
+            with stage('publish'):
+                # The API serves whatever the latest check published here
+                version = services.snapshot_store().publish(snapshots)
+        logger.info(f"Published pattern snapshot version {version}")
+
+        patterns = snapshots['patterns_user']['patterns']
         
         if patterns:
             logger.info(f"Found {len(patterns)} patterns")
@@ -33,6 +45,8 @@ def check_patterns():
 
 def main():
     logger.info("Starting hourly pattern monitoring service...")
+    # Pattern emails are queued and delivered in the background
+    services.alert_dispatcher()
     
     # Run initial check
     check_patterns()
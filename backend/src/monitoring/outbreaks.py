@@ -0,0 +1,263 @@
+# src/monitoring/outbreaks.py
+import math
+import zlib
+from collections import Counter, OrderedDict, deque
+from datetime import datetime
+from typing import List, Dict, Any, Deque, Iterable, Optional, Set, Tuple, Union
+import numpy as np
+from ..config import settings
+from ..connectwise.models import Ticket
+
+SHINGLE_SIZE = 4
+# Folded issue texts remembered per cluster, so repeated summaries skip MinHash
+MAX_CLUSTER_ISSUES = 64
+# Tickets listed on an outbreak pattern
+MAX_PATTERN_TICKETS = 50
+# Windows of stream seen before anything is reported, so every issue has a baseline
+WARMUP_WINDOWS = 24
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> Set[str]:
+    """Character shingles of a normalized issue text, robust to typos and word order noise"""
+    if len(text) <= size:
+        return {text}
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+class MinHasher:
+    """
+    MinHash signatures from num_perm multiply-shift hash functions over the
+    shingles' crc32, split into `bands` LSH bands: two texts share a band
+    key with high probability when their shingle sets' Jaccard similarity
+    is above about (1 / bands) ** (1 / rows). Multiply-shift (an odd 64-bit
+    multiplier, keeping the high bits) rather than (a * x + b) mod p with
+    small a, which barely wraps for 32-bit inputs and so nearly preserves
+    their order, badly overestimating the similarity of unrelated texts.
+    """
+    def __init__(self, num_perm: int = 32, bands: int = 8, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(0, 2 ** 64, num_perm, dtype=np.uint64) | np.uint64(1)
+        self.b = rng.integers(0, 2 ** 64, num_perm, dtype=np.uint64)
+        self.bands = bands
+        self.rows = num_perm // bands
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = np.fromiter((zlib.crc32(s.encode()) for s in shingles(text)), dtype=np.uint64)
+        # uint64 arithmetic wraps, which is the mod 2 ** 64 multiply-shift wants
+        return ((np.outer(self.a, hashes) + self.b[:, None]) >> np.uint64(32)).min(axis=1)
+
+    def band_keys(self, signature: np.ndarray) -> List[Tuple[int, bytes]]:
+        return [(band, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+                for band in range(self.bands)]
+
+class _Cluster:
+    __slots__ = ('id', 'label', 'signature', 'band_keys', 'issues', 'window', 'users', 'companies', 'boards',
+                 'history', 'last_seen', 'active')
+
+    def __init__(self, cluster_id: int, label: str, signature: np.ndarray, band_keys: List[Tuple[int, bytes]]):
+        self.id = cluster_id
+        self.label = label
+        self.signature = signature
+        self.band_keys = band_keys
+        self.issues: List[str] = []
+        # Tickets inside the sliding window, oldest first, with per-user/company/board counts of them
+        self.window: Deque[Ticket] = deque()
+        self.users: Counter = Counter()
+        self.companies: Counter = Counter()
+        self.boards: Counter = Counter()
+        # [window-sized slot, tickets] over the baseline horizon
+        self.history: Deque[List[int]] = deque()
+        self.last_seen = 0
+        self.active = False
+
+class OutbreakDetector:
+    """
+    Online clustering of the ticket feed into issues across all users, to
+    catch outages that show up as many people filing the same ticket.
+
+    Each ticket's normalized issue text is MinHashed and looked up in LSH
+    band buckets; it joins the most similar cluster found there whose
+    signature agrees on at least min_similarity of its hashes, so placement
+    takes constant time with no pairwise comparisons across the stream, and
+    repeated issue texts skip hashing entirely. Each
+    cluster keeps its tickets in the trailing window with live counts per
+    user, company and board, plus per-window ticket totals over the baseline
+    horizon. A cluster is in outbreak when its window has at least
+    min_tickets tickets from min_users distinct users and spike_factor times
+    its baseline rate plus three standard deviations of Poisson noise, once the stream spans WARMUP_WINDOWS windows (or the
+    whole baseline horizon, if shorter). Clusters unseen for the whole horizon are dropped, as
+    are the least recently seen beyond max_clusters, so memory stays bounded.
+
+    Tickets are expected roughly in entry order; a ticket older than the
+    newest one seen is skipped, which also makes re-feeding an overlapping
+    window idempotent.
+    """
+    def __init__(self, window_seconds: Optional[int] = None, baseline_days: Optional[float] = None,
+                 min_tickets: Optional[int] = None, min_users: Optional[int] = None,
+                 spike_factor: Optional[float] = None, min_similarity: Optional[float] = None,
+                 max_clusters: Optional[int] = None, hasher: Optional[MinHasher] = None):
+        self.window_seconds = window_seconds or settings.OUTBREAK_WINDOW_SECONDS
+        self.baseline_seconds = int((baseline_days or settings.OUTBREAK_BASELINE_DAYS) * 86400)
+        self.min_tickets = min_tickets or settings.OUTBREAK_MIN_TICKETS
+        self.min_users = min_users or settings.OUTBREAK_MIN_USERS
+        self.spike_factor = spike_factor or settings.OUTBREAK_SPIKE_FACTOR
+        self.min_similarity = min_similarity or settings.OUTBREAK_MIN_SIMILARITY
+        self.max_clusters = max_clusters or settings.OUTBREAK_MAX_CLUSTERS
+        self.hasher = hasher or MinHasher()
+
+        self._clusters: 'OrderedDict[int, _Cluster]' = OrderedDict()  # least recently seen first
+        self._buckets: Dict[Tuple[int, bytes], int] = {}
+        self._issues: Dict[str, int] = {}
+        self._next_id = 1
+        self._started = None
+        self._now = 0
+        self._seen_at_now: Set[int] = set()
+
+    def __len__(self) -> int:
+        return len(self._clusters)
+
+    def _cluster_for(self, issue: str) -> _Cluster:
+        cluster = self._clusters.get(self._issues.get(issue))
+        if cluster is not None:
+            return cluster
+
+        signature = self.hasher.signature(issue)
+        band_keys = self.hasher.band_keys(signature)
+        cluster, best = None, self.min_similarity
+        for key in band_keys:
+            candidate = self._clusters.get(self._buckets.get(key))
+            if candidate is not None and candidate is not cluster:
+                similarity = float(np.mean(candidate.signature == signature))
+                if similarity >= best:
+                    cluster, best = candidate, similarity
+        if cluster is None:
+            cluster = _Cluster(self._next_id, issue, signature, band_keys)
+            self._next_id += 1
+            self._clusters[cluster.id] = cluster
+        for key in band_keys:
+            self._buckets.setdefault(key, cluster.id)
+        if len(cluster.issues) < MAX_CLUSTER_ISSUES:
+            cluster.issues.append(issue)
+            self._issues[issue] = cluster.id
+        return cluster
+
+    def add(self, ticket: Union[Ticket, Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Count a ticket. Returns the outbreak pattern when this ticket pushes
+        its cluster into outbreak, otherwise None.
+        """
+        ticket = Ticket.coerce(ticket)
+        if ticket.entered < self._now or (ticket.entered == self._now and ticket.id in self._seen_at_now):
+            return None
+        if ticket.entered > self._now:
+            self._now = ticket.entered
+            self._seen_at_now.clear()
+        self._seen_at_now.add(ticket.id)
+
+        slot = ticket.entered // self.window_seconds
+        if self._started is None:
+            self._started = ticket.entered
+
+        cluster = self._cluster_for(ticket.issue)
+        self._clusters.move_to_end(cluster.id)
+        cluster.last_seen = ticket.entered
+        cluster.window.append(ticket)
+        cluster.users[ticket.user] += 1
+        cluster.companies[ticket.company] += 1
+        cluster.boards[ticket.board] += 1
+        if cluster.history and cluster.history[-1][0] == slot:
+            cluster.history[-1][1] += 1
+        else:
+            cluster.history.append([slot, 1])
+
+        self._expire(cluster, ticket.entered)
+        self._evict(ticket.entered)
+
+        spiking = self._is_spiking(cluster, slot)
+        started = spiking and not cluster.active
+        cluster.active = spiking
+        return self._pattern(cluster, slot) if started else None
+
+    def add_many(self, tickets: Iterable[Union[Ticket, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Count a stream of tickets; returns the outbreaks that started along the way"""
+        started = []
+        for ticket in tickets:
+            pattern = self.add(ticket)
+            if pattern is not None:
+                started.append(pattern)
+        return started
+
+    def _expire(self, cluster: _Cluster, now: int) -> None:
+        cutoff = now - self.window_seconds
+        window = cluster.window
+        while window and window[0].entered <= cutoff:
+            ticket = window.popleft()
+            for counts, key in ((cluster.users, ticket.user), (cluster.companies, ticket.company),
+                                (cluster.boards, ticket.board)):
+                counts[key] -= 1
+                if not counts[key]:
+                    del counts[key]
+        oldest_slot = (now - self.baseline_seconds) // self.window_seconds
+        while cluster.history and cluster.history[0][0] < oldest_slot:
+            cluster.history.popleft()
+
+    def _evict(self, now: int) -> None:
+        horizon = now - self.baseline_seconds
+        while self._clusters:
+            cluster = next(iter(self._clusters.values()))
+            if cluster.last_seen >= horizon and len(self._clusters) <= self.max_clusters:
+                return
+            del self._clusters[cluster.id]
+            for key in cluster.band_keys:
+                if self._buckets.get(key) == cluster.id:
+                    del self._buckets[key]
+            for issue in cluster.issues:
+                if self._issues.get(issue) == cluster.id:
+                    del self._issues[issue]
+
+    def _baseline(self, cluster: _Cluster, slot: int) -> float:
+        """Expected tickets per window from the cluster's history before the current slot"""
+        observed = min(self.baseline_seconds, slot * self.window_seconds - self._started) / self.window_seconds
+        if observed <= 0:
+            return 0.0
+        return sum(count for history_slot, count in cluster.history if history_slot < slot) / observed
+
+    def _is_spiking(self, cluster: _Cluster, slot: int) -> bool:
+        if self._now - self._started < min(self.baseline_seconds, WARMUP_WINDOWS * self.window_seconds):
+            return False
+        count = len(cluster.window)
+        if count < self.min_tickets or len(cluster.users) < self.min_users:
+            return False
+        expected = max(self._baseline(cluster, slot), 1.0)
+        return count >= self.spike_factor * expected + 3 * math.sqrt(expected)
+
+    def outbreaks(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Clusters in outbreak as of now (default: the newest ticket seen), largest first"""
+        now = int(now if now is not None else self._now)
+        slot = now // self.window_seconds
+        patterns = []
+        for cluster in self._clusters.values():
+            if not cluster.window:
+                continue
+            self._expire(cluster, now)
+            cluster.active = self._is_spiking(cluster, slot)
+            if cluster.active:
+                patterns.append(self._pattern(cluster, slot))
+        return sorted(patterns, key=lambda p: p['ticket_count'], reverse=True)
+
+    def _pattern(self, cluster: _Cluster, slot: int) -> Dict[str, Any]:
+        tickets = list(cluster.window)
+        return {
+            'pattern_type': 'outbreak',
+            'pattern_value': cluster.label,
+            'scope': 'all',
+            'cluster_id': cluster.id,
+            'ticket_count': len(tickets),
+            'user_count': len(cluster.users),
+            'baseline': round(self._baseline(cluster, slot), 2),
+            'companies': {name: count for name, count in cluster.companies.most_common(5) if name},
+            'boards': {name: count for name, count in cluster.boards.most_common(5) if name},
+            'first_occurrence': datetime.fromtimestamp(tickets[0].entered).isoformat(),
+            'last_occurrence': datetime.fromtimestamp(tickets[-1].entered).isoformat(),
+            'tickets': [t.as_dict() for t in tickets[-MAX_PATTERN_TICKETS:]],
+        }
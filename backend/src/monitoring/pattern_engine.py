@@ -0,0 +1,190 @@
+# src/monitoring/pattern_engine.py
+import gc
+from contextlib import contextmanager
+from datetime import datetime
+from operator import attrgetter
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple, Union
+import numpy as np
+from ..config import settings
+from ..connectwise.models import Ticket
+
+SCOPES = ('user', 'company', 'board')
+CATEGORICAL_FIELDS = ('user', 'issue', 'type', 'board', 'company')
+
+def encode(values: List[str]) -> Tuple[np.ndarray, List[str]]:
+    """
+    Dense integer codes for a categorical column, with its labels in order
+    of first appearance. Ticket interns its categorical strings, so equal
+    values are one object and np.unique runs on their ids instead of
+    comparing strings.
+    """
+    if not values:
+        return np.zeros(0, dtype=np.int64), []
+    ids = np.fromiter(map(id, values), dtype=np.uintp, count=len(values))
+    _, first, inverse = np.unique(ids, return_index=True, return_inverse=True)
+    # Renumber by first appearance, so codes and pattern order do not depend on memory addresses
+    appearance = np.argsort(first)
+    rank = np.empty_like(appearance)
+    rank[appearance] = np.arange(len(appearance))
+    return rank[inverse.ravel()], [values[i] for i in first[appearance].tolist()]
+
+@contextmanager
+def _gc_paused() -> Iterator[None]:
+    """
+    Hold off the cyclic garbage collector while building many acyclic
+    result objects: with a large ticket window alive, its repeated full
+    passes over the heap otherwise cost more than building the results.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+class TicketColumns:
+    """
+    Columnar view of a ticket window: one integer code array per categorical
+    field (with its label list), epoch-second timestamps, and the source tickets
+    """
+    def __init__(self, tickets: List[Ticket], timestamps: np.ndarray,
+                 codes: Dict[str, np.ndarray], labels: Dict[str, List[str]]):
+        self.tickets = tickets
+        self.timestamps = timestamps
+        self.codes = codes
+        self.labels = labels
+
+    def __len__(self) -> int:
+        return len(self.tickets)
+
+class PatternEngine:
+    """
+    Finds recurring issues across a whole ticket window at once. Tickets are
+    encoded into NumPy columns, and for every (scope value, issue) group the
+    largest number of tickets inside any sliding window of window_days is
+    computed with one lexsort and a merged searchsorted, with no per-ticket or
+    per-user Python loops; parsing raw API dicts into Tickets is the only
+    per-ticket work. Groups reaching the threshold become patterns in the
+    pattern_type/pattern_value/tickets shape AlertManager renders, and only
+    tickets inside a pattern's window are turned into dicts, once each.
+    See bench_pattern_detection in benchmarks/run.py for throughput.
+    """
+    def __init__(self, threshold: Optional[int] = None, window_days: Optional[float] = None):
+        self.threshold = threshold or settings.ALERT_THRESHOLD
+        self.window_days = window_days or settings.ALERT_TIMEFRAME_DAYS
+
+    def load(self, tickets: Iterable[Union[Ticket, Dict[str, Any]]]) -> TicketColumns:
+        """
+        Encode tickets into columns. Raw API dicts are parsed into Tickets
+        first; their issue keys and timestamps are already computed, and
+        categorical values become dense integer codes.
+        """
+        rows = list(map(Ticket.coerce, tickets))
+        codes, labels = {}, {}
+        for field in CATEGORICAL_FIELDS:
+            codes[field], labels[field] = encode(list(map(attrgetter(field), rows)))
+        timestamps = np.fromiter(map(attrgetter('entered'), rows), dtype=np.int64, count=len(rows))
+        return TicketColumns(rows, timestamps, codes, labels)
+
+    def _windowed_counts(self, keys: np.ndarray, timestamps: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Sort rows by (key, time) and, for each row, count rows with the same
+        key in the window ending at it. Returns (order, counts, window_starts),
+        with counts and window_starts indexed by sorted position.
+        """
+        window = int(self.window_days * 86400)
+        order = np.lexsort((timestamps, keys))
+        keys, timestamps = keys[order], timestamps[order]
+
+        # A two-column searchsorted: merge each row's (key, time - window) into
+        # the sorted rows, queries first on ties; a query's merged position
+        # minus the queries before it is the first row of its window, which
+        # never crosses into another key
+        n = len(order)
+        merged = np.lexsort((np.r_[np.zeros(n, dtype=np.int8), np.ones(n, dtype=np.int8)],
+                             np.r_[timestamps - window, timestamps], np.r_[keys, keys]))
+        starts = np.flatnonzero(merged < n) - np.arange(n)
+        counts = np.arange(n) - starts + 1
+        return order, counts, starts
+
+    def find_patterns(self, tickets, scopes: Iterable[str] = SCOPES) -> List[Dict[str, Any]]:
+        """
+        Recurring issues per scope ('user', 'company', 'board'). Accepts raw
+        tickets or an already loaded TicketColumns.
+        """
+        with _gc_paused():
+            columns = tickets if isinstance(tickets, TicketColumns) else self.load(tickets)
+            if not len(columns):
+                return []
+            windows = [window for scope in scopes for window in self._best_windows(columns, scope)]
+            if not windows:
+                return []
+
+            # Ticket dicts only for rows inside some pattern's window, each built once and shared
+            covered = np.zeros(len(columns), dtype=bool)
+            for _, _, _, _, _, members in windows:
+                covered[members] = True
+            rows = np.flatnonzero(covered).tolist()
+            payloads: List[Optional[Dict[str, Any]]] = [None] * len(columns)
+            for row, ticket in zip(rows, map(columns.tickets.__getitem__, rows)):
+                payloads[row] = ticket.as_dict()
+
+            return [self._pattern(scope, scope_value, issue, first, last,
+                                  list(map(payloads.__getitem__, members.tolist())))
+                    for scope, scope_value, issue, first, last, members in windows]
+
+    def _best_windows(self, columns: TicketColumns, scope: str) -> List[Tuple[str, str, str, int, int, np.ndarray]]:
+        """
+        For every (scope value, issue) group reaching the threshold, its
+        busiest window: (scope, scope value, issue, first and last entered
+        time, member rows)
+        """
+        issue_labels = columns.labels['issue']
+        n_issues = len(issue_labels)
+        keys = columns.codes[scope] * n_issues + columns.codes['issue']
+        order, counts, starts = self._windowed_counts(keys, columns.timestamps)
+
+        # Best window per group: reduce the running counts over each group's sorted run
+        sorted_keys = keys[order]
+        group_starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+        group_max = np.maximum.reduceat(counts, group_starts)
+        flagged = np.flatnonzero(group_max >= self.threshold)
+        if not len(flagged):
+            return []
+
+        # The first row reaching its group's best count ends that group's best window
+        group_of_row = np.repeat(np.arange(len(group_starts)), np.diff(np.r_[group_starts, len(order)]))
+        best_rows = np.flatnonzero(counts == group_max[group_of_row])
+        best_end = best_rows[np.unique(group_of_row[best_rows], return_index=True)[1]][flagged]
+        best_start = starts[best_end]
+        # Rows are sorted by time within a group, so a window's ends are its oldest and newest tickets
+        sorted_times = columns.timestamps[order]
+
+        scope_labels = columns.labels[scope]
+        windows = []
+        for end, start, key, first, last in zip(best_end.tolist(), best_start.tolist(),
+                                                sorted_keys[best_end].tolist(),
+                                                sorted_times[best_start].tolist(), sorted_times[best_end].tolist()):
+            scope_value = scope_labels[key // n_issues]
+            if not scope_value:
+                # Tickets missing this field (e.g. no board) are not a scope of their own
+                continue
+            windows.append((scope, scope_value, issue_labels[key % n_issues], first, last, order[start:end + 1]))
+        return windows
+
+    def _pattern(self, scope: str, scope_value: str, issue: str, first: int, last: int,
+                 tickets: List[Dict[str, Any]]) -> Dict[str, Any]:
+        pattern = {
+            'pattern_type': f"{scope}_recurring_issue",
+            'pattern_value': issue,
+            'scope': scope,
+            'scope_value': scope_value,
+            'ticket_count': len(tickets),
+            'first_occurrence': datetime.fromtimestamp(first).isoformat(),
+            'last_occurrence': datetime.fromtimestamp(last).isoformat(),
+            'tickets': tickets,
+        }
+        if scope == 'user':
+            pattern['user'] = scope_value
+        return pattern
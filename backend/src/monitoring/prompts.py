@@ -0,0 +1,88 @@
+# src/monitoring/prompts.py
+from typing import List, Dict, Iterable
+from ..connectwise.models import Ticket
+
+TICKET_FORMAT = """Each ticket line reads "- #<id> <age> ago: <summary>", ages relative to now. Near-identical tickets are folded into one line: "- <summary> x<count>: #<ids> (<oldest> to <newest> ago)". Long summaries are cut at "...", and when a user has too many tickets for the prompt, the oldest are summarized as "(+N older tickets omitted)"."""
+
+# Sent as plain system prompts, without a prompt-cache breakpoint: tools plus
+# instructions come to about 400 tokens, below the 1024-token minimum the API
+# caches (2048 on Haiku), and padding them past it would cost more than the
+# cache saves. Add cache_control to the system block if they outgrow it.
+USER_INSTRUCTIONS = f"""You review IT support tickets. The user message lists the tickets one user submitted in the past 3 days.
+
+Focus specifically on identifying:
+1. If the user is submitting multiple tickets about the same or similar issues
+2. The specific type of recurring problem (e.g., "Outlook login", "printer connection")
+3. Whether this might indicate a deeper underlying issue the user is facing
+
+{TICKET_FORMAT}
+
+Call report_pattern with your findings, rating significance high/medium/low by frequency and impact."""
+
+BATCH_INSTRUCTIONS = f"""You review IT support tickets. The user message has one section per user, holding the tickets that user submitted in the past 3 days.
+
+For every user, focus specifically on identifying:
+1. If the user is submitting multiple tickets about the same or similar issues
+2. The specific type of recurring problem (e.g., "Outlook login", "printer connection")
+3. Whether this might indicate a deeper underlying issue the user is facing
+
+{TICKET_FORMAT}
+
+Call report_patterns with one result per user section, using the section key (such as "U1") as user_key. Rate significance high/medium/low by frequency and impact."""
+
+# Summaries longer than this are cut; the issue is almost always in the opening words
+MAX_SUMMARY_CHARS = 120
+# Ids listed on a folded line before the rest are only counted
+MAX_GROUP_IDS = 5
+
+def relative_age(seconds: float) -> str:
+    seconds = max(0, int(seconds))
+    if seconds < 3600:
+        return f"{max(1, seconds // 60)}m"
+    if seconds < 86400:
+        return f"{seconds // 3600}h"
+    return f"{seconds // 86400}d"
+
+def _truncate(summary: str) -> str:
+    summary = ' '.join(summary.split())
+    if len(summary) <= MAX_SUMMARY_CHARS:
+        return summary
+    return summary[:MAX_SUMMARY_CHARS - 3].rstrip() + '...'
+
+def compact_tickets(tickets: Iterable[Ticket], now: float, budget_tokens: int,
+                    chars_per_token: int = 4) -> List[str]:
+    """
+    Ticket lines for a prompt within roughly budget_tokens: tickets with the
+    same normalized issue are folded into one line, times are ages relative
+    to now, long summaries are truncated, and the most recent issues are
+    kept when the budget runs out
+    """
+    groups: Dict[str, List[Ticket]] = {}
+    for ticket in tickets:
+        groups.setdefault(ticket.issue, []).append(ticket)
+
+    lines, omitted, used = [], 0, 0
+    budget = budget_tokens * chars_per_token
+    ordered = sorted(groups.values(), key=lambda g: max(t.entered for t in g), reverse=True)
+    for position, group in enumerate(ordered):
+        group.sort(key=lambda t: t.entered)
+        newest = group[-1]
+        if len(group) == 1:
+            line = f"- #{newest.id} {relative_age(now - newest.entered)} ago: {_truncate(newest.summary)}"
+        else:
+            ids = ', '.join(f"#{t.id}" for t in group[:MAX_GROUP_IDS])
+            if len(group) > MAX_GROUP_IDS:
+                ids += f" +{len(group) - MAX_GROUP_IDS} more"
+            line = (f"- {_truncate(newest.summary)} x{len(group)}: {ids} "
+                    f"({relative_age(now - group[0].entered)} to {relative_age(now - newest.entered)} ago)")
+
+        if lines and used + len(line) > budget:
+            # Stop at the first issue that does not fit, so every kept line is newer than every omitted one
+            omitted = sum(len(rest) for rest in ordered[position:])
+            break
+        lines.append(line)
+        used += len(line) + 1
+
+    if omitted:
+        lines.append(f"- (+{omitted} older tickets omitted)")
+    return lines
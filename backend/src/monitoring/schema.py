@@ -0,0 +1,127 @@
+# src/monitoring/schema.py
+import logging
+from typing import List, Dict, Any, Callable, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+SIGNIFICANCE_LEVELS = ('high', 'medium', 'low')
+
+# Keys every analysis carries; user_key is added for batched requests
+PATTERN_PROPERTIES = {
+    'has_pattern': {'type': 'boolean'},
+    'issue_type': {'type': 'string', 'description': 'Main recurring issue, a few words'},
+    'ticket_count': {'type': 'integer', 'description': 'Number of related tickets'},
+    'significance': {'type': 'string', 'enum': list(SIGNIFICANCE_LEVELS)},
+    'user_impact': {'type': 'string', 'description': 'How this affects the user, one short sentence'},
+}
+PATTERN_REQUIRED = ['has_pattern', 'issue_type', 'ticket_count', 'significance', 'user_impact']
+
+PATTERN_TOOL = {
+    'name': 'report_pattern',
+    'description': "Report whether the user's tickets show a recurring issue",
+    'input_schema': {
+        'type': 'object',
+        'properties': PATTERN_PROPERTIES,
+        'required': PATTERN_REQUIRED,
+    },
+}
+
+BATCH_PATTERN_TOOL = {
+    'name': 'report_patterns',
+    'description': 'Report, for every user section, whether its tickets show a recurring issue',
+    'input_schema': {
+        'type': 'object',
+        'properties': {
+            'results': {
+                'type': 'array',
+                'items': {
+                    'type': 'object',
+                    'properties': dict(user_key={'type': 'string'}, **PATTERN_PROPERTIES),
+                    'required': ['user_key'] + PATTERN_REQUIRED,
+                },
+            },
+        },
+        'required': ['results'],
+    },
+}
+
+class PatternAnalysis(NamedTuple):
+    """Claude's verdict on one user's tickets"""
+    has_pattern: bool
+    issue_type: str
+    ticket_count: int
+    significance: str
+    user_impact: str
+
+    @property
+    def is_significant(self) -> bool:
+        return self.has_pattern and self.significance in ('high', 'medium')
+
+class SchemaError(ValueError):
+    pass
+
+_CHECKS = {
+    'boolean': lambda value: isinstance(value, bool),
+    'integer': lambda value: isinstance(value, int) and not isinstance(value, bool),
+    'string': lambda value: isinstance(value, str),
+}
+
+def compile_validator(schema: Dict[str, Any]) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Turn an object schema (the subset the tools above use) into a checking
+    function once, so each response is validated without walking the schema
+    again. The returned function raises SchemaError or returns its input.
+    """
+    required = tuple(schema.get('required', ()))
+    fields = []
+    for name, spec in schema['properties'].items():
+        check = _CHECKS[spec['type']]
+        allowed = frozenset(spec['enum']) if 'enum' in spec else None
+        fields.append((name, check, allowed))
+
+    def validate(value: Dict[str, Any]) -> Dict[str, Any]:
+        if not isinstance(value, dict):
+            raise SchemaError(f"expected an object, got {type(value).__name__}")
+        for name in required:
+            if name not in value:
+                raise SchemaError(f"missing {name}")
+        for name, check, allowed in fields:
+            if name in value and (not check(value[name]) or (allowed is not None and value[name] not in allowed)):
+                raise SchemaError(f"invalid {name}: {value[name]!r}")
+        return value
+
+    return validate
+
+_validate_pattern = compile_validator(PATTERN_TOOL['input_schema'])
+_validate_batch_entry = compile_validator(BATCH_PATTERN_TOOL['input_schema']['properties']['results']['items'])
+
+def parse_pattern(value: Dict[str, Any]) -> PatternAnalysis:
+    """A validated PatternAnalysis from report_pattern tool input"""
+    _validate_pattern(value)
+    return PatternAnalysis(*(value[name] for name in PatternAnalysis._fields))
+
+def parse_batch_patterns(value: Dict[str, Any]) -> Dict[str, PatternAnalysis]:
+    """
+    Validated analyses by user key from report_patterns tool input. Entries
+    that do not match the schema are dropped so one bad entry does not lose
+    the whole batch.
+    """
+    if not isinstance(value, dict) or not isinstance(value.get('results'), list):
+        raise SchemaError('missing results')
+
+    analyses = {}
+    for entry in value['results']:
+        try:
+            _validate_batch_entry(entry)
+        except SchemaError as e:
+            logger.warning(f"Skipping invalid batched analysis: {str(e)}")
+            continue
+        analyses[entry['user_key']] = PatternAnalysis(*(entry[name] for name in PatternAnalysis._fields))
+    return analyses
+
+def tool_input(content: List[Any], tool_name: str) -> Optional[Dict[str, Any]]:
+    """The input of the named tool_use block in a response, if there is one"""
+    for block in content:
+        if getattr(block, 'type', None) == 'tool_use' and block.name == tool_name:
+            return block.input
+    return None
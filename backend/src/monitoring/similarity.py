@@ -0,0 +1,79 @@
+# src/monitoring/similarity.py
+import math
+from collections import Counter
+from typing import List, Dict, Iterable, Optional
+from ..config import settings
+from ..connectwise.models import Ticket, normalize_tokens
+
+class SimilarityPrefilter:
+    """
+    Cheap local check for whether a user's tickets look related. Tickets are
+    compared by TF-IDF cosine over normalized summary tokens (IDF fitted on
+    the whole window), linked when similar enough, and grouped into clusters.
+    Tickets that share both type and board need only half the similarity.
+    A user is worth escalating when their largest cluster reaches min_cluster_size.
+    """
+    def __init__(self, min_cluster_size: Optional[int] = None, min_similarity: Optional[float] = None):
+        self.min_cluster_size = min_cluster_size or settings.PREFILTER_MIN_CLUSTER
+        self.min_similarity = min_similarity if min_similarity is not None else settings.PREFILTER_MIN_SIMILARITY
+        self.idf = {}
+        self.default_idf = 1.0
+
+    def fit(self, tickets: Iterable[Ticket]) -> 'SimilarityPrefilter':
+        """Learn document frequencies from every ticket in the window"""
+        document_frequency = Counter()
+        documents = 0
+        for ticket in tickets:
+            document_frequency.update(set(normalize_tokens(ticket.summary)))
+            documents += 1
+
+        self.idf = {
+            token: math.log((1 + documents) / (1 + count)) + 1
+            for token, count in document_frequency.items()
+        }
+        # Unseen tokens are treated as the rarest possible
+        self.default_idf = math.log(1 + documents) + 1
+        return self
+
+    def _vector(self, summary: str) -> Dict[str, float]:
+        counts = Counter(normalize_tokens(summary))
+        vector = {token: count * self.idf.get(token, self.default_idf) for token, count in counts.items()}
+        norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+        return {token: weight / norm for token, weight in vector.items()} if norm else {}
+
+    def _linked(self, a: Ticket, b: Ticket, similarity: float) -> bool:
+        if similarity >= self.min_similarity:
+            return True
+        same_type = bool(a.type) and a.type == b.type
+        return same_type and a.board == b.board and similarity >= self.min_similarity / 2
+
+    def clusters(self, tickets: List[Ticket]) -> List[List[Ticket]]:
+        """Group one user's tickets into clusters of related tickets, largest first"""
+        vectors = [self._vector(t.summary) for t in tickets]
+        parent = list(range(len(tickets)))
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        # A user's window holds a handful of tickets, so pairwise comparison is cheap here
+        for i in range(len(tickets)):
+            for j in range(i + 1, len(tickets)):
+                if find(i) == find(j):
+                    continue
+                shorter, longer = sorted((vectors[i], vectors[j]), key=len)
+                similarity = sum(weight * longer.get(token, 0.0) for token, weight in shorter.items())
+                if self._linked(tickets[i], tickets[j], similarity):
+                    parent[find(i)] = find(j)
+
+        groups = {}
+        for i, ticket in enumerate(tickets):
+            groups.setdefault(find(i), []).append(ticket)
+        return sorted(groups.values(), key=len, reverse=True)
+
+    def should_escalate(self, tickets: List[Ticket]) -> bool:
+        if len(tickets) < self.min_cluster_size:
+            return False
+        return len(self.clusters(tickets)[0]) >= self.min_cluster_size
@@ -0,0 +1,285 @@
+# src/monitoring/snapshots.py
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import namedtuple
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Callable, Optional, Tuple
+from ..config import settings
+
+# payload is the serialized JSON body, so endpoints can serve it without re-encoding
+Snapshot = namedtuple('Snapshot', ['name', 'version', 'etag', 'created_at', 'payload'])
+# data is serialized JSON, ready to be written to an event stream
+SnapshotEvent = namedtuple('SnapshotEvent', ['id', 'version', 'event', 'data'])
+
+# Given the previous and new payloads by name, returns (event type, data) pairs to record
+Differ = Callable[[Dict[str, Any], Dict[str, Any]], List[Tuple[str, Any]]]
+
+class SnapshotStore:
+    """
+    Versioned pattern snapshots in a SQLite file that every gunicorn worker
+    opens. A producer (the hourly monitor or a refresh request) publishes a
+    set of named payloads under one new version; readers get the latest
+    version of a name from a per-process copy that is only reloaded when the
+    version changes. refresh() coalesces concurrent refreshes into a single
+    computation, within a process via an in-flight event and across
+    processes via a lease row.
+
+    With a differ, every publish also appends change events (computed against
+    the previous version inside the same transaction) that stream readers
+    can follow by event id.
+    """
+    def __init__(self, path: Optional[str] = None, keep_versions: Optional[int] = None,
+                 refresh_timeout: Optional[float] = None, differ: Optional[Differ] = None,
+                 keep_events: Optional[int] = None, refresh_wait: Optional[float] = None):
+        self.path = path or settings.SNAPSHOT_STORE_PATH
+        self.keep_versions = keep_versions or settings.SNAPSHOT_KEEP_VERSIONS
+        self.refresh_timeout = refresh_timeout or settings.SNAPSHOT_REFRESH_TIMEOUT_SECONDS
+        # How long a caller waits on someone else's refresh; kept under the gunicorn worker timeout
+        self.refresh_wait = min(refresh_wait or settings.SNAPSHOT_REFRESH_WAIT_SECONDS, self.refresh_timeout)
+        self.differ = differ
+        self.keep_events = keep_events or settings.SNAPSHOT_KEEP_EVENTS
+        self.owner = uuid.uuid4().hex
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS snapshots (
+                name TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                etag TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                payload TEXT NOT NULL,
+                PRIMARY KEY (name, version)
+            );
+            CREATE TABLE IF NOT EXISTS snapshot_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                version INTEGER NOT NULL,
+                event TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                data TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS refresh_leases (
+                name TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            );
+        """)
+        self._conn.commit()
+
+        self._cached = {}
+        self._inflight_lock = threading.Lock()
+        self._inflight = None
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def publish(self, payloads: Dict[str, Any]) -> int:
+        """
+        Store every named payload under one new version and return it
+        """
+        now = time.time()
+        bodies = {name: json.dumps(payload, separators=(',', ':'), default=str)
+                  for name, payload in payloads.items()}
+
+        with self._lock, self._conn:
+            # Take the write lock before reading MAX(version) so two workers never pick the same one
+            self._conn.execute('BEGIN IMMEDIATE')
+            version = self._conn.execute(
+                "SELECT COALESCE(MAX(version), 0) + 1 FROM snapshots").fetchone()[0]
+            for name, body in bodies.items():
+                etag = hashlib.sha256(body.encode()).hexdigest()[:32]
+                self._conn.execute(
+                    "INSERT INTO snapshots (name, version, etag, created_at, payload) VALUES (?, ?, ?, ?, ?)",
+                    (name, version, etag, now, body))
+            if self.differ is not None:
+                self._record_events(version, now, bodies)
+            self._conn.execute(
+                "DELETE FROM snapshots WHERE version <= ?", (version - self.keep_versions,))
+        return version
+
+    def _record_events(self, version: int, now: float, bodies: Dict[str, str]) -> None:
+        previous = {}
+        for name in bodies:
+            row = self._conn.execute(
+                "SELECT payload FROM snapshots WHERE name = ? AND version < ? ORDER BY version DESC LIMIT 1",
+                (name, version)).fetchone()
+            if row is not None:
+                previous[name] = json.loads(row[0])
+
+        # Compare in serialized form so both sides hold the same JSON types
+        current = {name: json.loads(body) for name, body in bodies.items()}
+        events = self.differ(previous, current)
+        self._conn.executemany(
+            "INSERT INTO snapshot_events (version, event, created_at, data) VALUES (?, ?, ?, ?)",
+            [(version, event, now, json.dumps(data, separators=(',', ':'), default=str))
+             for event, data in events])
+        self._conn.execute(
+            "DELETE FROM snapshot_events WHERE id <= (SELECT MAX(id) FROM snapshot_events) - ?",
+            (self.keep_events,))
+
+    def events_after(self, event_id: int, limit: int = 100) -> List[SnapshotEvent]:
+        """Events recorded after the given event id, oldest first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, version, event, data FROM snapshot_events WHERE id > ? ORDER BY id LIMIT ?",
+                (event_id, limit)).fetchall()
+        return [SnapshotEvent(*row) for row in rows]
+
+    def last_event_id(self) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT MAX(id) FROM snapshot_events").fetchone()
+        return row[0] or 0
+
+    def latest_version(self, name: str) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MAX(version) FROM snapshots WHERE name = ?", (name,)).fetchone()
+        return row[0] or 0
+
+    def latest(self, name: str) -> Optional[Snapshot]:
+        """The newest snapshot for a name, or None before the first publish"""
+        version = self.latest_version(name)
+        if not version:
+            return None
+
+        cached = self._cached.get(name)
+        if cached is not None and cached.version == version:
+            return cached
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT version, etag, created_at, payload FROM snapshots WHERE name = ? AND version = ?",
+                (name, version)).fetchone()
+        if row is None:
+            # Pruned between the two queries by a concurrent publish; the next read picks it up
+            return cached
+        snapshot = Snapshot(name, *row)
+        self._cached[name] = snapshot
+        return snapshot
+
+    def _acquire_lease(self, name: str) -> bool:
+        now = time.time()
+        with self._lock, self._conn:
+            cursor = self._conn.execute("""
+                INSERT INTO refresh_leases (name, owner, expires_at) VALUES (?, ?, ?)
+                ON CONFLICT (name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at
+                WHERE refresh_leases.expires_at < ?
+            """, (name, self.owner, now + self.refresh_timeout, now))
+        return cursor.rowcount > 0
+
+    def _release_lease(self, name: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM refresh_leases WHERE name = ? AND owner = ?", (name, self.owner))
+
+    def refresh(self, compute: Callable[[], Dict[str, Any]], lease: str = 'refresh') -> int:
+        """
+        Recompute and publish snapshots unless a refresh is already running,
+        in which case wait up to refresh_wait for that one. Returns the newest
+        version afterwards, which may predate the refresh if the wait ran out.
+        """
+        with self._inflight_lock:
+            leader = self._inflight is None
+            if leader:
+                self._inflight = threading.Event()
+            done = self._inflight
+
+        if not leader:
+            done.wait(self.refresh_wait)
+            return self._newest_version()
+
+        try:
+            start_version = self._newest_version()
+            if self._acquire_lease(lease):
+                try:
+                    return self.publish(compute())
+                finally:
+                    self._release_lease(lease)
+
+            # Another worker holds the lease: wait for it to publish
+            deadline = time.monotonic() + self.refresh_wait
+            while time.monotonic() < deadline:
+                version = self._newest_version()
+                if version > start_version:
+                    return version
+                time.sleep(0.25)
+            return self._newest_version()
+        finally:
+            with self._inflight_lock:
+                self._inflight = None
+            done.set()
+
+    def _newest_version(self) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT MAX(version) FROM snapshots").fetchone()
+        return row[0] or 0
+
+def _pattern_key(pattern: Dict[str, Any]) -> str:
+    details = pattern.get('pattern_details')
+    issue = details.get('issue_type', '') if isinstance(details, dict) else ''
+    return f"{pattern.get('user')}|{issue}"
+
+def diff_pattern_snapshots(previous: Dict[str, Any], current: Dict[str, Any]) -> List[Tuple[str, Any]]:
+    """
+    Differ for the pattern payloads: pattern_new / pattern_changed /
+    pattern_resolved per pattern, and ticket_count when the live count moves.
+    Unchanged patterns produce no events.
+    """
+    events = []
+    live = current.get('patterns_live')
+    if live is None:
+        return events
+
+    before = {_pattern_key(p): p for p in previous.get('patterns_live', {}).get('patterns', [])}
+    after = {_pattern_key(p): p for p in live.get('patterns', [])}
+
+    for key, pattern in after.items():
+        old = before.get(key)
+        if old is None:
+            events.append(('pattern_new', pattern))
+        elif (old.get('ticket_count'), old.get('pattern_details')) != (pattern.get('ticket_count'), pattern.get('pattern_details')):
+            events.append(('pattern_changed', pattern))
+    for key, pattern in before.items():
+        if key not in after:
+            events.append(('pattern_resolved', {'user': pattern.get('user'), 'key': key}))
+
+    ticket_count = live.get('ticket_count')
+    if ticket_count != previous.get('patterns_live', {}).get('ticket_count'):
+        events.append(('ticket_count', {'ticket_count': ticket_count, 'timestamp': live.get('timestamp')}))
+    return events
+
+def compute_pattern_snapshots(analyzer, ticket_store, mode: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Run the pattern analysis once and build the payloads served by
+    /api/patterns/user, /api/patterns/live and /api/patterns/outbreaks
+    """
+    patterns = analyzer.analyze_tickets(mode=mode)
+    end_date = datetime.now()
+    start_date = end_date - timedelta(hours=1)
+    timestamp = end_date.isoformat()
+
+    return {
+        'patterns_user': {
+            'timestamp': timestamp,
+            'patterns': patterns
+        },
+        'patterns_live': {
+            'timestamp': timestamp,
+            'ticket_count': ticket_store.count_tickets(start_date, end_date),
+            'patterns': patterns
+        },
+        'patterns_outbreak': {
+            'timestamp': timestamp,
+            'patterns': analyzer.outbreak_patterns()
+        }
+    }
@@ -0,0 +1,136 @@
+# src/monitoring/suppression.py
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+from ..config import settings
+from ..connectwise.models import normalize_tokens
+
+# Outcomes of AlertStateIndex.check()
+SEND = 'send'
+FOLLOW_UP = 'follow_up'
+SUPPRESS = 'suppress'
+
+def ticket_fingerprint(ticket_ids: Iterable) -> str:
+    """Order-independent fingerprint of the tickets behind an alert"""
+    material = ','.join(sorted(str(ticket_id) for ticket_id in ticket_ids))
+    return hashlib.sha256(material.encode()).hexdigest()[:32]
+
+def issue_key(issue_type: str) -> str:
+    """Normalize an issue label so 'Outlook login' and 'outlook Login!' share state"""
+    return ' '.join(normalize_tokens(issue_type or '')) or (issue_type or '').strip().lower()
+
+class AlertStateIndex:
+    """
+    Remembers the last alert sent for every (user, issue type) so an ongoing
+    pattern that is re-detected every hour is only emailed once per
+    cooldown. Within the cooldown a follow-up goes out only when the ticket
+    count has grown since the last alert. State lives in a SQLite file and is
+    mirrored in a dict, so repeat detections are suppressed with one lookup;
+    before sending, the row is re-read so alerts other processes sharing the
+    file have recorded are seen. check() only decides; the caller records an
+    alert with record() once it has been sent or queued, so a failed delivery
+    is retried on the next detection instead of being suppressed.
+    """
+    def __init__(self, path: Optional[str] = None, cooldown_seconds: Optional[float] = None):
+        self.path = path or settings.ALERT_STATE_PATH
+        self.cooldown_seconds = cooldown_seconds if cooldown_seconds is not None else settings.ALERT_COOLDOWN_SECONDS
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS alert_state (
+                user TEXT NOT NULL,
+                issue TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                ticket_count INTEGER NOT NULL,
+                first_sent REAL NOT NULL,
+                last_sent REAL NOT NULL,
+                PRIMARY KEY (user, issue)
+            );
+        """)
+        self._conn.commit()
+
+        # (user, issue) -> (fingerprint, ticket_count, last_sent)
+        self._state: Dict[Tuple[str, str], Tuple[str, int, float]] = {}
+        cutoff = time.time() - self.cooldown_seconds
+        for user, issue, fingerprint, count, last_sent in self._conn.execute(
+                "SELECT user, issue, fingerprint, ticket_count, last_sent FROM alert_state WHERE last_sent >= ?",
+                (cutoff,)):
+            self._state[(user, issue)] = (fingerprint, count, last_sent)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def _decide(self, state: Optional[Tuple[str, int, float]], fingerprint: str,
+                ticket_count: int, now: float) -> str:
+        if state is None or now - state[2] >= self.cooldown_seconds:
+            return SEND
+        if fingerprint != state[0] and ticket_count > state[1]:
+            return FOLLOW_UP
+        return SUPPRESS
+
+    def check(self, user: str, issue_type: str, ticket_ids: Iterable,
+              ticket_count: Optional[int] = None) -> str:
+        """
+        Decide whether an alert for this pattern should go out, without
+        recording it. Returns SEND, FOLLOW_UP or SUPPRESS.
+        """
+        ticket_ids = list(ticket_ids)
+        key = (user, issue_key(issue_type))
+        fingerprint = ticket_fingerprint(ticket_ids)
+        count = ticket_count if ticket_count is not None else len(ticket_ids)
+        now = time.time()
+
+        with self._lock:
+            if self._decide(self._state.get(key), fingerprint, count, now) == SUPPRESS:
+                return SUPPRESS
+
+            # Another process may have alerted since this one loaded its state
+            row = self._conn.execute(
+                "SELECT fingerprint, ticket_count, last_sent FROM alert_state WHERE user = ? AND issue = ?",
+                key).fetchone()
+            if row is not None:
+                self._state[key] = tuple(row)
+            return self._decide(tuple(row) if row else None, fingerprint, count, now)
+
+    def record(self, user: str, issue_type: str, ticket_ids: Iterable,
+               ticket_count: Optional[int] = None, decision: str = SEND) -> None:
+        """
+        Record an alert as sent, after it was delivered or queued. decision
+        is what check() returned; a FOLLOW_UP keeps the first alert's time.
+        """
+        ticket_ids = list(ticket_ids)
+        key = (user, issue_key(issue_type))
+        fingerprint = ticket_fingerprint(ticket_ids)
+        count = ticket_count if ticket_count is not None else len(ticket_ids)
+        now = time.time()
+
+        with self._lock:
+            with self._conn:
+                self._conn.execute("""
+                    INSERT INTO alert_state (user, issue, fingerprint, ticket_count, first_sent, last_sent)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (user, issue) DO UPDATE SET fingerprint = excluded.fingerprint,
+                        ticket_count = excluded.ticket_count, last_sent = excluded.last_sent,
+                        first_sent = CASE WHEN ? = 'send' THEN excluded.first_sent ELSE alert_state.first_sent END
+                """, (*key, fingerprint, count, now, now, decision))
+            self._state[key] = (fingerprint, count, now)
+
+    def prune(self) -> int:
+        """Forget alerts whose cooldown has passed"""
+        cutoff = time.time() - self.cooldown_seconds
+        with self._lock, self._conn:
+            cursor = self._conn.execute("DELETE FROM alert_state WHERE last_sent < ?", (cutoff,))
+            self._state = {key: state for key, state in self._state.items() if state[2] >= cutoff}
+        return cursor.rowcount
+
+    def __len__(self) -> int:
+        return len(self._state)
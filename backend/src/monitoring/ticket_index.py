@@ -0,0 +1,180 @@
+# src/monitoring/ticket_index.py
+import heapq
+import time
+from bisect import bisect_left, bisect_right
+from typing import List, Dict, Iterable, Optional, Set, Tuple
+from ..config import settings
+from ..connectwise.models import Ticket
+
+def default_windows() -> Tuple[int, ...]:
+    """Window sizes in seconds the index keeps live counts for"""
+    return tuple(sorted({3600, 86400, 3 * 86400, int(settings.ALERT_TIMEFRAME_DAYS * 86400)}))
+
+class _WindowCounts:
+    """
+    Per-user ticket counts over the trailing `seconds`, kept current by
+    expiring entries from a min-heap as time advances, with users bucketed by
+    count so threshold queries never scan every user
+    """
+    def __init__(self, seconds: int):
+        self.seconds = seconds
+        self.heap: List[Tuple[int, int, str, int]] = []
+        self.counts: Dict[str, int] = {}
+        self.by_count: Dict[int, Set[str]] = {}
+
+    def _move(self, user: str, delta: int) -> None:
+        old = self.counts.get(user, 0)
+        new = old + delta
+        if old:
+            bucket = self.by_count[old]
+            bucket.discard(user)
+            if not bucket:
+                del self.by_count[old]
+        if new:
+            self.counts[user] = new
+            self.by_count.setdefault(new, set()).add(user)
+        else:
+            self.counts.pop(user, None)
+
+    def users_with_at_least(self, n: int) -> Set[str]:
+        users = set()
+        for count, bucket in self.by_count.items():
+            if count >= n:
+                users |= bucket
+        return users
+
+class TicketIndex:
+    """
+    In-memory index of tickets by user. Each user has parallel arrays of
+    entry timestamps and ticket ids sorted by time, so any window is two
+    bisects away, and for every configured window size a maintained count
+    per user answers "users with at least N tickets in the last T" without
+    touching users below the threshold. Tickets are added incrementally;
+    re-adding a known ticket only replaces the stored object.
+    """
+    def __init__(self, windows: Optional[Iterable[int]] = None):
+        self._times: Dict[str, List[int]] = {}
+        self._ids: Dict[str, List[int]] = {}
+        self._tickets: Dict[int, Ticket] = {}
+        # ticket id -> (user, entered, generation); the generation lets stale heap entries be skipped
+        self._entries: Dict[int, Tuple[str, int, int]] = {}
+        self._generation = 0
+        self._windows = {seconds: _WindowCounts(seconds) for seconds in (windows or default_windows())}
+        self._now = 0
+
+    def __len__(self) -> int:
+        return len(self._tickets)
+
+    @property
+    def windows(self) -> Tuple[int, ...]:
+        return tuple(sorted(self._windows))
+
+    def add(self, ticket: Ticket) -> None:
+        entry = self._entries.get(ticket.id)
+        self._tickets[ticket.id] = ticket
+        if entry is not None:
+            if entry[:2] == (ticket.user, ticket.entered):
+                return
+            self._remove_entry(ticket.id, entry)
+
+        times = self._times.setdefault(ticket.user, [])
+        ids = self._ids.setdefault(ticket.user, [])
+        if not times or ticket.entered >= times[-1]:
+            # Tickets mostly arrive in time order, so this is the common case
+            times.append(ticket.entered)
+            ids.append(ticket.id)
+        else:
+            position = bisect_right(times, ticket.entered)
+            times.insert(position, ticket.entered)
+            ids.insert(position, ticket.id)
+
+        self._generation += 1
+        self._entries[ticket.id] = (ticket.user, ticket.entered, self._generation)
+        for window in self._windows.values():
+            if ticket.entered >= self._now - window.seconds:
+                heapq.heappush(window.heap, (ticket.entered, ticket.id, ticket.user, self._generation))
+                window._move(ticket.user, 1)
+
+    def add_many(self, tickets: Iterable[Ticket]) -> None:
+        for ticket in tickets:
+            self.add(ticket)
+
+    def _remove_entry(self, ticket_id: int, entry: Tuple[str, int, int]) -> None:
+        user, entered, _ = entry
+        times, ids = self._times[user], self._ids[user]
+        lo, hi = bisect_left(times, entered), bisect_right(times, entered)
+        position = lo + ids[lo:hi].index(ticket_id)
+        del times[position]
+        del ids[position]
+        if not times:
+            del self._times[user], self._ids[user]
+        del self._entries[ticket_id]
+        for window in self._windows.values():
+            if entered >= self._now - window.seconds:
+                window._move(user, -1)
+
+    def advance(self, now: Optional[float] = None) -> None:
+        """Move the live window counts forward to now, expiring old tickets"""
+        now = int(now if now is not None else time.time())
+        if now <= self._now:
+            return
+        self._now = now
+        for window in self._windows.values():
+            cutoff = now - window.seconds
+            heap = window.heap
+            while heap and heap[0][0] < cutoff:
+                _, ticket_id, user, generation = heapq.heappop(heap)
+                entry = self._entries.get(ticket_id)
+                if entry is not None and entry[2] == generation:
+                    window._move(user, -1)
+
+    def tickets(self, user: str, start: float, end: float) -> List[Ticket]:
+        """A user's tickets entered in [start, end], oldest first"""
+        times = self._times.get(user)
+        if not times:
+            return []
+        lo, hi = bisect_left(times, start), bisect_right(times, end)
+        return [self._tickets[ticket_id] for ticket_id in self._ids[user][lo:hi]]
+
+    def count(self, user: str, seconds: int, now: Optional[float] = None) -> int:
+        """Tickets a user entered in the trailing window of `seconds`"""
+        window = self._windows.get(seconds)
+        if window is not None:
+            self.advance(now)
+            return window.counts.get(user, 0)
+        now = now if now is not None else time.time()
+        times = self._times.get(user, [])
+        return bisect_right(times, now) - bisect_left(times, now - seconds)
+
+    def users_with_at_least(self, n: int, seconds: int, now: Optional[float] = None) -> Set[str]:
+        """
+        Users with at least n tickets in the trailing window of `seconds`.
+        Configured windows use the maintained counts; any other size falls
+        back to two bisects per user.
+        """
+        window = self._windows.get(seconds)
+        if window is not None:
+            self.advance(now)
+            return window.users_with_at_least(n)
+        return {user for user in self._times if self.count(user, seconds, now) >= n}
+
+    def prune(self, before: float) -> int:
+        """Drop tickets entered before a cutoff; returns how many were dropped"""
+        dropped = 0
+        for user in list(self._times):
+            times = self._times[user]
+            cut = bisect_left(times, before)
+            if not cut:
+                continue
+            for entered, ticket_id in zip(times[:cut], self._ids[user][:cut]):
+                del self._tickets[ticket_id]
+                del self._entries[ticket_id]
+                for window in self._windows.values():
+                    if entered >= self._now - window.seconds:
+                        window._move(user, -1)
+            del times[:cut]
+            del self._ids[user][:cut]
+            if not times:
+                del self._times[user], self._ids[user]
+            dropped += cut
+        return dropped
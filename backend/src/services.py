@@ -0,0 +1,114 @@
+# src/services.py
+"""
+Process-wide shared service objects for the API and monitor entry points.
+
+Nothing is built at import: each getter constructs its object on first call,
+importing the module behind it only then, and every later call in the
+process returns the same instance. Importing an entry point therefore only
+pays for Flask and settings, a missing API key surfaces on the first request
+that needs Claude instead of crashing the import, and gunicorn's
+preload_app can import the app in the master without opening SQLite files,
+sockets or threads that would be unsafe to share with forked workers.
+A forked child drops any instances inherited from its parent.
+"""
+import os
+import threading
+from typing import Any, Callable, Dict
+from .config import settings
+
+_instances: Dict[str, Any] = {}
+# Reentrant because factories call other getters (the analyzer needs the client and store)
+_lock = threading.RLock()
+
+def _shared(name: str, factory: Callable[[], Any]) -> Any:
+    instance = _instances.get(name)
+    if instance is None:
+        with _lock:
+            instance = _instances.get(name)
+            if instance is None:
+                instance = _instances[name] = factory()
+    return instance
+
+def _require_api_key() -> str:
+    if not settings.ANTHROPIC_API_KEY:
+        raise ValueError("ANTHROPIC_API_KEY not found in environment variables")
+    return settings.ANTHROPIC_API_KEY
+
+def anthropic_client():
+    """Anthropic SDK client; the SDK is imported on first call"""
+    def build():
+        api_key = _require_api_key()
+        from anthropic import Anthropic
+        return Anthropic(api_key=api_key)
+    return _shared('anthropic', build)
+
+def new_async_anthropic_client():
+    """
+    A fresh AsyncAnthropic client for one event loop. Not shared: its
+    connections belong to the loop that opened them. SDK retries are off
+    because the caller retries under its own rate limiter.
+    """
+    api_key = _require_api_key()
+    from anthropic import AsyncAnthropic
+    return AsyncAnthropic(api_key=api_key, max_retries=0)
+
+def connectwise_client():
+    from .connectwise.client import ConnectWiseClient
+    return _shared('connectwise', ConnectWiseClient)
+
+def ticket_archive():
+    """Columnar ticket history, or None when TICKET_ARCHIVE_DIR is unset; pyarrow loads on first call"""
+    if not settings.TICKET_ARCHIVE_DIR:
+        return None
+    from .connectwise.archive import TicketArchive
+    return _shared('ticket_archive', TicketArchive)
+
+def ticket_store():
+    def build():
+        from .connectwise.store import TicketStore
+        return TicketStore(archive=ticket_archive())
+    return _shared('ticket_store', build)
+
+def snapshot_store():
+    from .monitoring.snapshots import SnapshotStore, diff_pattern_snapshots
+    return _shared('snapshot_store', lambda: SnapshotStore(differ=diff_pattern_snapshots))
+
+def alert_dispatcher():
+    """Outbox dispatcher, with its background delivery worker running"""
+    def build():
+        from .monitoring.dispatch import AlertDispatcher
+        dispatcher = AlertDispatcher()
+        dispatcher.start()
+        return dispatcher
+    return _shared('alert_dispatcher', build)
+
+def ticket_analyzer():
+    def build():
+        from .monitoring.analyzer import TicketAnalyzer
+        return TicketAnalyzer(connectwise_client(), ticket_store(), alert_dispatcher(), archive=ticket_archive())
+    return _shared('ticket_analyzer', build)
+
+def alert_manager():
+    def build():
+        from .monitoring.alerts import AlertManager
+        return AlertManager(alert_dispatcher())
+    return _shared('alert_manager', build)
+
+def reset() -> None:
+    """Stop and drop every instance built so far, e.g. between tests or at shutdown"""
+    with _lock:
+        dispatcher = _instances.get('alert_dispatcher')
+        if dispatcher is not None:
+            dispatcher.stop()
+        for name in ('connectwise', 'ticket_store', 'snapshot_store', 'ticket_archive'):
+            if name in _instances:
+                _instances[name].close()
+        _instances.clear()
+
+def _after_fork_in_child() -> None:
+    global _lock
+    # The parent's threads and connections did not survive the fork
+    _instances.clear()
+    _lock = threading.RLock()
+
+os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -0,0 +1,82 @@
+# src/utils/logger.py
+import contextvars
+import functools
+import json
+import logging
+import sys
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Callable, Iterator, Optional
+from ..config import settings
+
+_run_id: contextvars.ContextVar = contextvars.ContextVar('run_id', default=None)
+
+# Attributes every LogRecord has; anything else on a record came from `extra`
+_RECORD_FIELDS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime', 'run_id'}
+
+def new_run_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+def current_run_id() -> Optional[str]:
+    return _run_id.get()
+
+@contextmanager
+def run_context(run_id: Optional[str] = None) -> Iterator[str]:
+    """
+    Tag every log line written inside the block (in this thread or task)
+    with one run id. Pool workers need contextvars.copy_context() to see it.
+    """
+    token = _run_id.set(run_id or new_run_id())
+    try:
+        yield _run_id.get()
+    finally:
+        _run_id.reset(token)
+
+def with_run_id(func: Callable) -> Callable:
+    """Run each call of func in a fresh run context"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with run_context():
+            return func(*args, **kwargs)
+    return wrapper
+
+class RunIdFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.run_id = _run_id.get()
+        return True
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with the run id and any `extra` fields"""
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'run_id': getattr(record, 'run_id', None),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+def configure_logging(level: Optional[str] = None, fmt: Optional[str] = None) -> None:
+    """
+    Route the root logger to stderr as JSON lines (LOG_FORMAT=json) or the
+    classic text format, with the current run id on every record
+    """
+    handler = logging.StreamHandler(sys.stderr)
+    handler.addFilter(RunIdFilter())
+    if (fmt or settings.LOG_FORMAT) == 'json':
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - [%(run_id)s] %(message)s'))
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level or settings.LOG_LEVEL)
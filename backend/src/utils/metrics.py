@@ -0,0 +1,254 @@
+# src/utils/metrics.py
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, Dict, Any, Iterator, Optional, Sequence, Tuple
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+# Seconds; sized for API calls and SMTP sends rather than in-process work
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+stage_logger = logging.getLogger('pipeline')
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, registry: 'MetricsRegistry', name: str, help: str, labels: Sequence[str]):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labels):
+            raise ValueError(f"{self.name} takes labels {self.labels}, got {tuple(labels)}")
+        return tuple(str(labels[label]) for label in self.labels)
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self.registry._lock:
+            self.registry._touch()
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+    def get(self, **labels: Any) -> float:
+        return self.values.get(self._key(labels), 0.0)
+
+class Histogram(Counter):
+    """
+    Observations counted into fixed upper-bound buckets. Each label set
+    stores [sum, count, per-bucket counts..., overflow]; buckets are made
+    cumulative only when rendered.
+    """
+    kind = 'histogram'
+
+    def __init__(self, registry: 'MetricsRegistry', name: str, help: str, labels: Sequence[str],
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(registry, name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        slot = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+        with self.registry._lock:
+            self.registry._touch()
+            row = self.values.get(key)
+            if row is None:
+                row = self.values[key] = [0.0, 0] + [0] * (len(self.buckets) + 1)
+            row[0] += value
+            row[1] += 1
+            row[2 + slot] += 1
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def get(self, **labels: Any) -> Optional[List[float]]:
+        return self.values.get(self._key(labels))
+
+class MetricsRegistry:
+    """
+    Counters and histograms in the Prometheus data model, without a client
+    library. Samples live in process memory. With a metrics directory set,
+    a background thread also writes them to metrics-<pid>.json every
+    flush_seconds, and collect() sums every process's file, so /metrics
+    served by any gunicorn worker reports the whole server. Worker files
+    outlive their worker, which keeps counters monotonic across restarts;
+    clear_directory() at server start resets them.
+    """
+    def __init__(self, directory: Optional[str] = None, flush_seconds: Optional[float] = None):
+        self.directory = settings.METRICS_DIR if directory is None else directory
+        self.flush_seconds = flush_seconds if flush_seconds is not None else settings.METRICS_FLUSH_SECONDS
+        self._metrics: Dict[str, Counter] = {}
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._flusher = None
+
+    def _register(self, cls, name: str, help: str, labels: Sequence[str], **kwargs) -> Counter:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(self, name, help, labels, **kwargs)
+            elif type(metric) is not cls or metric.labels != tuple(labels):
+                raise ValueError(f"Metric {name} is already registered with a different type or labels")
+            return metric
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter, name, help, labels)
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, help, labels, buckets=buckets)
+
+    def _touch(self) -> None:
+        """Called under the lock before every update or read"""
+        pid = os.getpid()
+        if pid != self._pid:
+            # A forked worker starts from zero; the parent's samples are its own
+            for metric in self._metrics.values():
+                metric.values.clear()
+            self._pid = pid
+            self._flusher = None
+        if self.directory and self._flusher is None:
+            self._flusher = threading.Thread(target=self._run_flusher, name='metrics-flush', daemon=True)
+            self._flusher.start()
+
+    def _run_flusher(self) -> None:
+        pid = os.getpid()
+        while self._pid == pid:
+            time.sleep(self.flush_seconds)
+            try:
+                self.flush()
+            except OSError as e:
+                logger.warning(f"Could not write metrics: {str(e)}")
+
+    def reset(self) -> None:
+        with self._lock:
+            for metric in self._metrics.values():
+                metric.values.clear()
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """This process's samples as JSON-ready data"""
+        with self._lock:
+            self._touch()
+            return {
+                metric.name: {
+                    'kind': metric.kind,
+                    'help': metric.help,
+                    'labels': list(metric.labels),
+                    'buckets': list(getattr(metric, 'buckets', ())),
+                    'samples': [[list(key), list(value) if isinstance(value, list) else value]
+                                for key, value in metric.values.items()],
+                }
+                for metric in self._metrics.values()
+            }
+
+    def _path(self, pid: int) -> str:
+        return os.path.join(self.directory, f"metrics-{pid}.json")
+
+    def flush(self) -> None:
+        """Write this process's samples to its file in the metrics directory"""
+        if not self.directory:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(os.getpid())
+        temp = f"{path}.tmp"
+        with open(temp, 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(temp, path)
+
+    def clear_directory(self) -> None:
+        if self.directory:
+            for path in glob.glob(os.path.join(self.directory, 'metrics-*.json')):
+                os.remove(path)
+
+    def collect(self) -> Dict[str, Dict[str, Any]]:
+        """Samples summed across every process sharing the metrics directory"""
+        if not self.directory:
+            return self.snapshot()
+
+        self.flush()
+        merged: Dict[str, Dict[str, Any]] = {}
+        for path in sorted(glob.glob(os.path.join(self.directory, 'metrics-*.json'))):
+            try:
+                with open(path) as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                # A worker is mid-write or the file vanished; its samples show up next scrape
+                continue
+            for name, metric in data.items():
+                target = merged.setdefault(name, dict(metric, samples={}))
+                for key, value in metric['samples']:
+                    key = tuple(key)
+                    current = target['samples'].get(key)
+                    if current is None:
+                        target['samples'][key] = value
+                    elif isinstance(value, list):
+                        target['samples'][key] = [a + b for a, b in zip(current, value)]
+                    else:
+                        target['samples'][key] = current + value
+        for metric in merged.values():
+            metric['samples'] = [[list(key), value] for key, value in metric['samples'].items()]
+        return merged
+
+    def render(self) -> str:
+        """Every metric in the Prometheus text exposition format"""
+        lines = []
+        for name, metric in sorted(self.collect().items()):
+            lines.append(f"# HELP {name} {metric['help']}")
+            lines.append(f"# TYPE {name} {metric['kind']}")
+            for key, value in sorted(metric['samples']):
+                labels = list(zip(metric['labels'], key))
+                if metric['kind'] == 'counter':
+                    lines.append(f"{name}{_labels(labels)} {_number(value)}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(list(metric['buckets']) + ['+Inf'], value[2:]):
+                    cumulative += count
+                    le = bound if bound == '+Inf' else repr(float(bound))
+                    lines.append(f"{name}_bucket{_labels(labels + [('le', le)])} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {_number(value[0])}")
+                lines.append(f"{name}_count{_labels(labels)} {value[1]}")
+        return '\n'.join(lines) + '\n'
+
+def _escape(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(pairs: List[Tuple[str, Any]]) -> str:
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+# Process-wide registry the instrumented modules register their metrics on
+REGISTRY = MetricsRegistry()
+counter = REGISTRY.counter
+histogram = REGISTRY.histogram
+render = REGISTRY.render
+
+STAGE_SECONDS = histogram('pipeline_stage_seconds', 'Wall time of each analysis pipeline stage', ('stage',))
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time a pipeline stage into pipeline_stage_seconds and log its duration"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.observe(elapsed, stage=name)
+        stage_logger.info(f"Stage {name} took {elapsed:.3f}s",
+                          extra={'stage': name, 'duration_ms': round(elapsed * 1000, 1)})
@@ -0,0 +1,82 @@
+# src/utils/ratelimit.py
+import asyncio
+import time
+from typing import Optional
+
+class AsyncRateLimiter:
+    """
+    Token bucket for asyncio code: refills at `rate` tokens per second up to
+    `capacity`, and acquire() waits until enough tokens are available
+    """
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self, amount: float = 1.0) -> None:
+        # Requests larger than the bucket would never fit; clamp them to a full bucket
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                paused = self.paused_until - time.monotonic()
+                if paused > 0:
+                    await asyncio.sleep(paused)
+                    continue
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+    def adjust(self, amount: float) -> None:
+        """
+        Correct an earlier acquire once the real cost is known: a positive
+        amount returns unused tokens, a negative one charges extra (the
+        bucket may go into debt and refills from there)
+        """
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+    def pause(self, seconds: float) -> None:
+        """Hold every acquire for `seconds`, e.g. after a 429 with Retry-After"""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+class AsyncApiRateLimiter:
+    """
+    Limits for an API priced in requests and tokens per minute (such as the
+    Anthropic API): one bucket each for requests, input tokens and output
+    tokens, each refilling its per-minute allowance continuously. acquire()
+    reserves one request plus the estimated input tokens and the output
+    token ceiling; settle() corrects the reservation from the response's
+    reported usage.
+    """
+    def __init__(self, requests_per_minute: float, input_tokens_per_minute: float,
+                 output_tokens_per_minute: float):
+        self.requests = AsyncRateLimiter(requests_per_minute / 60, requests_per_minute)
+        self.input_tokens = AsyncRateLimiter(input_tokens_per_minute / 60, input_tokens_per_minute)
+        self.output_tokens = AsyncRateLimiter(output_tokens_per_minute / 60, output_tokens_per_minute)
+
+    async def acquire(self, input_tokens: float, output_tokens: float) -> None:
+        await self.requests.acquire()
+        await self.input_tokens.acquire(input_tokens)
+        await self.output_tokens.acquire(output_tokens)
+
+    def settle(self, input_estimate: float, output_reserved: float, usage) -> None:
+        if usage is None:
+            return
+        self.input_tokens.adjust(input_estimate - (getattr(usage, 'input_tokens', 0) or 0))
+        self.output_tokens.adjust(output_reserved - (getattr(usage, 'output_tokens', 0) or 0))
+
+    def pause(self, seconds: float) -> None:
+        for bucket in (self.requests, self.input_tokens, self.output_tokens):
+            bucket.pause(seconds)
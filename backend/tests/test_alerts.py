@@ -0,0 +1,158 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+from src.monitoring.alerts import AlertManager
+from src.monitoring.dispatch import AlertDispatcher
+from src.monitoring.suppression import AlertStateIndex
+
+
+class TestAlertDispatcher(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.path = os.path.join(self.tmpdir.name, 'outbox.db')
+        self.smtp_class = patch('src.monitoring.dispatch.smtplib.SMTP').start()
+        self.smtp = self.smtp_class.return_value
+        self.smtp.noop.return_value = (250, b'OK')
+        self.addCleanup(patch.stopall)
+        self.dispatcher = self.make_dispatcher()
+
+    def make_dispatcher(self):
+        return AlertDispatcher(self.path, smtp_server='localhost', smtp_port=1025, username='bot',
+                               password='secret', sender='bot@example.com', use_tls=True, flush_seconds=0.05)
+
+    def test_one_connection_and_one_digest_per_recipient(self):
+        self.dispatcher.enqueue('ops@example.com', 'Pattern A', 'body A')
+        self.dispatcher.enqueue('ops@example.com', 'Pattern B', 'body B')
+        self.dispatcher.enqueue('lead@example.com', 'Pattern C', 'body C')
+
+        self.assertEqual(self.dispatcher.flush(), 3)
+
+        self.smtp_class.assert_called_once()
+        self.smtp.starttls.assert_called_once()
+        self.smtp.login.assert_called_once_with('bot', 'secret')
+        messages = [call.args[0] for call in self.smtp.send_message.call_args_list]
+        self.assertEqual(len(messages), 2)
+        self.assertEqual(messages[0]['Subject'], '2 ConnectWise alerts')
+        self.assertIn('body B', messages[0].get_payload())
+        self.assertEqual(messages[1]['Subject'], 'Pattern C')
+        self.assertEqual(self.dispatcher.pending(), [])
+
+    def test_connection_is_reused_across_flushes(self):
+        self.dispatcher.enqueue('ops@example.com', 'A', 'a')
+        self.dispatcher.flush()
+        self.dispatcher.enqueue('ops@example.com', 'B', 'b')
+        self.dispatcher.flush()
+
+        self.smtp_class.assert_called_once()
+        self.assertEqual(self.smtp.send_message.call_count, 2)
+
+    def test_failures_are_retried_and_persist_across_restarts(self):
+        self.smtp.send_message.side_effect = OSError('connection reset')
+        self.dispatcher.enqueue('ops@example.com', 'A', 'a')
+
+        self.assertEqual(self.dispatcher.flush(), 0)
+
+        restarted = self.make_dispatcher()
+        pending = restarted.pending()
+        self.assertEqual(len(pending), 1)
+        self.assertEqual(pending[0]['attempts'], 1)
+        # Backed off, so not due yet
+        self.assertEqual(restarted.flush(), 0)
+
+    def test_gives_up_after_max_attempts(self):
+        self.smtp.send_message.side_effect = OSError('mailbox unavailable')
+        self.dispatcher.max_attempts = 1
+        self.dispatcher.enqueue('ops@example.com', 'A', 'a')
+
+        self.dispatcher.flush()
+
+        self.assertEqual(self.dispatcher.pending(), [])
+
+    def test_processes_sharing_an_outbox_send_each_alert_once(self):
+        other = self.make_dispatcher()
+        self.dispatcher.enqueue('ops@example.com', 'A', 'a')
+
+        # The other process claims the row, then stalls mid-send
+        claimed = other._claim()
+
+        self.assertEqual(len(claimed), 1)
+        self.assertEqual(self.dispatcher.flush(), 0)
+        self.smtp.send_message.assert_not_called()
+
+    def test_expired_claims_are_taken_over(self):
+        crashed = self.make_dispatcher()
+        self.dispatcher.enqueue('ops@example.com', 'A', 'a')
+        crashed._claim()
+        self.dispatcher.claim_lease_seconds = -1
+
+        self.assertEqual(self.dispatcher.flush(), 1)
+        self.assertEqual(self.dispatcher.pending(), [])
+
+    def test_background_worker_delivers(self):
+        self.dispatcher.start()
+        self.dispatcher.enqueue('ops@example.com', 'A', 'a')
+        self.dispatcher.stop()
+
+        self.smtp.send_message.assert_called_once()
+        self.smtp.quit.assert_called_once()
+
+    def test_stop_flushes_alerts_queued_during_a_flush(self):
+        real_flush = self.dispatcher._flush
+        calls = []
+
+        def flush():
+            calls.append(1)
+            if len(calls) == 1:
+                # An alert is queued and stop() is requested while this flush runs
+                self.dispatcher.enqueue('ops@example.com', 'Late', 'late')
+                self.dispatcher._stopping.set()
+                return 0
+            return real_flush()
+
+        with patch.object(self.dispatcher, '_flush', side_effect=flush):
+            self.dispatcher._run()
+
+        self.assertEqual(self.dispatcher.pending(), [])
+        self.smtp.send_message.assert_called_once()
+
+class TestAlertManager(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.alert_index = AlertStateIndex(os.path.join(self.tmpdir.name, 'alert_state.db'))
+        self.addCleanup(self.alert_index.close)
+        self.dispatcher = MagicMock()
+        self.manager = AlertManager(self.dispatcher, self.alert_index)
+        self.pattern = {
+            'pattern_type': 'user_recurring_issue', 'pattern_value': 'password reset',
+            'ticket_count': 1, 'first_occurrence': 'a', 'last_occurrence': 'b',
+            'tickets': [{'id': 1, 'summary': 'Password Reset'}],
+        }
+
+    def test_alerts_are_queued_when_dispatcher_given(self):
+        self.manager.generate_alert('Sarah Smith', [self.pattern])
+
+        recipient, subject, body = self.dispatcher.enqueue.call_args.args
+        self.assertIn('Sarah Smith', subject)
+        self.assertIn('Ticket #1: Password Reset', body)
+
+    def test_ongoing_patterns_are_not_realerted(self):
+        self.manager.generate_alert('Sarah Smith', [self.pattern])
+        self.manager.generate_alert('Sarah Smith', [self.pattern])
+
+        self.assertEqual(self.dispatcher.enqueue.call_count, 1)
+
+    def test_failed_email_is_not_recorded_as_sent(self):
+        manager = AlertManager(alert_index=self.alert_index)
+        with patch.object(manager, '_send_email', side_effect=[False, True]) as send:
+            manager.generate_alert('Sarah Smith', [self.pattern])
+            manager.generate_alert('Sarah Smith', [self.pattern])
+
+        self.assertEqual(send.call_count, 2)
+        self.assertEqual(len(self.alert_index), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,10 +1,17 @@
 # Add to your existing tests/test_analyzer.py
 import unittest
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
 from src.connectwise.mock_client import MockConnectWiseClient
+from src.connectwise.models import iter_models
 from src.monitoring.analyzer import TicketAnalyzer
 
 class TestTicketAnalyzer(unittest.TestCase):
     def setUp(self):
+        # No analysis cache or alert state files in the working directory
+        self.addCleanup(patch.stopall)
+        patch('src.config.settings.CLAUDE_CACHE_PATH', '').start()
+        patch('src.config.settings.ALERT_STATE_PATH', '').start()
         self.mock_client = MockConnectWiseClient()
         self.analyzer = TicketAnalyzer(self.mock_client)
 
@@ -25,5 +32,47 @@ class TestTicketAnalyzer(unittest.TestCase):
                 self.assertIn('ticket_count', pattern)
                 self.assertIn('tickets', pattern)
 
+    def test_fetched_tickets_feed_outbreak_detection(self):
+        self.analyzer.analyze_recurring_issues(days=2, scopes=('company',))
+
+        self.assertGreater(len(self.analyzer.outbreaks), 0)
+        self.assertIsInstance(self.analyzer.outbreak_patterns(), list)
+
+    def test_analysis_window_carries_company_and_board(self):
+        end_date = datetime.now()
+        tickets = list(self.analyzer._iter_window(end_date - timedelta(days=3), end_date))
+
+        self.assertTrue(tickets)
+        self.assertTrue(all(t.company and t.board and t.entered_by for t in tickets))
+        self.assertTrue(any(cluster.companies for cluster in self.analyzer.outbreaks._clusters.values()))
+
+    def test_started_outbreaks_are_alerted(self):
+        pattern = {'pattern_type': 'outbreak', 'pattern_value': 'email problems', 'ticket_count': 12,
+                   'user_count': 9}
+        self.analyzer.outbreaks = MagicMock()
+        self.analyzer.outbreaks.add.side_effect = lambda ticket: pattern if ticket.id == 2 else None
+        self.analyzer.alerts = MagicMock()
+
+        tickets = [{'id': i, 'summary': 'Email problems', 'dateEntered': '2024-05-01T12:00:00Z'} for i in range(4)]
+        with self.assertLogs('src.monitoring.analyzer', 'WARNING'):
+            self.assertEqual(len(list(self.analyzer._observe(iter_models(tickets)))), 4)
+
+        self.analyzer.alerts.generate_alert.assert_called_once_with('Multiple users', [pattern])
+
+    def test_patterns_carry_archive_baseline(self):
+        archive = MagicMock()
+        archive.user_baselines.return_value = {'John': {'total': 9, 'daily_mean': 0.1, 'daily_std': 0.3}}
+        analyzer = TicketAnalyzer(self.mock_client, archive=archive)
+        analyzer.claude = MagicMock()
+        analyzer.claude.analyze_user_patterns.return_value = [{
+            'user': 'John', 'ticket_count': 4, 'time_period': '3 days',
+            'analysis': {'has_pattern': True}, 'analyzed_at': 'now',
+        }]
+
+        patterns = analyzer.analyze_tickets(mode='serial')
+
+        self.assertEqual(patterns[0]['baseline']['total'], 9)
+        self.assertEqual(archive.user_baselines.call_args.args[0], ['John'])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
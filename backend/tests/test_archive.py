@@ -0,0 +1,151 @@
+import os
+import tempfile
+import threading
+import unittest
+from datetime import datetime, timedelta, timezone
+from src.connectwise import archive as archive_module
+from src.connectwise.archive import TicketArchive
+from src.connectwise.mock_client import MockConnectWiseClient
+from src.connectwise.models import Ticket
+from src.connectwise.store import TicketStore
+
+END = datetime(2024, 6, 1, tzinfo=timezone.utc)
+DAY = 86400
+
+
+def ticket(ticket_id, user, days_ago, board='Service Board', summary='Email Problems'):
+    entered = int(END.timestamp()) - int(days_ago * DAY) - 3600
+    return Ticket(ticket_id, summary, user, entered, '', board=board, company='Acme')
+
+
+class TestTicketArchive(unittest.TestCase):
+    format = 'ipc'
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.archive = TicketArchive(self.tmpdir.name, format=self.format)
+
+    def test_tickets_are_partitioned_by_day(self):
+        self.archive.append([ticket(1, 'John', 0), ticket(2, 'Jane', 0), ticket(3, 'John', 2)])
+
+        self.assertEqual(self.archive.days(), ['2024-05-29', '2024-05-31'])
+        self.assertTrue(os.path.isdir(os.path.join(self.tmpdir.name, 'day=2024-05-31')))
+
+    def test_refetched_tickets_are_not_archived_twice(self):
+        self.assertEqual(self.archive.append([ticket(1, 'John', 0), ticket(2, 'Jane', 1)]), 2)
+        self.assertEqual(self.archive.append([ticket(1, 'John', 0), ticket(3, 'Jane', 1)]), 1)
+
+        # A fresh instance reloads the archived ids from disk
+        reopened = TicketArchive(self.tmpdir.name, format=self.format)
+        self.assertEqual(reopened.append([ticket(2, 'Jane', 1)]), 0)
+        self.assertEqual(reopened.count_tickets(END - timedelta(days=7), END), 3)
+
+    def test_scan_filters_on_date_user_and_board(self):
+        self.archive.append([
+            ticket(1, 'John', 0, board='Escalations'),
+            ticket(2, 'John', 0),
+            ticket(3, 'Jane', 0, board='Escalations'),
+            ticket(4, 'John', 10, board='Escalations'),
+        ])
+        start = END - timedelta(days=3)
+
+        table = self.archive.scan(start, END, users=['John'], boards=['Escalations'], columns=['id'])
+
+        self.assertEqual(table['id'].to_pylist(), [1])
+        self.assertEqual(self.archive.count_tickets(start, END), 3)
+
+    def test_iter_tickets_rebuilds_models(self):
+        self.archive.append([ticket(2, 'John', 0), ticket(1, 'Jane', 1, summary='VPN down - 12')])
+
+        tickets = list(self.archive.iter_tickets(END - timedelta(days=3), END))
+
+        self.assertEqual([t.id for t in tickets], [1, 2])
+        self.assertEqual(tickets[0].issue, Ticket(1, 'VPN down - 12', 'Jane', 0, '').issue)
+        self.assertEqual(tickets[0].board, 'Service Board')
+
+    def test_parts_are_compacted(self):
+        original = archive_module.MAX_PARTS_PER_DAY
+        archive_module.MAX_PARTS_PER_DAY = 3
+        self.addCleanup(setattr, archive_module, 'MAX_PARTS_PER_DAY', original)
+
+        for i in range(4):
+            self.archive.append([ticket(i, f"User {i}", 0)])
+
+        self.assertEqual(len(self.archive._parts('2024-05-31')), 1)
+        self.assertEqual(self.archive.count_tickets(END - timedelta(days=1), END), 4)
+
+    def test_instances_sharing_a_directory_do_not_duplicate_tickets(self):
+        # Separate instances stand in for worker processes, each with its own id cache
+        other = TicketArchive(self.tmpdir.name, format=self.format)
+        self.assertEqual(self.archive.append([ticket(1, 'John', 0)]), 1)
+        self.assertEqual(other.append([ticket(2, 'Jane', 0)]), 1)
+
+        self.assertEqual(self.archive.append([ticket(1, 'John', 0), ticket(2, 'Jane', 0)]), 0)
+        self.assertEqual(other.append([ticket(1, 'John', 0), ticket(3, 'Jane', 0)]), 1)
+        self.assertEqual(self.archive.count_tickets(END - timedelta(days=1), END), 3)
+
+    def test_compaction_waits_for_readers(self):
+        self.archive.append([ticket(1, 'John', 0)])
+        self.archive.append([ticket(2, 'Jane', 0)])
+        other = TicketArchive(self.tmpdir.name, format=self.format)
+        compacted = threading.Event()
+        compaction = threading.Thread(target=lambda: (other.compact('2024-05-31'), compacted.set()))
+
+        with self.archive._day_lock('2024-05-31', shared=True):
+            compaction.start()
+            self.assertFalse(compacted.wait(0.2))
+            self.assertEqual(len(self.archive._parts('2024-05-31')), 2)
+        compaction.join(5)
+
+        self.assertTrue(compacted.is_set())
+        self.assertEqual(len(self.archive._parts('2024-05-31')), 1)
+        self.assertEqual(self.archive.count_tickets(END - timedelta(days=1), END), 2)
+
+    def test_daily_counts_and_user_baselines(self):
+        tickets = [ticket(i, 'John', days_ago=i % 10) for i in range(20)]
+        tickets.append(ticket(100, 'Jane', 1))
+        self.archive.append(tickets)
+
+        counts = self.archive.daily_counts(END - timedelta(days=30), END, by='user', users=['John'])
+        self.assertEqual(counts['count'].to_pylist(), [2] * 10)
+
+        baselines = self.archive.user_baselines(['John', 'Jane', 'Nobody'], END, days=20)
+        self.assertEqual(baselines['John'], {'total': 20, 'daily_mean': 1.0, 'daily_std': 1.0})
+        self.assertEqual(baselines['Nobody']['total'], 0)
+
+    def test_baselines_when_a_user_has_tickets_every_day(self):
+        # end is not at midnight, so the look-back touches days + 1 calendar days
+        end = END + timedelta(hours=13)
+        tickets = [Ticket(i, 'Email Problems', 'John', int(end.timestamp()) - 21600 - i * 43200, '')
+                   for i in range(2 * 90)]
+        self.archive.append(tickets)
+
+        baseline = self.archive.user_baselines(['John'], end, days=90)['John']
+
+        self.assertEqual(baseline, {'total': 180, 'daily_mean': 2.0, 'daily_std': 0.0})
+
+
+class TestParquetTicketArchive(TestTicketArchive):
+    format = 'parquet'
+
+
+class TestStoreArchiving(unittest.TestCase):
+    def test_sync_appends_to_archive(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        archive = TicketArchive(os.path.join(tmpdir.name, 'archive'))
+        store = TicketStore(os.path.join(tmpdir.name, 'tickets.db'), retention_days=3, archive=archive)
+        self.addCleanup(store.close)
+        client = MockConnectWiseClient(seed=1, users=20, tickets_per_day=50, days=3)
+
+        written = store.sync(client)
+        store.sync(client)
+
+        start = datetime.fromtimestamp(client.start, timezone.utc)
+        end = datetime.fromtimestamp(client.end, timezone.utc)
+        self.assertEqual(archive.count_tickets(start, end), written)
+
+
+if __name__ == '__main__':
+    unittest.main()
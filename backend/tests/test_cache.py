@@ -0,0 +1,50 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from src.connectwise.models import Ticket
+from src.monitoring.cache import AnalysisCache, analysis_key
+
+
+class TestAnalysisCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.cache = AnalysisCache(os.path.join(self.tmpdir.name, 'cache.db'), ttl_seconds=60, max_entries=2)
+        self.addCleanup(self.cache.close)
+
+    def test_key_ignores_ticket_order_but_not_content(self):
+        tickets = [Ticket(1, 'VPN down', 'John', 0, ''), Ticket(2, 'VPN slow', 'John', 0, '')]
+        key = analysis_key('John', tickets, 'v1', 'model')
+
+        self.assertEqual(key, analysis_key('John', list(reversed(tickets)), 'v1', 'model'))
+        self.assertNotEqual(key, analysis_key('John', tickets[:1], 'v1', 'model'))
+        self.assertNotEqual(key, analysis_key('John', tickets, 'v2', 'model'))
+        self.assertNotEqual(key, analysis_key('John', tickets, 'v1', 'other-model'))
+
+    def test_round_trip(self):
+        self.cache.set('a', {'user': 'John', 'ticket_count': 2})
+        self.assertEqual(self.cache.get('a'), {'user': 'John', 'ticket_count': 2})
+        self.assertIsNone(self.cache.get('missing'))
+
+    def test_expired_entries_are_dropped(self):
+        with patch('src.monitoring.cache.time.time', return_value=1000.0):
+            self.cache.set('a', 1)
+        with patch('src.monitoring.cache.time.time', return_value=1061.0):
+            self.assertIsNone(self.cache.get('a'))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        with patch('src.monitoring.cache.time.time', side_effect=[1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0]):
+            self.cache.set('a', 1)
+            self.cache.set('b', 2)
+            self.cache.get('a')
+            self.cache.set('c', 3)
+
+            self.assertIsNone(self.cache.get('b'))
+            self.assertEqual(self.cache.get('a'), 1)
+            self.assertEqual(self.cache.get('c'), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
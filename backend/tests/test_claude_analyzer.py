@@ -0,0 +1,329 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+from src.connectwise.models import Ticket
+from src.monitoring.cache import AnalysisCache
+from src.monitoring.claude_analyzer import ClaudeAnalyzer
+from src.monitoring.similarity import SimilarityPrefilter
+from src.monitoring.suppression import AlertStateIndex
+
+
+def make_tickets(user, summaries, start_id=1):
+    return [
+        {
+            'id': start_id + i,
+            'summary': summary,
+            'dateEntered': (datetime.now() - timedelta(hours=i + 1)).isoformat(),
+            'contact': {'name': user}
+        }
+        for i, summary in enumerate(summaries)
+    ]
+
+
+def tool_response(payload, name='report_patterns'):
+    return SimpleNamespace(content=[SimpleNamespace(type='tool_use', name=name, input=payload)])
+
+
+class TestBatchedAnalysis(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.cache = AnalysisCache(os.path.join(self.tmpdir.name, 'cache.db'))
+        self.addCleanup(self.cache.close)
+        self.alert_index = AlertStateIndex(os.path.join(self.tmpdir.name, 'alert_state.db'))
+        self.addCleanup(self.alert_index.close)
+        self.analyzer = ClaudeAnalyzer(cache=self.cache, alert_index=self.alert_index)
+        self.analyzer.prefilter = None
+        self.analyzer.client = MagicMock()
+        self.analyzer.send_pattern_email = MagicMock()
+        self.tickets = (
+            make_tickets('John Smith', ['Outlook password prompt', 'Cannot log into Outlook'])
+            + make_tickets('Jane Doe', ['Printer not working', 'Printer jammed again'], start_id=10)
+            + make_tickets('Solo User', ['VPN down'], start_id=20)
+        )
+
+    def test_packs_users_into_one_request(self):
+        self.analyzer.client.messages.create.return_value = tool_response({'results': [
+            {'user_key': 'U1', 'has_pattern': True, 'issue_type': 'Outlook login',
+             'ticket_count': 2, 'significance': 'high', 'user_impact': 'Locked out'},
+            {'user_key': 'U2', 'has_pattern': False, 'issue_type': '',
+             'ticket_count': 0, 'significance': 'low', 'user_impact': ''},
+        ]})
+
+        patterns = self.analyzer.analyze_user_patterns_batched(self.tickets)
+
+        self.assertEqual(self.analyzer.client.messages.create.call_count, 1)
+        self.assertEqual({p['user'] for p in patterns}, {'John Smith', 'Jane Doe'})
+        john = next(p for p in patterns if p['user'] == 'John Smith')
+        self.assertEqual(john['analysis']['issue_type'], 'Outlook login')
+        self.analyzer.send_pattern_email.assert_called_once()
+
+    def test_repeat_detections_are_emailed_once(self):
+        self.analyzer.cache = None
+        self.analyzer.client.messages.create.return_value = tool_response({'results': [
+            {'user_key': 'U1', 'has_pattern': True, 'issue_type': 'Outlook login',
+             'ticket_count': 2, 'significance': 'high', 'user_impact': 'Locked out'},
+        ]})
+
+        self.analyzer.analyze_user_patterns_batched(self.tickets)
+        self.analyzer.analyze_user_patterns_batched(self.tickets)
+        self.assertEqual(self.analyzer.send_pattern_email.call_count, 1)
+
+        self.tickets += make_tickets('John Smith', ['Outlook asks for password again'], start_id=50)
+        self.analyzer.analyze_user_patterns_batched(self.tickets)
+        self.assertEqual(self.analyzer.send_pattern_email.call_count, 2)
+        self.assertTrue(self.analyzer.send_pattern_email.call_args.args[1]['follow_up'])
+
+    def test_failed_email_is_retried_on_the_next_detection(self):
+        self.analyzer.cache = None
+        self.analyzer.client.messages.create.return_value = tool_response({'results': [
+            {'user_key': 'U1', 'has_pattern': True, 'issue_type': 'Outlook login',
+             'ticket_count': 2, 'significance': 'high', 'user_impact': 'Locked out'},
+        ]})
+        self.analyzer.send_pattern_email.side_effect = [OSError('SMTP down'), None]
+
+        self.analyzer.analyze_user_patterns_batched(self.tickets)
+        self.analyzer.analyze_user_patterns_batched(self.tickets)
+
+        self.assertEqual(self.analyzer.send_pattern_email.call_count, 2)
+        self.assertEqual(len(self.alert_index), 1)
+
+    def test_each_run_prunes_expired_alert_state(self):
+        self.analyzer.client.messages.create.return_value = tool_response({'results': []})
+        self.analyzer.alert_index.prune = MagicMock(return_value=0)
+
+        self.analyzer.analyze_user_patterns_batched(self.tickets)
+
+        self.analyzer.alert_index.prune.assert_called_once_with()
+
+    def test_unchanged_ticket_sets_are_served_from_cache(self):
+        self.analyzer.client.messages.create.return_value = tool_response({'results': [
+            {'user_key': 'U1', 'has_pattern': False, 'issue_type': '', 'ticket_count': 0,
+             'significance': 'low', 'user_impact': ''},
+            {'user_key': 'U2', 'has_pattern': False, 'issue_type': '', 'ticket_count': 0,
+             'significance': 'low', 'user_impact': ''},
+        ]})
+        first = self.analyzer.analyze_user_patterns_batched(self.tickets)
+
+        second = self.analyzer.analyze_user_patterns_batched(self.tickets)
+
+        self.assertEqual(self.analyzer.client.messages.create.call_count, 1)
+        self.assertEqual(first, second)
+
+    def test_prefilter_skips_users_with_unrelated_tickets(self):
+        self.analyzer.prefilter = SimilarityPrefilter(min_cluster_size=2, min_similarity=0.5)
+        self.tickets += make_tickets('Sam Lee', ['Email problems', 'Badge access request'], start_id=30)
+        self.tickets += make_tickets('Ana Ruiz', ['Scanner offline', 'Scanner offline again'], start_id=40)
+
+        candidates = self.analyzer._recent_user_tickets(self.tickets)
+
+        self.assertNotIn('Sam Lee', candidates)
+        self.assertIn('Ana Ruiz', candidates)
+
+    def test_token_budget_splits_batches(self):
+        with patch('src.monitoring.claude_analyzer.settings.CLAUDE_BATCH_TOKEN_BUDGET', 0):
+            batches = self.analyzer._pack_batches(self.analyzer._recent_user_tickets(self.tickets))
+
+        self.assertEqual(len(batches), 2)
+        self.assertEqual([entry['key'] for batch in batches for entry in batch], ['U1', 'U1'])
+
+    def test_response_without_tool_call_yields_no_patterns(self):
+        self.analyzer.client.messages.create.return_value = SimpleNamespace(
+            content=[SimpleNamespace(type='text', text='not json')])
+
+        self.assertEqual(self.analyzer.analyze_user_patterns_batched(self.tickets), [])
+
+    def test_entries_failing_the_schema_are_dropped(self):
+        self.analyzer.client.messages.create.return_value = tool_response({'results': [
+            {'user_key': 'U1', 'has_pattern': True, 'issue_type': 'Outlook login',
+             'ticket_count': 2, 'significance': 'urgent', 'user_impact': 'Locked out'},
+            {'user_key': 'U2', 'has_pattern': 'yes', 'issue_type': 'Printer',
+             'ticket_count': 2, 'significance': 'low', 'user_impact': ''},
+        ]})
+
+        self.assertEqual(self.analyzer.analyze_user_patterns_batched(self.tickets), [])
+        self.analyzer.send_pattern_email.assert_not_called()
+
+    def test_requests_use_the_structured_output_tool(self):
+        tickets = [Ticket.from_api(t) for t in self.tickets[:2]]
+        params = self.analyzer._batch_params([{'key': 'U1', 'user': 'John Smith', 'tickets': tickets}])
+
+        self.assertEqual(params['tool_choice'], {'type': 'tool', 'name': 'report_patterns'})
+        self.assertLessEqual(params['max_tokens'], 200)
+
+    def test_message_batches_api(self):
+        batches_api = self.analyzer.client.messages.batches
+        batches_api.create.return_value = SimpleNamespace(id='job-1', processing_status='ended')
+        batches_api.results.return_value = [SimpleNamespace(
+            custom_id='batch-0',
+            result=SimpleNamespace(type='succeeded', message=tool_response({'results': [
+                {'user_key': 'U2', 'has_pattern': True, 'issue_type': 'Printer',
+                 'ticket_count': 2, 'significance': 'low', 'user_impact': 'Minor'},
+            ]}))
+        )]
+
+        patterns = self.analyzer.analyze_user_patterns_batched(self.tickets, use_batch_api=True)
+
+        self.assertEqual([p['user'] for p in patterns], ['Jane Doe'])
+        self.assertEqual(len(batches_api.create.call_args.kwargs['requests']), 1)
+        self.analyzer.send_pattern_email.assert_not_called()
+
+
+class TestSerialAnalysis(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.alert_index = AlertStateIndex(os.path.join(self.tmpdir.name, 'alert_state.db'))
+        self.addCleanup(self.alert_index.close)
+        self.analyzer = ClaudeAnalyzer(cache=MagicMock(get=MagicMock(return_value=None)),
+                                       alert_index=self.alert_index)
+        self.analyzer.prefilter = None
+        self.analyzer.client = MagicMock()
+        self.analyzer.send_pattern_email = MagicMock()
+        self.tickets = make_tickets('John Smith', ['Outlook password prompt', 'Cannot log into Outlook'])
+
+    def test_structured_result_becomes_pattern_record(self):
+        self.analyzer.client.messages.create.return_value = tool_response({
+            'has_pattern': True, 'issue_type': 'Outlook login', 'ticket_count': 2,
+            'significance': 'medium', 'user_impact': 'Cannot read mail'}, name='report_pattern')
+
+        patterns = self.analyzer.analyze_user_patterns(self.tickets)
+
+        self.assertEqual(len(patterns), 1)
+        self.assertEqual(patterns[0]['analysis']['issue_type'], 'Outlook login')
+        self.assertEqual(self.analyzer.send_pattern_email.call_args.args[1]['significance'], 'medium')
+        self.analyzer.cache.set.assert_called_once()
+
+    def test_instructions_sit_in_system_prompt(self):
+        self.analyzer.client.messages.create.return_value = tool_response({
+            'has_pattern': False, 'issue_type': 'None', 'ticket_count': 2,
+            'significance': 'low', 'user_impact': 'None'}, name='report_pattern')
+
+        self.analyzer.analyze_user_patterns(self.tickets)
+
+        params = self.analyzer.client.messages.create.call_args.kwargs
+        self.assertIn('Focus specifically', params['system'])
+        content = params['messages'][0]['content']
+        self.assertNotIn('Focus specifically', content)
+        self.assertIn('ago: Outlook password prompt', content)
+        self.assertNotRegex(content, r'\d{4}-\d{2}-\d{2}T')
+
+    def test_invalid_result_is_not_cached(self):
+        self.analyzer.client.messages.create.return_value = tool_response({
+            'has_pattern': True, 'issue_type': 'Outlook login'}, name='report_pattern')
+
+        self.assertEqual(self.analyzer.analyze_user_patterns(self.tickets), [])
+        self.analyzer.cache.set.assert_not_called()
+        self.analyzer.send_pattern_email.assert_not_called()
+
+
+class StatusError(Exception):
+    def __init__(self, status_code, retry_after=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = SimpleNamespace(headers={'retry-after': retry_after} if retry_after else {})
+
+
+class TestConcurrentAnalysis(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.tickets = (
+            make_tickets('John Smith', ['Outlook password prompt', 'Cannot log into Outlook'])
+            + make_tickets('Jane Doe', ['Printer not working', 'Printer jammed again'], start_id=10)
+            + make_tickets('Sam Lee', ['VPN drops', 'VPN disconnects hourly'], start_id=20)
+        )
+        patch('src.monitoring.claude_analyzer.settings.CLAUDE_BACKOFF_BASE_SECONDS', 0).start()
+        self.addCleanup(patch.stopall)
+
+    def make_analyzer(self, name):
+        alert_index = AlertStateIndex(os.path.join(self.tmpdir.name, f"{name}.db"))
+        self.addCleanup(alert_index.close)
+        analyzer = ClaudeAnalyzer(cache=AnalysisCache(os.path.join(self.tmpdir.name, f"{name}-cache.db")),
+                                  alert_index=alert_index)
+        self.addCleanup(analyzer.cache.close)
+        analyzer.prefilter = None
+        analyzer.send_pattern_email = MagicMock()
+        return analyzer
+
+    def verdict(self, messages, **params):
+        user = messages[0]['content'].split('submitted by user ')[1].split(' in the past')[0]
+        return tool_response({'has_pattern': True, 'issue_type': f"Issue for {user}", 'ticket_count': 2,
+                              'significance': 'high', 'user_impact': user}, name='report_pattern')
+
+    def async_client(self, create):
+        return SimpleNamespace(messages=SimpleNamespace(create=create))
+
+    def test_results_match_serial_mode(self):
+        serial = self.make_analyzer('serial')
+        serial.client = MagicMock()
+        serial.client.messages.create.side_effect = self.verdict
+        concurrent = self.make_analyzer('concurrent')
+
+        async def create(**params):
+            # Finish in reverse order to show results keep the serial order
+            await asyncio.sleep(0.01 * (3 - len(concurrent.async_client.calls)))
+            concurrent.async_client.calls.append(params)
+            return self.verdict(**params)
+        concurrent.async_client = self.async_client(create)
+        concurrent.async_client.calls = []
+
+        expected = serial.analyze_user_patterns(self.tickets)
+        actual = concurrent.analyze_user_patterns_concurrent(self.tickets)
+
+        strip = lambda patterns: [{k: v for k, v in p.items() if k != 'analyzed_at'} for p in patterns]
+        self.assertEqual(strip(actual), strip(expected))
+        self.assertEqual(len(actual), 3)
+        self.assertEqual(concurrent.send_pattern_email.call_count, 3)
+
+    def test_rate_limited_request_is_retried_after_retry_after(self):
+        analyzer = self.make_analyzer('retry')
+        attempts = []
+
+        async def create(**params):
+            attempts.append(params)
+            if len(attempts) == 1:
+                raise StatusError(429, retry_after='0')
+            return self.verdict(**params)
+        analyzer.async_client = self.async_client(create)
+
+        patterns = analyzer.analyze_user_patterns_concurrent(self.tickets[:2])
+
+        self.assertEqual(len(attempts), 2)
+        self.assertEqual(patterns[0]['analysis']['issue_type'], 'Issue for John Smith')
+
+    def test_slow_call_times_out_and_is_retried(self):
+        analyzer = self.make_analyzer('timeout')
+        attempts = []
+
+        async def create(**params):
+            attempts.append(params)
+            if len(attempts) == 1:
+                await asyncio.sleep(1)
+            return self.verdict(**params)
+        analyzer.async_client = self.async_client(create)
+
+        with patch('src.monitoring.claude_analyzer.settings.CLAUDE_TIMEOUT_SECONDS', 0.05):
+            patterns = analyzer.analyze_user_patterns_concurrent(self.tickets[:2])
+
+        self.assertEqual(len(attempts), 2)
+        self.assertEqual(len(patterns), 1)
+
+    def test_client_errors_are_not_retried(self):
+        analyzer = self.make_analyzer('client-error')
+        create = MagicMock(side_effect=StatusError(400))
+
+        async def failing(**params):
+            return create(**params)
+        analyzer.async_client = self.async_client(failing)
+
+        self.assertEqual(analyzer.analyze_user_patterns_concurrent(self.tickets[:2]), [])
+        create.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,205 @@
+import asyncio
+import threading
+import time
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+from src.connectwise.client import ConnectWiseClient
+from src.connectwise.async_client import AsyncConnectWiseClient
+
+
+def make_response(payload, links=None, status_code=200, headers=None):
+    response = MagicMock()
+    response.json.return_value = payload
+    response.links = links or {}
+    response.status_code = status_code
+    response.headers = headers or {}
+    return response
+
+
+class TestConnectWiseClient(unittest.TestCase):
+    def setUp(self):
+        self.client = ConnectWiseClient()
+        self.mock_get = patch.object(self.client.session, 'get').start()
+        self.addCleanup(patch.stopall)
+        self.end_date = datetime.now()
+        self.start_date = self.end_date - timedelta(days=3)
+
+    def test_iter_tickets_follows_page_numbers(self):
+        self.client.PAGE_SIZE = 2
+        self.mock_get.side_effect = [
+            make_response([{'id': 1}, {'id': 2}]),
+            make_response([{'id': 3}]),
+        ]
+
+        tickets = list(self.client.iter_tickets(self.start_date, self.end_date))
+
+        self.assertEqual([t['id'] for t in tickets], [1, 2, 3])
+        self.assertEqual(self.mock_get.call_args_list[1].kwargs['params']['page'], 2)
+
+    def test_iter_tickets_follows_link_header(self):
+        self.mock_get.side_effect = [
+            make_response([{'id': 1}], {'next': {'url': 'https://cw/service/tickets?page=2'}}),
+            make_response([{'id': 2}]),
+        ]
+
+        tickets = self.client.get_tickets(self.start_date, self.end_date)
+
+        self.assertEqual([t['id'] for t in tickets], [1, 2])
+        self.assertEqual(self.mock_get.call_args_list[1].args[0], 'https://cw/service/tickets?page=2')
+
+    def test_iter_tickets_is_lazy(self):
+        self.client.PAGE_SIZE = 1
+        self.mock_get.side_effect = [make_response([{'id': 1}]), make_response([{'id': 2}])]
+
+        stream = self.client.iter_tickets(self.start_date, self.end_date)
+        self.assertEqual(next(stream)['id'], 1)
+        self.assertEqual(self.mock_get.call_count, 1)
+
+    def test_member_tickets_filter_server_side(self):
+        self.mock_get.return_value = make_response([{'id': 1, 'summary': 'VPN down'}])
+
+        tickets = self.client.get_member_tickets('sarah.smith', days=7, board='Service Board')
+
+        params = self.mock_get.call_args.kwargs['params']
+        self.assertIn('enteredBy = "sarah.smith"', params['conditions'])
+        self.assertIn('board/name = "Service Board"', params['conditions'])
+        self.assertEqual(params['fields'], 'id,summary,dateEntered,contact,type,priority,enteredBy,company,board')
+        self.assertEqual(params['orderBy'], 'dateEntered asc')
+        self.assertEqual(len(tickets), 1)
+
+    def test_filter_values_are_escaped(self):
+        conditions = self.client._filter_conditions(company='Acme "East"', member=None)
+
+        self.assertEqual(conditions, ['company/name = "Acme \\"East\\""'])
+
+
+class TestConnectWiseClientRetries(unittest.TestCase):
+    def setUp(self):
+        self.client = ConnectWiseClient()
+        self.mock_get = patch.object(self.client.session, 'get').start()
+        self.mock_sleep = patch('src.connectwise.client.time.sleep').start()
+        self.addCleanup(patch.stopall)
+
+    def test_session_is_reused(self):
+        self.mock_get.return_value = make_response({'id': 1})
+
+        self.client.get_ticket_details(1)
+        self.client.get_ticket_details(2)
+
+        self.assertEqual(self.mock_get.call_count, 2)
+        self.assertIn('Authorization', self.client.session.headers)
+
+    def test_retries_rate_limit_honoring_retry_after(self):
+        self.mock_get.side_effect = [
+            make_response({}, status_code=429, headers={'Retry-After': '2'}),
+            make_response({'id': 7}),
+        ]
+
+        ticket = self.client.get_ticket_details(7)
+
+        self.assertEqual(ticket['id'], 7)
+        self.mock_sleep.assert_called_once_with(2.0)
+
+    def test_retry_after_beyond_backoff_max_is_honored(self):
+        self.mock_get.side_effect = [
+            make_response({}, status_code=429, headers={'Retry-After': '120'}),
+            make_response({'id': 7}),
+        ]
+
+        self.client.get_ticket_details(7)
+
+        self.mock_sleep.assert_called_once_with(120.0)
+
+    def test_retry_after_over_the_cap_fails_fast(self):
+        throttled = make_response({}, status_code=429, headers={'Retry-After': '3600'})
+        self.mock_get.return_value = throttled
+
+        self.client.get_ticket_details(7)
+
+        self.assertEqual(self.mock_get.call_count, 1)
+        self.mock_sleep.assert_not_called()
+        throttled.raise_for_status.assert_called_once()
+
+    def test_backoff_is_jittered_and_capped(self):
+        for attempt in range(20):
+            delay = self.client._retry_delay(attempt)
+            self.assertGreaterEqual(delay, 0)
+            self.assertLessEqual(delay, self.client.backoff_max)
+
+    def test_gives_up_after_max_retries(self):
+        self.client.max_retries = 2
+        failure = make_response({}, status_code=503)
+        self.mock_get.return_value = failure
+
+        self.client.get_ticket_details(1)
+
+        self.assertEqual(self.mock_get.call_count, 3)
+        failure.raise_for_status.assert_called_once()
+
+
+class TestAsyncConnectWiseClient(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.client = ConnectWiseClient()
+        self.mock_get = patch.object(self.client.session, 'get').start()
+        self.addCleanup(patch.stopall)
+        self.async_client = AsyncConnectWiseClient(self.client, max_concurrency=3, requests_per_second=1000)
+
+    async def test_get_ticket_details_many_keeps_order(self):
+        self.mock_get.side_effect = lambda url, **kwargs: make_response({'id': int(url.rsplit('/', 1)[1])})
+
+        tickets = await self.async_client.get_ticket_details_many([5, 3, 9, 1])
+
+        self.assertEqual([t['id'] for t in tickets], [5, 3, 9, 1])
+
+    async def test_concurrency_is_bounded(self):
+        lock = threading.Lock()
+        in_flight = [0]
+        peak = [0]
+
+        def slow_get(url, **kwargs):
+            with lock:
+                in_flight[0] += 1
+                peak[0] = max(peak[0], in_flight[0])
+            time.sleep(0.01)
+            with lock:
+                in_flight[0] -= 1
+            return make_response({'id': 1})
+
+        self.mock_get.side_effect = slow_get
+
+        await self.async_client.get_ticket_details_many(range(12))
+
+        self.assertLessEqual(peak[0], 3)
+
+    async def test_get_tickets_fetches_pages_until_short_page(self):
+        self.client.PAGE_SIZE = 2
+        pages = {1: [{'id': 1}, {'id': 2}], 2: [{'id': 3}, {'id': 4}], 3: [{'id': 5}], 4: []}
+        self.mock_get.side_effect = lambda url, params=None, **kwargs: make_response(pages.get(params['page'], []))
+
+        tickets = await self.async_client.get_tickets(datetime.now() - timedelta(days=1), datetime.now())
+
+        self.assertEqual([t['id'] for t in tickets], [1, 2, 3, 4, 5])
+
+
+class TestAsyncClientAcrossLoops(unittest.TestCase):
+    def test_client_is_reusable_across_event_loops(self):
+        client = ConnectWiseClient()
+        mock_get = patch.object(client.session, 'get').start()
+        self.addCleanup(patch.stopall)
+
+        def slow_get(url, **kwargs):
+            time.sleep(0.01)
+            return make_response({'id': int(url.rsplit('/', 1)[1])})
+
+        mock_get.side_effect = slow_get
+        # One slot, so the queued requests bind the semaphore to each loop they wait on
+        async_client = AsyncConnectWiseClient(client, max_concurrency=1, requests_per_second=1000)
+
+        for _ in range(2):
+            tickets = asyncio.run(async_client.get_ticket_details_many([1, 2, 3]))
+            self.assertEqual([t['id'] for t in tickets], [1, 2, 3])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import patch
+import requests
+from src.connectwise.client import ConnectWiseClient
+from src.connectwise.fake_server import FakeConnectWiseServer, parse_conditions
+from src.connectwise.mock_client import MockConnectWiseClient
+
+END = datetime(2024, 5, 31, tzinfo=timezone.utc)
+
+
+class TestConditions(unittest.TestCase):
+    def setUp(self):
+        self.ticket = {'id': 5, 'summary': 'VPN down', 'board': {'name': 'Service Board'},
+                       'dateEntered': '2024-05-02T10:00:00Z', '_info': {'lastUpdated': '2024-05-03T00:00:00Z'}}
+
+    def test_comparisons_and_boolean_logic(self):
+        matches = lambda conditions: parse_conditions(conditions)(self.ticket)
+
+        self.assertTrue(matches('dateEntered >= [2024-05-01] AND dateEntered <= [2024-05-03]'))
+        self.assertTrue(matches('board/name = "service board"'))
+        self.assertTrue(matches('(id = 4 OR id = 5) and summary like "VPN%"'))
+        self.assertTrue(matches('lastUpdated >= [2024-05-02T23:00:00Z]'))
+        self.assertFalse(matches('summary contains "printer" or id > 5'))
+
+    def test_invalid_conditions_raise(self):
+        for conditions in ('id =', 'id = 5 AND', 'summary ~ "x"', '(id = 5'):
+            with self.assertRaises(ValueError, msg=conditions):
+                parse_conditions(conditions)
+
+
+class TestFakeServerWithClient(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.mock = MockConnectWiseClient(seed=3, users=40, tickets_per_day=120, days=10, end=END)
+        cls.server = FakeConnectWiseServer(cls.mock).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        self.server.stats.update(requests=0, throttled=0)
+        self.server.rate_limit, self.server.throttle_rate = None, 0.0
+        self.client = ConnectWiseClient()
+        self.client.base_url = self.server.url
+        self.client.backoff_base = 0.01
+        self.addCleanup(self.client.close)
+        patch.object(ConnectWiseClient, 'PAGE_SIZE', 100).start()
+        self.addCleanup(patch.stopall)
+        self.start = datetime(2024, 5, 25, tzinfo=timezone.utc)
+        self.end = datetime(2024, 5, 30, tzinfo=timezone.utc)
+
+    def expected(self, **filters):
+        # The client sends date-only bounds, so the window ends at midnight
+        return self.mock.get_tickets(self.start, self.end, **filters)
+
+    def test_paginated_fetch_matches_dataset(self):
+        tickets = self.client.get_tickets(self.start, self.end)
+
+        self.assertEqual(tickets, self.expected())
+        self.assertGreater(self.server.stats['requests'], 3)
+
+    def test_filters_and_projection(self):
+        tickets = self.client.get_tickets(self.start, self.end, board='Projects', fields=('id', 'summary'))
+
+        self.assertEqual(tickets, [{'id': t['id'], 'summary': t['summary']}
+                                   for t in self.expected(board='Projects')])
+
+    def test_ticket_details_and_missing_ticket(self):
+        self.assertEqual(self.client.get_ticket_details(7), self.server.by_id[7])
+        with self.assertRaises(requests.HTTPError):
+            self.client.get_ticket_details(10 ** 9)
+
+    def test_throttled_requests_are_retried(self):
+        self.server.throttle_rate = 0.3
+        self.server.retry_after = 0.01
+
+        tickets = self.client.get_tickets(self.start, self.end)
+
+        self.assertEqual(len(tickets), len(self.expected()))
+        self.assertGreater(self.server.stats['throttled'], 0)
+
+    def test_rate_limit_sends_retry_after(self):
+        self.server.rate_limit = 1
+        self.server._tokens = 0
+        response = requests.get(f"{self.server.url}/service/tickets")
+
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(float(response.headers['Retry-After']), 0)
+
+    def test_incremental_sync_sees_touched_tickets(self):
+        watermark = max(t['_info']['lastUpdated'] for t in self.server.tickets)
+        self.server.touch(3, summary='Edited')
+
+        updated = list(self.client.iter_updated_tickets(watermark))
+
+        self.assertIn(3, [t['id'] for t in updated])
+
+
+if __name__ == '__main__':
+    unittest.main()
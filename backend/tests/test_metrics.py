@@ -0,0 +1,146 @@
+import json
+import logging
+import os
+import shutil
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+from src.connectwise.client import ConnectWiseClient, REQUESTS, RETRIES, endpoint_label
+from src.monitoring.claude_analyzer import ClaudeAnalyzer, CLAUDE_TOKENS, CLAUDE_REQUESTS
+from src.utils.logger import JsonFormatter, RunIdFilter, run_context
+from src.utils.metrics import MetricsRegistry
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry(directory='')
+
+    def test_counter_renders_per_label_set(self):
+        requests = self.registry.counter('requests_total', 'Requests', ('status',))
+        requests.inc(status=200)
+        requests.inc(2, status=200)
+        requests.inc(status=500)
+
+        text = self.registry.render()
+
+        self.assertIn('# TYPE requests_total counter', text)
+        self.assertIn('requests_total{status="200"} 3', text)
+        self.assertIn('requests_total{status="500"} 1', text)
+
+    def test_histogram_buckets_are_cumulative(self):
+        latency = self.registry.histogram('latency_seconds', 'Latency', buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 5.0):
+            latency.observe(value)
+
+        text = self.registry.render()
+
+        self.assertIn('latency_seconds_bucket{le="0.1"} 1', text)
+        self.assertIn('latency_seconds_bucket{le="1.0"} 3', text)
+        self.assertIn('latency_seconds_bucket{le="+Inf"} 4', text)
+        self.assertIn('latency_seconds_count 4', text)
+        self.assertIn('latency_seconds_sum 6.05', text)
+
+    def test_label_values_are_escaped(self):
+        self.registry.counter('odd_total', 'Odd labels', ('name',)).inc(name='say "hi"\n')
+        self.assertIn('odd_total{name="say \\"hi\\"\\n"} 1', self.registry.render())
+
+    def test_wrong_labels_are_rejected(self):
+        requests = self.registry.counter('requests_total', 'Requests', ('status',))
+        with self.assertRaises(ValueError):
+            requests.inc(route='/')
+        with self.assertRaises(ValueError):
+            self.registry.histogram('requests_total', 'Requests', ('status',))
+
+    def test_directory_sums_every_process(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        registry = MetricsRegistry(directory=directory, flush_seconds=3600)
+        requests = registry.counter('requests_total', 'Requests', ('status',))
+        latency = registry.histogram('latency_seconds', 'Latency', buckets=(1.0,))
+        requests.inc(status=200)
+        latency.observe(0.5)
+
+        # Another worker's flushed file
+        with open(os.path.join(directory, 'metrics-1.json'), 'w') as f:
+            json.dump({
+                'requests_total': {'kind': 'counter', 'help': 'Requests', 'labels': ['status'], 'buckets': [],
+                                   'samples': [[['200'], 4], [['503'], 1]]},
+                'latency_seconds': {'kind': 'histogram', 'help': 'Latency', 'labels': [], 'buckets': [1.0],
+                                    'samples': [[[], [2.0, 1, 0, 1]]]},
+            }, f)
+
+        text = registry.render()
+
+        self.assertIn('requests_total{status="200"} 5', text)
+        self.assertIn('requests_total{status="503"} 1', text)
+        self.assertIn('latency_seconds_bucket{le="1.0"} 1', text)
+        self.assertIn('latency_seconds_bucket{le="+Inf"} 2', text)
+        self.assertIn('latency_seconds_sum 2.5', text)
+
+        registry.clear_directory()
+        self.assertEqual(os.listdir(directory), [])
+
+
+class TestJsonLogging(unittest.TestCase):
+    def format(self, message, **extra):
+        record = logging.LogRecord('pipeline', logging.INFO, __file__, 1, message, None, None)
+        for key, value in extra.items():
+            setattr(record, key, value)
+        RunIdFilter().filter(record)
+        return json.loads(JsonFormatter().format(record))
+
+    def test_lines_carry_run_id_and_extra_fields(self):
+        with run_context('run-1'):
+            entry = self.format('Stage sync took 1.0s', stage='sync', duration_ms=1000.0)
+
+        self.assertEqual(entry['run_id'], 'run-1')
+        self.assertEqual(entry['message'], 'Stage sync took 1.0s')
+        self.assertEqual(entry['stage'], 'sync')
+        self.assertEqual(entry['duration_ms'], 1000.0)
+
+    def test_run_id_is_scoped(self):
+        with run_context() as run_id:
+            self.assertEqual(self.format('inside')['run_id'], run_id)
+        self.assertIsNone(self.format('outside')['run_id'])
+
+
+class TestInstrumentation(unittest.TestCase):
+    def test_endpoint_label_collapses_ids(self):
+        self.assertEqual(endpoint_label('https://cw/v4_6_release/apis/3.0/service/tickets/42'),
+                         '/service/tickets/{id}')
+        self.assertEqual(endpoint_label('https://cw/v4_6_release/apis/3.0/service/tickets?page=2'),
+                         '/service/tickets')
+
+    def test_client_counts_requests_and_retries(self):
+        client = ConnectWiseClient()
+        throttled = MagicMock(status_code=429, headers={'Retry-After': '0'}, content=b'')
+        ok = MagicMock(status_code=200, headers={}, content=b'{}')
+        before_ok = REQUESTS.get(endpoint='/service/tickets/{id}', status=200)
+        before_retries = RETRIES.get(endpoint='/service/tickets/{id}', reason=429)
+
+        with patch.object(client.session, 'get', side_effect=[throttled, ok]):
+            client._request('https://cw/apis/3.0/service/tickets/7')
+
+        self.assertEqual(REQUESTS.get(endpoint='/service/tickets/{id}', status=200), before_ok + 1)
+        self.assertEqual(RETRIES.get(endpoint='/service/tickets/{id}', reason=429), before_retries + 1)
+
+    @patch.dict(os.environ, {'ANTHROPIC_API_KEY': 'test'})
+    @patch('src.config.settings.CLAUDE_CACHE_PATH', '')
+    @patch('src.config.settings.ALERT_STATE_PATH', '')
+    def test_claude_calls_record_token_usage(self):
+        analyzer = ClaudeAnalyzer(cache=None, prefilter=None, alert_index=None)
+        response = SimpleNamespace(content=[], usage=SimpleNamespace(input_tokens=120, output_tokens=30))
+        analyzer.client = MagicMock()
+        analyzer.client.messages.create.return_value = response
+        tokens_in = CLAUDE_TOKENS.get(direction='input')
+        calls = CLAUDE_REQUESTS.get(mode='batched', outcome='ok')
+
+        self.assertIs(analyzer._create('batched', model='m'), response)
+
+        self.assertEqual(CLAUDE_TOKENS.get(direction='input'), tokens_in + 120)
+        self.assertEqual(CLAUDE_REQUESTS.get(mode='batched', outcome='ok'), calls + 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+from src.connectwise.mock_client import MockConnectWiseClient
+from src.connectwise.models import issue_key
+from src.monitoring.pattern_engine import PatternEngine
+
+END = datetime(2024, 5, 31, tzinfo=timezone.utc)
+
+
+def make_client(**overrides):
+    options = dict(seed=42, users=200, tickets_per_day=300, days=14, pattern_users=0.05, end=END)
+    options.update(overrides)
+    return MockConnectWiseClient(**options)
+
+
+class TestMockDataset(unittest.TestCase):
+    def setUp(self):
+        self.client = make_client()
+        self.start, self.end = END - timedelta(days=14), END
+
+    def test_same_seed_gives_same_dataset(self):
+        first = self.client.get_tickets(self.start, self.end)
+
+        self.assertEqual(first, make_client().get_tickets(self.start, self.end))
+        self.assertNotEqual(first, make_client(seed=43).get_tickets(self.start, self.end))
+
+    def test_ids_are_unique_and_follow_entry_order(self):
+        tickets = self.client.get_tickets(self.start, self.end)
+        ids = [t['id'] for t in tickets]
+
+        self.assertEqual(ids, list(range(1, len(ids) + 1)))
+        self.assertEqual([t['dateEntered'] for t in tickets], sorted(t['dateEntered'] for t in tickets))
+        self.assertGreaterEqual(len(tickets), 14 * 300)
+
+    def test_injected_patterns_are_detected(self):
+        engine = PatternEngine(threshold=4, window_days=2)
+        found = {(p['user'], p['pattern_value']) for p in engine.find_patterns(
+            self.client.iter_tickets(self.start, self.end), scopes=('user',))}
+
+        injected = self.client.injected_patterns()
+        self.assertEqual(len(injected), 10)
+        for pattern in injected:
+            self.assertIn((self.client.user_name(pattern['user']), issue_key(pattern['issue'])), found)
+
+    def test_filters_and_field_projection(self):
+        tickets = list(self.client.iter_tickets(self.start, self.end, member='user00007',
+                                                board='Projects', fields=('id', 'summary')))
+
+        self.assertTrue(tickets)
+        self.assertTrue(all(set(t) == {'id', 'summary'} for t in tickets))
+        detail = self.client.get_ticket_details(tickets[0]['id'])
+        self.assertEqual((detail['enteredBy'], detail['board']['name']), ('user00007', 'Projects'))
+
+    def test_member_tickets_have_unique_ids(self):
+        tickets = self.client.get_member_tickets('sarah.smith')
+
+        self.assertEqual(len({t['id'] for t in tickets}), len(tickets))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+from datetime import datetime, timezone
+from src.connectwise.models import Ticket, iter_models, normalize_tokens
+
+
+def api_ticket(ticket_id, summary, contact='John Smith'):
+    return {
+        'id': ticket_id,
+        'summary': summary,
+        'dateEntered': '2024-05-01T12:00:00Z',
+        'contact': {'id': 7, 'name': contact},
+        'board': {'id': 1, 'name': 'Service Board'},
+        'company': {'id': 3, 'name': 'Acme'},
+        'type': {'id': 2, 'name': 'Problem'},
+        'enteredBy': 'john.smith',
+        '_info': {'lastUpdated': '2024-05-01T12:00:00Z'},
+    }
+
+
+class TestTicket(unittest.TestCase):
+    def test_normalize_tokens_drops_numbers_and_stopwords(self):
+        self.assertEqual(normalize_tokens('Email Problems - 482 for the CEO'), ['email', 'problems', 'ceo'])
+
+    def test_from_api_keeps_only_analysis_fields(self):
+        ticket = Ticket.from_api(api_ticket(1, 'Outlook password prompt #123'))
+
+        self.assertEqual(ticket.user, 'John Smith')
+        self.assertEqual(ticket.issue, 'outlook password prompt')
+        self.assertEqual(ticket.entered, int(datetime(2024, 5, 1, 12, tzinfo=timezone.utc).timestamp()))
+        self.assertEqual((ticket.board, ticket.company, ticket.type), ('Service Board', 'Acme', 'Problem'))
+        self.assertFalse(hasattr(ticket, '__dict__'))
+
+    def test_strings_are_shared_across_tickets(self):
+        first, second = iter_models([api_ticket(1, 'VPN down'), api_ticket(2, 'VPN down')])
+
+        self.assertIs(first.user, second.user)
+        self.assertIs(first.issue, second.issue)
+
+    def test_missing_contact_falls_back_to_entered_by(self):
+        data = api_ticket(1, 'VPN down')
+        del data['contact']
+
+        self.assertEqual(Ticket.from_api(data).user, 'john.smith')
+
+    def test_as_dict_round_trips(self):
+        ticket = Ticket.from_api(api_ticket(1, 'VPN down'))
+
+        again = Ticket.coerce(ticket.as_dict())
+
+        self.assertEqual((again.id, again.user, again.entered), (ticket.id, ticket.user, ticket.entered))
+        self.assertIs(Ticket.coerce(ticket), ticket)
+
+
+if __name__ == '__main__':
+    unittest.main()
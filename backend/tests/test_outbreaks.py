@@ -0,0 +1,108 @@
+import unittest
+from datetime import datetime, timezone
+from src.connectwise.mock_client import MockConnectWiseClient
+from src.connectwise.models import Ticket, issue_key, iter_models
+from src.monitoring.outbreaks import MinHasher, OutbreakDetector
+
+END = datetime(2024, 6, 1, tzinfo=timezone.utc)
+HOUR = 3600
+
+
+def ticket(ticket_id, summary, user, entered, company='Acme', board='Service Board'):
+    return Ticket(ticket_id, summary, user, entered, '', company=company, board=board)
+
+
+class TestMinHasher(unittest.TestCase):
+    def test_similar_issues_agree_and_unrelated_do_not(self):
+        hasher = MinHasher(num_perm=128, bands=16)
+        email = hasher.signature('email problems')
+
+        self.assertGreater((email == hasher.signature('email problem')).mean(), 0.7)
+        self.assertLess((hasher.signature('password reset') == hasher.signature('mfa reset')).mean(), 0.4)
+
+
+class TestOutbreakDetector(unittest.TestCase):
+    def setUp(self):
+        self.detector = OutbreakDetector(window_seconds=HOUR, baseline_days=1, min_tickets=10, min_users=5,
+                                         spike_factor=3, min_similarity=0.5, max_clusters=100)
+        self.start = int(END.timestamp()) - 2 * 86400
+
+    def background(self, hours):
+        # Two tickets an hour for each of three issues, from rotating users
+        tickets, ticket_id = [], 0
+        for hour in range(hours):
+            for minute in range(0, 60, 10):
+                ticket_id += 1
+                issue = ('Printer Not Working', 'VPN Disconnects', 'Email Problems')[minute // 10 % 3]
+                tickets.append(ticket(ticket_id, f"{issue} - {ticket_id}", f"User {ticket_id % 17}",
+                                      self.start + hour * HOUR + minute * 60))
+        return tickets
+
+    def test_cross_user_burst_is_reported_once(self):
+        background = self.background(30)
+        self.assertEqual(self.detector.add_many(background), [])
+
+        burst_start = self.start + 30 * HOUR
+        burst = [ticket(1000 + i, f"email problem {i}", f"Burst User {i}", burst_start + i * 60,
+                        company=f"Company {i % 3}") for i in range(20)]
+        started = self.detector.add_many(burst)
+
+        self.assertEqual(len(started), 1)
+        self.assertEqual(started[0]['pattern_type'], 'outbreak')
+        self.assertEqual(started[0]['pattern_value'], 'email problems')
+        self.assertGreaterEqual(started[0]['user_count'], 5)
+        current = self.detector.outbreaks()
+        self.assertEqual(len(current), 1)
+        self.assertEqual(current[0]['ticket_count'], 22)
+        self.assertEqual(set(current[0]['companies']), {'Acme', 'Company 0', 'Company 1', 'Company 2'})
+
+        # The window slides past the burst
+        self.assertEqual(self.detector.outbreaks(now=burst_start + 3 * HOUR), [])
+
+    def test_one_user_repeating_an_issue_is_not_an_outbreak(self):
+        self.detector.add_many(self.background(30))
+        burst = [ticket(1000 + i, 'Email Problems', 'John', self.start + 30 * HOUR + i * 60) for i in range(20)]
+
+        self.assertEqual(self.detector.add_many(burst), [])
+
+    def test_nothing_is_reported_during_warmup(self):
+        burst = [ticket(i, 'Email Problems', f"User {i}", self.start + i * 60) for i in range(20)]
+
+        self.assertEqual(self.detector.add_many(burst), [])
+
+    def test_refeeding_a_window_is_ignored(self):
+        background = self.background(30)
+        self.detector.add_many(background)
+        counts = {cluster.id: len(cluster.window) for cluster in self.detector._clusters.values()}
+
+        self.detector.add_many(background)
+
+        self.assertEqual({cluster.id: len(cluster.window) for cluster in self.detector._clusters.values()}, counts)
+
+    def test_cluster_count_is_bounded(self):
+        self.detector.add_many(ticket(i, f"unique issue {i:05d} {'x' * (i % 7)}", f"User {i}", self.start + i)
+                               for i in range(1000))
+
+        self.assertLessEqual(len(self.detector), 100)
+
+
+class TestOutbreaksInMockData(unittest.TestCase):
+    def test_injected_outbreaks_are_found_among_background_traffic(self):
+        client = MockConnectWiseClient(seed=4, users=2000, tickets_per_day=2000, days=6, outbreaks=2, end=END)
+        start = datetime.fromtimestamp(client.start, timezone.utc)
+        tickets = iter_models(client.iter_tickets(start, END))
+
+        started = OutbreakDetector(window_seconds=HOUR, baseline_days=7, min_tickets=10, min_users=5,
+                                   spike_factor=3, min_similarity=0.5, max_clusters=1000).add_many(tickets)
+
+        injected = client.injected_outbreaks()
+        self.assertEqual(len(started), len(injected))
+        for outbreak in injected:
+            # Reported within the burst itself
+            end = datetime.fromtimestamp(outbreak['times'][-1]).isoformat()
+            self.assertTrue(any(p['pattern_value'] == issue_key(outbreak['issue']) and p['last_occurrence'] <= end
+                                for p in started), outbreak['issue'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import sys
+import unittest
+from datetime import datetime, timedelta
+import numpy as np
+from src.monitoring.pattern_engine import PatternEngine, encode
+
+
+def ticket(ticket_id, summary, user, hours_ago, company='Acme', board='Service Board'):
+    return {
+        'id': ticket_id,
+        'summary': summary,
+        'dateEntered': (datetime.now() - timedelta(hours=hours_ago)).isoformat(),
+        'contact': {'name': user},
+        'company': {'name': company},
+        'board': {'name': board},
+        'type': {'name': 'Problem'},
+    }
+
+
+class TestPatternEngine(unittest.TestCase):
+    def setUp(self):
+        self.engine = PatternEngine(threshold=3, window_days=3)
+
+    def test_user_recurring_issue(self):
+        tickets = [
+            ticket(1, 'Email Problems - 101', 'John', 1),
+            ticket(2, 'Email problems - 202', 'John', 5),
+            ticket(3, 'EMAIL PROBLEMS', 'John', 30),
+            ticket(4, 'Printer Not Working', 'John', 2),
+        ]
+
+        patterns = self.engine.find_patterns(tickets, scopes=('user',))
+
+        self.assertEqual(len(patterns), 1)
+        self.assertEqual(patterns[0]['pattern_type'], 'user_recurring_issue')
+        self.assertEqual(patterns[0]['pattern_value'], 'email problems')
+        self.assertEqual(patterns[0]['user'], 'John')
+        self.assertEqual({t['id'] for t in patterns[0]['tickets']}, {1, 2, 3})
+
+    def test_sliding_window_excludes_spread_out_tickets(self):
+        tickets = [ticket(i, 'VPN down', 'Jane', hours_ago=i * 48) for i in range(4)]
+
+        self.assertEqual(self.engine.find_patterns(tickets, scopes=('user',)), [])
+
+    def test_company_and_board_scopes_span_users(self):
+        tickets = [ticket(i, 'Network Connection Issue', f"User {i}", i) for i in range(3)]
+        tickets.append(ticket(9, 'Network Connection Issue', 'Other', 1, company='Globex', board=''))
+
+        patterns = self.engine.find_patterns(tickets)
+        by_type = {p['pattern_type']: p for p in patterns}
+
+        self.assertNotIn('user_recurring_issue', by_type)
+        self.assertEqual(by_type['company_recurring_issue']['scope_value'], 'Acme')
+        self.assertEqual(by_type['company_recurring_issue']['ticket_count'], 3)
+        self.assertEqual(by_type['board_recurring_issue']['ticket_count'], 3)
+
+    def test_windows_stay_inside_keys_that_would_overflow_a_combined_key(self):
+        # Spanning 2 ** 32 seconds with the window, key 2 ** 32 times that span wraps int64 onto key 0
+        span = 2 ** 32 - 3 * 86400 - 1
+        keys = np.array([0, 2 ** 32, 0, 2 ** 32], dtype=np.int64)
+        timestamps = np.array([0, 60, span, span], dtype=np.int64)
+
+        order, counts, starts = self.engine._windowed_counts(keys, timestamps)
+
+        self.assertEqual(order.tolist(), [0, 2, 1, 3])
+        self.assertEqual(counts.tolist(), [1, 1, 1, 1])
+        self.assertEqual(starts.tolist(), [0, 1, 2, 3])
+
+    def test_encode_numbers_labels_by_first_appearance(self):
+        values = [sys.intern(v) for v in ('vpn', 'email', 'vpn', 'printer', 'email')]
+
+        codes, labels = encode(values)
+
+        self.assertEqual(labels, ['vpn', 'email', 'printer'])
+        self.assertEqual(codes.tolist(), [0, 1, 0, 2, 1])
+
+    def test_empty_window(self):
+        self.assertEqual(self.engine.find_patterns([]), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
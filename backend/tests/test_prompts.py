@@ -0,0 +1,62 @@
+import unittest
+from src.connectwise.models import Ticket
+from src.monitoring.prompts import MAX_SUMMARY_CHARS, compact_tickets, relative_age
+
+NOW = 1_700_000_000
+
+
+def ticket(ticket_id, summary, hours_ago):
+    entered = NOW - int(hours_ago * 3600)
+    return Ticket(ticket_id, summary, 'John Smith', entered, str(entered))
+
+
+class TestCompactTickets(unittest.TestCase):
+    def test_near_identical_summaries_fold_into_one_line(self):
+        lines = compact_tickets([
+            ticket(1, 'Password reset - 101', 30),
+            ticket(2, 'password reset 202', 5),
+            ticket(3, 'Printer jammed', 2),
+        ], NOW, budget_tokens=400)
+
+        self.assertEqual(lines, [
+            '- #3 2h ago: Printer jammed',
+            '- password reset 202 x2: #1, #2 (1d to 5h ago)',
+        ])
+
+    def test_long_summaries_are_truncated(self):
+        lines = compact_tickets([ticket(1, 'Outlook ' + 'x' * 500, 1)], NOW, budget_tokens=400)
+
+        summary = lines[0].split(': ', 1)[1]
+        self.assertEqual(len(summary), MAX_SUMMARY_CHARS)
+        self.assertTrue(summary.endswith('...'))
+
+    def test_budget_keeps_most_recent_issues(self):
+        words = ['printer', 'outlook', 'vpn', 'monitor', 'teams', 'scanner', 'laptop', 'wifi', 'backup', 'license']
+        tickets = [ticket(i, f"{word} broken", hours_ago=i + 1) for i, word in enumerate(words)]
+
+        lines = compact_tickets(tickets, NOW, budget_tokens=30)
+
+        self.assertTrue(lines[0].startswith('- #0 1h ago'))
+        self.assertRegex(lines[-1], r'^- \(\+\d+ older tickets omitted\)$')
+        self.assertLess(sum(len(line) for line in lines[:-1]), 30 * 4)
+
+    def test_omitting_an_issue_drops_every_older_one(self):
+        tickets = [
+            ticket(1, 'Printer jammed', 1),
+            ticket(2, 'Outlook ' + 'x' * 100, 2),
+            ticket(3, 'VPN', 3),
+            ticket(4, 'VPN', 4),
+        ]
+
+        lines = compact_tickets(tickets, NOW, budget_tokens=15)
+
+        self.assertEqual(lines, ['- #1 1h ago: Printer jammed', '- (+3 older tickets omitted)'])
+
+    def test_relative_age(self):
+        self.assertEqual(relative_age(30), '1m')
+        self.assertEqual(relative_age(7200), '2h')
+        self.assertEqual(relative_age(3 * 86400), '3d')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import asyncio
+import time
+import unittest
+from types import SimpleNamespace
+from src.utils.ratelimit import AsyncApiRateLimiter, AsyncRateLimiter
+
+
+class TestAsyncRateLimiter(unittest.TestCase):
+    def test_pause_holds_acquires(self):
+        async def run():
+            limiter = AsyncRateLimiter(rate=1000)
+            limiter.pause(0.05)
+            started = time.monotonic()
+            await limiter.acquire()
+            return time.monotonic() - started
+
+        self.assertGreaterEqual(asyncio.run(run()), 0.04)
+
+    def test_adjust_refunds_and_charges(self):
+        limiter = AsyncRateLimiter(rate=0.001, capacity=100)
+        limiter.tokens = 50
+        limiter.adjust(20)
+        self.assertAlmostEqual(limiter.tokens, 70, places=1)
+        limiter.adjust(-100)
+        self.assertAlmostEqual(limiter.tokens, -30, places=1)
+        limiter.adjust(1000)
+        self.assertEqual(limiter.tokens, 100)
+
+
+class TestAsyncApiRateLimiter(unittest.TestCase):
+    def test_settle_returns_unused_output_tokens(self):
+        limiter = AsyncApiRateLimiter(requests_per_minute=60, input_tokens_per_minute=1000,
+                                      output_tokens_per_minute=600)
+
+        asyncio.run(limiter.acquire(input_tokens=400, output_tokens=500))
+        limiter.settle(400, 500, SimpleNamespace(input_tokens=450, output_tokens=100))
+
+        self.assertAlmostEqual(limiter.input_tokens.tokens, 550, delta=1)
+        self.assertAlmostEqual(limiter.output_tokens.tokens, 500, delta=1)
+        self.assertAlmostEqual(limiter.requests.tokens, 59, delta=1)
+
+    def test_token_budget_delays_requests(self):
+        async def run():
+            # 6000 tokens per minute is 100 per second; the second call waits for a refill
+            limiter = AsyncApiRateLimiter(requests_per_minute=600, input_tokens_per_minute=6000,
+                                          output_tokens_per_minute=6000)
+            limiter.input_tokens.tokens = 10
+            started = time.monotonic()
+            await limiter.acquire(input_tokens=15, output_tokens=1)
+            return time.monotonic() - started
+
+        self.assertGreaterEqual(asyncio.run(run()), 0.04)
+
+
+if __name__ == '__main__':
+    unittest.main()
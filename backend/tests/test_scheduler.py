@@ -0,0 +1,58 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+import scheduler
+
+
+def ticket(ticket_id, summary, member, hours_ago):
+    return {
+        'id': ticket_id,
+        'summary': summary,
+        'dateEntered': (datetime.now() - timedelta(hours=hours_ago)).isoformat(),
+        'enteredBy': member,
+    }
+
+
+class TestParallelScheduler(unittest.TestCase):
+    def setUp(self):
+        self.client = MagicMock()
+        self.client.ANALYSIS_FIELDS = ('id', 'summary', 'dateEntered')
+        self.client.iter_tickets.return_value = iter(
+            [ticket(i, 'Password Reset', 'sarah.smith', i) for i in range(4)]
+            + [ticket(10, 'VPN down', 'john.doe', 1), ticket(11, 'Printer jam', 'someone.else', 1)]
+        )
+        self.alert_manager = MagicMock()
+        patch.object(scheduler, 'ConnectWiseClient', return_value=self.client).start()
+        patch.object(scheduler, 'AlertManager', return_value=self.alert_manager).start()
+        self.ticket_analyzer = patch.object(scheduler, 'TicketAnalyzer').start()
+        self.addCleanup(patch.stopall)
+        self.members = [
+            {"identifier": "sarah.smith", "name": "Sarah Smith"},
+            {"identifier": "john.doe", "name": "John Doe"},
+        ]
+
+    def test_fetches_once_and_alerts_per_member(self):
+        timings = scheduler.monitor_members_parallel(self.members, max_workers=2)
+
+        self.client.iter_tickets.assert_called_once()
+        self.assertEqual(set(timings), {"Sarah Smith", "John Doe"})
+        self.alert_manager.generate_alert.assert_called_once()
+        name, patterns = self.alert_manager.generate_alert.call_args.args
+        self.assertEqual(name, "Sarah Smith")
+        self.assertEqual(patterns[0]['ticket_count'], 4)
+        self.client.close.assert_called_once()
+        self.ticket_analyzer.assert_not_called()
+
+    def test_fetch_failure_is_logged_not_raised(self):
+        self.client.iter_tickets.side_effect = ConnectionError('ConnectWise unreachable')
+
+        with self.assertLogs(scheduler.logger, 'ERROR'):
+            timings = scheduler.monitor_members_parallel(self.members, max_workers=2)
+
+        self.assertEqual(timings, {})
+        self.alert_manager.generate_alert.assert_not_called()
+        self.client.close.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import os
+import subprocess
+import sys
+import unittest
+from unittest.mock import MagicMock, patch
+from src import services
+from src.monitoring.claude_analyzer import ClaudeAnalyzer
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestServices(unittest.TestCase):
+    def setUp(self):
+        self.addCleanup(services._instances.clear)
+        self.addCleanup(patch.stopall)
+
+    def test_instances_are_built_once_on_first_use(self):
+        store_class = patch('src.connectwise.store.TicketStore').start()
+        patch('src.services.settings.TICKET_ARCHIVE_DIR', '').start()
+
+        self.assertNotIn('ticket_store', services._instances)
+        first = services.ticket_store()
+        second = services.ticket_store()
+
+        self.assertIs(first, second)
+        store_class.assert_called_once_with(archive=None)
+
+    def test_forked_child_drops_inherited_instances(self):
+        services._instances['ticket_store'] = MagicMock()
+
+        services._after_fork_in_child()
+
+        self.assertEqual(services._instances, {})
+
+    def test_missing_api_key_fails_on_first_claude_use(self):
+        patch('src.services.settings.ANTHROPIC_API_KEY', None).start()
+        patch('src.services.settings.CLAUDE_CACHE_PATH', '').start()
+
+        analyzer = ClaudeAnalyzer(cache=None, prefilter=None, alert_index=MagicMock())
+
+        with self.assertRaises(ValueError):
+            analyzer.client
+
+    def test_api_import_defers_heavy_modules(self):
+        code = ("import sys; sys.path.insert(0, '..'); import routes; "
+                "print(','.join(m for m in ('anthropic', 'smtplib', 'requests') if m in sys.modules))")
+        result = subprocess.run([sys.executable, '-c', code], cwd=BACKEND_DIR,
+                                capture_output=True, text=True, check=True)
+
+        self.assertEqual(result.stdout.strip(), '')
+
+
+if __name__ == '__main__':
+    unittest.main()
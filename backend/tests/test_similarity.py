@@ -0,0 +1,34 @@
+import unittest
+from src.connectwise.models import Ticket
+from src.monitoring.similarity import SimilarityPrefilter
+
+
+def ticket(summary, ticket_type='Problem', board='Service Board'):
+    return Ticket(1, summary, 'John Smith', 0, '', type=ticket_type, board=board)
+
+
+class TestSimilarityPrefilter(unittest.TestCase):
+    def setUp(self):
+        self.window = [
+            ticket('Outlook keeps asking for password'),
+            ticket('Outlook password prompt again'),
+            ticket('Outlook asking for password - 123'),
+            ticket('Printer not working', 'Service Request'),
+            ticket('New laptop setup', 'Incident'),
+            ticket('VPN disconnects', 'Service Request'),
+        ]
+        self.prefilter = SimilarityPrefilter(min_cluster_size=3, min_similarity=0.5).fit(self.window)
+
+    def test_related_tickets_are_escalated(self):
+        self.assertTrue(self.prefilter.should_escalate(self.window[:3] + self.window[3:4]))
+        self.assertEqual(len(self.prefilter.clusters(self.window[:4])[0]), 3)
+
+    def test_unrelated_tickets_are_not_escalated(self):
+        self.assertFalse(self.prefilter.should_escalate(self.window[3:]))
+
+    def test_too_few_tickets_are_not_escalated(self):
+        self.assertFalse(self.prefilter.should_escalate(self.window[:2]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock
+from src.monitoring.snapshots import SnapshotStore, compute_pattern_snapshots, diff_pattern_snapshots
+
+
+class TestSnapshotStore(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.path = os.path.join(self.tmpdir.name, 'snapshots.db')
+        self.store = SnapshotStore(self.path, keep_versions=2, refresh_timeout=5)
+        self.addCleanup(self.store.close)
+
+    def test_publish_and_read_latest(self):
+        self.assertIsNone(self.store.latest('patterns_user'))
+
+        first = self.store.publish({'patterns_user': {'patterns': []}, 'patterns_live': {'ticket_count': 0}})
+        second = self.store.publish({'patterns_user': {'patterns': [{'user': 'John'}]}})
+
+        self.assertEqual(second, first + 1)
+        self.assertEqual(self.store.latest('patterns_user').payload, '{"patterns":[{"user":"John"}]}')
+        self.assertEqual(self.store.latest('patterns_live').version, first)
+
+    def test_etag_tracks_content(self):
+        self.store.publish({'a': {'x': 1}})
+        etag = self.store.latest('a').etag
+        self.store.publish({'a': {'x': 1}})
+        self.assertEqual(self.store.latest('a').etag, etag)
+        self.store.publish({'a': {'x': 2}})
+        self.assertNotEqual(self.store.latest('a').etag, etag)
+
+    def test_other_processes_see_new_versions(self):
+        reader = SnapshotStore(self.path)
+        self.addCleanup(reader.close)
+
+        self.store.publish({'a': 1})
+        self.assertEqual(reader.latest('a').payload, '1')
+        self.store.publish({'a': 2})
+        self.assertEqual(reader.latest('a').payload, '2')
+
+    def test_old_versions_are_pruned(self):
+        for i in range(5):
+            self.store.publish({'a': i})
+        count = self.store._conn.execute("SELECT COUNT(*) FROM snapshots").fetchone()[0]
+        self.assertEqual(count, 2)
+
+    def test_concurrent_refreshes_share_one_computation(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return {'a': len(calls)}
+
+        threads = [threading.Thread(target=self.store.refresh, args=(compute,)) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(self.store.latest('a').payload, '1')
+
+    def test_refresh_waits_for_lease_holder_in_other_process(self):
+        other = SnapshotStore(self.path)
+        self.addCleanup(other.close)
+        self.assertTrue(other._acquire_lease('refresh'))
+        threading.Timer(0.3, other.publish, args=({'a': 'from other'},)).start()
+
+        compute = MagicMock()
+        self.store.refresh(compute)
+
+        compute.assert_not_called()
+        self.assertEqual(self.store.latest('a').payload, '"from other"')
+
+    def test_waiting_on_another_refresh_is_capped(self):
+        store = SnapshotStore(self.path, refresh_timeout=60, refresh_wait=0.2)
+        self.addCleanup(store.close)
+        other = SnapshotStore(self.path)
+        self.addCleanup(other.close)
+        self.assertTrue(other._acquire_lease('refresh'))
+
+        started = time.monotonic()
+        version = store.refresh(MagicMock())
+
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertEqual(version, 0)
+
+
+class TestComputePatternSnapshots(unittest.TestCase):
+    def test_builds_both_endpoint_payloads(self):
+        analyzer = MagicMock()
+        analyzer.analyze_tickets.return_value = [{'user': 'John'}]
+        analyzer.outbreak_patterns.return_value = [{'pattern_type': 'outbreak', 'pattern_value': 'email problems'}]
+        ticket_store = MagicMock()
+        ticket_store.count_tickets.return_value = 7
+
+        snapshots = compute_pattern_snapshots(analyzer, ticket_store)
+
+        self.assertEqual(snapshots['patterns_user']['patterns'], [{'user': 'John'}])
+        self.assertEqual(snapshots['patterns_live']['ticket_count'], 7)
+        self.assertEqual(snapshots['patterns_outbreak']['patterns'][0]['pattern_value'], 'email problems')
+
+
+def live(patterns, ticket_count=0):
+    return {'patterns_live': {'timestamp': 't', 'ticket_count': ticket_count, 'patterns': patterns}}
+
+
+class TestPatternEvents(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.store = SnapshotStore(os.path.join(self.tmpdir.name, 'snapshots.db'),
+                                   differ=diff_pattern_snapshots, keep_events=3)
+        self.addCleanup(self.store.close)
+
+    def test_diff_reports_only_changes(self):
+        john = {'user': 'John', 'ticket_count': 2, 'pattern_details': {'issue_type': 'VPN'}}
+        jane = {'user': 'Jane', 'ticket_count': 3, 'pattern_details': {'issue_type': 'Printer'}}
+        john_grown = dict(john, ticket_count=3)
+
+        events = diff_pattern_snapshots(live([john, jane], 5), live([john_grown], 5))
+
+        self.assertEqual(events, [
+            ('pattern_changed', john_grown),
+            ('pattern_resolved', {'user': 'Jane', 'key': 'Jane|Printer'}),
+        ])
+
+    def test_publish_records_events_for_resume(self):
+        pattern = {'user': 'John', 'ticket_count': 2, 'pattern_details': 'x'}
+        self.store.publish(live([pattern], 1))
+        cursor = self.store.last_event_id()
+        self.store.publish(live([pattern], 1))
+        self.assertEqual(self.store.events_after(cursor), [])
+
+        self.store.publish(live([pattern], 4))
+
+        events = self.store.events_after(cursor)
+        self.assertEqual([e.event for e in events], ['ticket_count'])
+        self.assertEqual(events[0].data, '{"ticket_count":4,"timestamp":"t"}')
+
+    def test_old_events_are_pruned(self):
+        for count in range(6):
+            self.store.publish(live([], count))
+        self.assertEqual(len(self.store.events_after(0)), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
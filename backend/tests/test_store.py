@@ -0,0 +1,87 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+from src.connectwise.store import TicketStore, parse_cw_datetime
+
+
+def make_ticket(ticket_id, entered, updated=None, summary='Printer Not Working'):
+    return {
+        'id': ticket_id,
+        'summary': summary,
+        'dateEntered': entered,
+        '_info': {'lastUpdated': updated or entered},
+    }
+
+
+class TestTicketStore(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.store = TicketStore(os.path.join(self.tmpdir.name, 'tickets.db'))
+        self.addCleanup(self.store.close)
+
+    def test_parse_cw_datetime_accepts_zulu_suffix(self):
+        parsed = parse_cw_datetime('2024-05-01T12:00:00Z')
+        self.assertEqual(parsed.utcoffset(), timedelta(0))
+
+    def test_upsert_replaces_and_advances_watermark(self):
+        now = datetime.now().replace(microsecond=0)
+        entered = now.isoformat()
+        self.store.upsert([make_ticket(1, entered, '2024-05-01T10:00:00Z')])
+        self.store.upsert([make_ticket(1, entered, '2024-05-01T11:00:00Z', summary='Printer fixed')])
+
+        tickets = list(self.store.iter_tickets(now - timedelta(hours=1), now + timedelta(hours=1)))
+
+        self.assertEqual(len(tickets), 1)
+        self.assertEqual(tickets[0]['summary'], 'Printer fixed')
+        self.assertEqual(self.store.watermark, '2024-05-01T11:00:00Z')
+
+    def test_watermark_never_moves_backwards(self):
+        entered = datetime.now().isoformat()
+        self.store.upsert([make_ticket(1, entered, '2024-05-01T11:00:00Z')])
+        self.store.upsert([make_ticket(2, entered, '2024-05-01T09:00:00Z')])
+
+        self.assertEqual(self.store.watermark, '2024-05-01T11:00:00Z')
+
+    def test_sync_fetches_only_since_watermark(self):
+        client = MagicMock()
+        client.iter_updated_tickets.return_value = iter([
+            make_ticket(1, datetime.now().isoformat(), '2024-05-01T10:00:00Z')
+        ])
+        self.assertEqual(self.store.sync(client), 1)
+
+        client.iter_updated_tickets.return_value = iter([])
+        self.store.sync(client)
+
+        client.iter_updated_tickets.assert_called_with('2024-05-01T10:00:00Z')
+
+    def test_failed_sync_keeps_the_watermark(self):
+        entered = datetime.now().isoformat()
+
+        def stream():
+            # Ordered by id: the first ticket changed last, and the fetch dies before the second
+            yield make_ticket(1, entered, '2024-05-01T12:00:00Z')
+            raise ConnectionError('retries exhausted')
+
+        with self.assertRaises(ConnectionError):
+            self.store.upsert(stream(), batch_size=1)
+
+        self.assertIsNone(self.store.watermark)
+        self.assertEqual(self.store.count_tickets(datetime.now() - timedelta(hours=1), datetime.now()), 1)
+
+    def test_window_queries_and_prune(self):
+        now = datetime.now()
+        self.store.upsert([
+            make_ticket(1, (now - timedelta(days=10)).isoformat()),
+            make_ticket(2, (now - timedelta(hours=2)).isoformat()),
+        ])
+
+        self.assertEqual(self.store.count_tickets(now - timedelta(days=3), now), 1)
+        self.assertEqual(self.store.prune(now - timedelta(days=5)), 1)
+        self.assertEqual(self.store.count_tickets(now - timedelta(days=30), now), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
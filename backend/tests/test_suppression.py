@@ -0,0 +1,69 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from src.monitoring.suppression import AlertStateIndex, SEND, FOLLOW_UP, SUPPRESS
+
+
+class TestAlertStateIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.path = os.path.join(self.tmpdir.name, 'alert_state.db')
+        self.index = AlertStateIndex(self.path, cooldown_seconds=3600)
+        self.addCleanup(self.index.close)
+
+    def alert(self, index, user, issue_type, ticket_ids):
+        """Check an alert and, unless suppressed, record it as sent"""
+        decision = index.check(user, issue_type, ticket_ids)
+        if decision != SUPPRESS:
+            index.record(user, issue_type, ticket_ids, decision=decision)
+        return decision
+
+    def test_duplicates_are_suppressed_within_cooldown(self):
+        self.assertEqual(self.alert(self.index, 'John', 'Outlook login', [1, 2]), SEND)
+        self.assertEqual(self.alert(self.index, 'John', 'outlook LOGIN', [2, 1]), SUPPRESS)
+        self.assertEqual(self.alert(self.index, 'Jane', 'Outlook login', [3, 4]), SEND)
+
+    def test_unrecorded_alerts_are_not_suppressed(self):
+        # check() alone, as when delivery failed
+        self.assertEqual(self.index.check('John', 'Outlook login', [1, 2]), SEND)
+        self.assertEqual(self.index.check('John', 'Outlook login', [1, 2]), SEND)
+        self.assertEqual(len(self.index), 0)
+
+    def test_follow_up_only_when_ticket_count_grows(self):
+        self.alert(self.index, 'John', 'Outlook login', [1, 2, 3])
+
+        # Oldest ticket rolled out of the window: different set, but not growth
+        self.assertEqual(self.alert(self.index, 'John', 'Outlook login', [2, 3, 4]), SUPPRESS)
+        self.assertEqual(self.alert(self.index, 'John', 'Outlook login', [2, 3, 4, 5]), FOLLOW_UP)
+        self.assertEqual(self.alert(self.index, 'John', 'Outlook login', [2, 3, 4, 5]), SUPPRESS)
+
+    def test_alerts_again_after_cooldown(self):
+        with patch('src.monitoring.suppression.time.time', return_value=1000.0):
+            self.alert(self.index, 'John', 'Outlook login', [1, 2])
+        with patch('src.monitoring.suppression.time.time', return_value=1000.0 + 3600):
+            self.assertEqual(self.index.check('John', 'Outlook login', [1, 2]), SEND)
+
+    def test_state_is_shared_through_the_file(self):
+        other = AlertStateIndex(self.path, cooldown_seconds=3600)
+        self.addCleanup(other.close)
+
+        self.assertEqual(self.alert(self.index, 'John', 'Outlook login', [1, 2]), SEND)
+        # other loaded before the alert was recorded, and still sees it
+        self.assertEqual(other.check('John', 'Outlook login', [1, 2]), SUPPRESS)
+
+        restarted = AlertStateIndex(self.path, cooldown_seconds=3600)
+        self.addCleanup(restarted.close)
+        self.assertEqual(len(restarted), 1)
+
+    def test_prune_forgets_expired_alerts(self):
+        with patch('src.monitoring.suppression.time.time', return_value=1000.0):
+            self.alert(self.index, 'John', 'Outlook login', [1, 2])
+
+        self.assertEqual(self.index.prune(), 1)
+        self.assertEqual(len(self.index), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import random
+import unittest
+from src.connectwise.models import Ticket
+from src.monitoring.ticket_index import TicketIndex
+
+HOUR = 3600
+NOW = 1_700_000_000
+
+
+def ticket(ticket_id, user, hours_ago, summary='VPN down'):
+    return Ticket(ticket_id, summary, user, NOW - int(hours_ago * HOUR), '')
+
+
+class TestTicketIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = TicketIndex(windows=(HOUR, 24 * HOUR, 72 * HOUR))
+
+    def test_window_queries_handle_out_of_order_arrival(self):
+        self.index.add_many([ticket(1, 'ann', 5), ticket(2, 'ann', 30), ticket(3, 'ann', 0.5)])
+
+        recent = self.index.tickets('ann', NOW - 24 * HOUR, NOW)
+
+        self.assertEqual([t.id for t in recent], [1, 3])
+        self.assertEqual(self.index.tickets('nobody', 0, NOW), [])
+
+    def test_threshold_queries_for_several_windows(self):
+        self.index.add_many([ticket(1, 'ann', 0.2), ticket(2, 'ann', 0.5), ticket(3, 'ann', 10),
+                             ticket(4, 'bob', 0.1), ticket(5, 'bob', 50), ticket(6, 'cy', 2)])
+
+        self.assertEqual(self.index.users_with_at_least(2, HOUR, NOW), {'ann'})
+        self.assertEqual(self.index.users_with_at_least(1, 24 * HOUR, NOW), {'ann', 'bob', 'cy'})
+        self.assertEqual(self.index.users_with_at_least(2, 72 * HOUR, NOW), {'ann', 'bob'})
+        # Unconfigured window sizes fall back to bisecting each user
+        self.assertEqual(self.index.users_with_at_least(3, 7 * 24 * HOUR, NOW), {'ann'})
+
+    def test_counts_expire_as_time_advances(self):
+        self.index.add_many([ticket(1, 'ann', 0.5), ticket(2, 'ann', 0.9)])
+        self.assertEqual(self.index.count('ann', HOUR, NOW), 2)
+
+        self.assertEqual(self.index.count('ann', HOUR, NOW + 0.3 * HOUR), 1)
+        self.assertEqual(self.index.users_with_at_least(1, HOUR, NOW + HOUR), set())
+        self.assertEqual(self.index.count('ann', 24 * HOUR, NOW + HOUR), 2)
+
+    def test_readding_a_moved_ticket_updates_counts(self):
+        self.index.add(ticket(1, 'ann', 0.5))
+        self.index.add(ticket(1, 'bob', 0.5))
+
+        self.assertEqual(self.index.count('ann', HOUR, NOW), 0)
+        self.assertEqual(self.index.count('bob', HOUR, NOW), 1)
+        self.assertEqual(len(self.index), 1)
+
+    def test_prune_keeps_counts_consistent(self):
+        self.index.add_many([ticket(1, 'ann', 30), ticket(2, 'ann', 2)])
+        self.index.advance(NOW)
+
+        self.assertEqual(self.index.prune(NOW - 24 * HOUR), 1)
+        self.assertEqual(self.index.count('ann', 72 * HOUR, NOW), 1)
+
+    def test_maintained_counts_match_a_full_scan(self):
+        rng = random.Random(7)
+        tickets = [ticket(i, f"user{rng.randrange(20)}", rng.uniform(0, 100)) for i in range(500)]
+        rng.shuffle(tickets)
+        self.index.add_many(tickets)
+
+        for now in (NOW, NOW + 5 * HOUR, NOW + 30 * HOUR):
+            for seconds in self.index.windows:
+                expected = {}
+                for t in tickets:
+                    if now - seconds <= t.entered <= now:
+                        expected[t.user] = expected.get(t.user, 0) + 1
+                self.assertEqual(self.index.users_with_at_least(3, seconds, now),
+                                 {user for user, count in expected.items() if count >= 3})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,46 +1,161 @@
-from flask import Flask, jsonify
+from flask import Flask, Response, g, jsonify, request, stream_with_context
 from flask_cors import CORS
-from backend.src.connectwise.client import ConnectWiseClient
-from backend.src.monitoring.analyzer import TicketAnalyzer
-from datetime import datetime, timedelta
+from backend.src import services
+from backend.src.config import settings
+from backend.src.monitoring.snapshots import compute_pattern_snapshots
+from backend.src.utils import metrics
+from backend.src.utils.logger import configure_logging
+import json
+import time
+
+configure_logging()
 
 app = Flask(__name__)
 CORS(app)
 
-cw_client = ConnectWiseClient()
-analyzer = TicketAnalyzer(cw_client)
+# Clients, stores and the analyzer are built on first use by the worker that needs them
+
+HTTP_REQUESTS = metrics.counter('http_requests_total', 'API responses by route, method and status',
+                                ('route', 'method', 'status'))
+HTTP_REQUEST_SECONDS = metrics.histogram('http_request_seconds', 'API latency by route until the response starts',
+                                         ('route',))
+
+@app.before_request
+def _start_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def _record_request(response):
+    # The route pattern, not the raw path, keeps label cardinality bounded
+    route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    HTTP_REQUESTS.inc(route=route, method=request.method, status=response.status_code)
+    if 'request_started' in g:
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - g.request_started, route=route)
+    return response
+
+def _serve_snapshot(name):
+    """
+    Serve the latest published snapshot, honoring If-None-Match. ?refresh=1
+    (or an empty store) recomputes first; concurrent refreshes share one run.
+    A failed refresh falls back to the previous snapshot, or a 503 if none
+    has been published yet.
+    """
+    snapshot_store = services.snapshot_store()
+    snapshot = snapshot_store.latest(name)
+    if snapshot is None or request.args.get('refresh') == '1':
+        try:
+            snapshot_store.refresh(lambda: compute_pattern_snapshots(services.ticket_analyzer(), services.ticket_store()))
+        except Exception as e:
+            app.logger.error(f"Snapshot refresh failed: {str(e)}")
+        snapshot = snapshot_store.latest(name)
+    if snapshot is None:
+        response = jsonify({'error': 'Patterns are not available yet; try again shortly'})
+        response.status_code = 503
+        response.headers['Retry-After'] = '30'
+        return response
+
+    if request.if_none_match.contains(snapshot.etag):
+        response = Response(status=304)
+    else:
+        response = Response(snapshot.payload, mimetype='application/json')
+    response.set_etag(snapshot.etag)
+    response.headers['X-Snapshot-Version'] = str(snapshot.version)
+    return response
 
 @app.route('/')
 def home():
     return jsonify({"message": "ConnectWise Monitor API"})
 
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus scrape endpoint, summed across gunicorn workers when METRICS_DIR is set"""
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
 @app.route('/api/patterns/user', methods=['GET'])
 def get_user_patterns():
     try:
-        patterns = analyzer.analyze_tickets()
-        return jsonify({
-            'timestamp': datetime.now().isoformat(),
-            'patterns': patterns
-        })
+        return _serve_snapshot('patterns_user')
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/patterns/live', methods=['GET'])
 def get_live_patterns():
-    """Get patterns from the last hour for immediate analysis"""
+    """Get patterns with the ticket count from the last hour"""
+    try:
+        return _serve_snapshot('patterns_live')
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/patterns/outbreaks', methods=['GET'])
+def get_outbreak_patterns():
+    """Issues spiking across many users at once, e.g. an outage"""
     try:
-        end_date = datetime.now()
-        start_date = end_date - timedelta(hours=1)
-        tickets = cw_client.get_tickets(start_date, end_date)
-        patterns = analyzer.analyze_tickets()
-        return jsonify({
-            'timestamp': datetime.now().isoformat(),
-            'ticket_count': len(tickets),
-            'patterns': patterns
-        })
+        return _serve_snapshot('patterns_outbreak')
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _event_cursor():
+    # EventSource sends Last-Event-ID on reconnect; plain clients can pass ?last_event_id=
+    cursor = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    if cursor is not None and cursor.isdigit():
+        return int(cursor)
+    return None
+
+@app.route('/api/patterns/stream', methods=['GET'])
+def stream_patterns():
+    """
+    Server-Sent Events of new, changed and resolved patterns and live ticket
+    counts. The stream closes after STREAM_MAX_SECONDS so it does not pin a
+    worker; EventSource reconnects and resumes from Last-Event-ID.
+    """
+    snapshot_store = services.snapshot_store()
+    cursor = _event_cursor()
+    if cursor is None:
+        cursor = snapshot_store.last_event_id()
+
+    def generate(cursor):
+        yield "retry: 3000\n\n"
+        started = last_sent = time.monotonic()
+        while time.monotonic() - started < settings.STREAM_MAX_SECONDS:
+            events = snapshot_store.events_after(cursor)
+            for event in events:
+                yield f"id: {event.id}\nevent: {event.event}\ndata: {event.data}\n\n"
+                cursor = event.id
+            if events:
+                last_sent = time.monotonic()
+                continue
+            if time.monotonic() - last_sent >= settings.STREAM_HEARTBEAT_SECONDS:
+                yield ": keep-alive\n\n"
+                last_sent = time.monotonic()
+            time.sleep(settings.STREAM_POLL_SECONDS)
+
+    return Response(stream_with_context(generate(cursor)), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/patterns/events', methods=['GET'])
+def poll_pattern_events():
+    """Long-poll variant of the stream: waits up to ?timeout= seconds for events after the cursor"""
+    snapshot_store = services.snapshot_store()
+    cursor = _event_cursor()
+    if cursor is None:
+        cursor = snapshot_store.last_event_id()
+    # Non-numeric values fall back to the default rather than failing the request
+    timeout = min(request.args.get('timeout', 25.0, type=float), settings.STREAM_MAX_SECONDS)
+
+    deadline = time.monotonic() + timeout
+    events = snapshot_store.events_after(cursor)
+    while not events and time.monotonic() < deadline:
+        time.sleep(settings.STREAM_POLL_SECONDS)
+        events = snapshot_store.events_after(cursor)
+
+    return jsonify({
+        'last_event_id': events[-1].id if events else cursor,
+        'events': [
+            {'id': e.id, 'event': e.event, 'data': json.loads(e.data)}
+            for e in events
+        ]
+    })
+
 @app.route('/api/test-email', methods=['GET'])
 def test_email():
     try:
@@ -54,8 +169,10 @@ def test_email():
             'user_impact': 'This is a test pattern for email functionality.'
         }
         
-        # Send the test email
-        analyzer.claude.send_pattern_email('Test User', dummy_pattern)
+        # Queue the test email and deliver it right away
+        services.ticket_analyzer().claude.send_pattern_email('Test User', dummy_pattern)
+        if not services.alert_dispatcher().flush():
+            return jsonify({'error': 'Test email could not be delivered; it will be retried.'}), 502
         
         return jsonify({'message': 'Test email sent successfully.'})
     except Exception as e: